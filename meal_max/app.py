@@ -1,10 +1,27 @@
+import atexit
+import csv
+import io
+import json
+from typing import Any, Iterator
+
 from dotenv import load_dotenv
 from flask import Flask, jsonify, make_response, Response, request
 # from flask_cors import CORS
 
 from meal_max.models import kitchen_model
-from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.models.arena_model import get_arena_registry
+from meal_max.models.matchmaking_model import get_matchmaking_queue
+from meal_max.models.simulation_model import SIMULATION_TRIALS, simulate_battles
+from meal_max.models.tournament_model import get_tournament_registry
+from meal_max.utils.meal_cache import get_meal_cache
+from meal_max.utils.random_utils import get_random_pool
+from meal_max.utils.sql_utils import (
+    apply_migrations,
+    check_database_connection,
+    check_table_exists,
+    close_pool,
+    get_pool_stats
+)
 
 
 # Load environment variables from .env file
@@ -16,8 +33,23 @@ app = Flask(__name__)
 # uncomment this
 # CORS(app)
 
-# Initialize the BattleModel
-battle_model = BattleModel()
+# Close the pooled database connections when the process exits
+atexit.register(close_pool)
+
+# Start fetching random numbers so the first battles don't fall back to local ones
+get_random_pool().prefill()
+
+# Bring the schema (indexes) up to date before serving requests
+try:
+    apply_migrations()
+except Exception as e:
+    app.logger.error("Could not apply database migrations: %s", str(e))
+
+# Build the in-memory leaderboard; if this fails it is loaded on the first request instead
+try:
+    kitchen_model.load_leaderboard()
+except Exception as e:
+    app.logger.error("Could not load the leaderboard: %s", str(e))
 
 ####################################################
 #
@@ -58,6 +90,39 @@ def db_check() -> Response:
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats() -> Response:
+    """
+    Route to get the usage counters of the database connection pool.
+
+    Returns:
+        JSON response with the pool size, idle/in-use connections and hit/miss/eviction counters.
+    """
+    app.logger.info('Retrieving database pool stats')
+    return make_response(jsonify({'status': 'success', 'pool': get_pool_stats()}), 200)
+
+@app.route('/api/meal-cache-stats', methods=['GET'])
+def meal_cache_stats() -> Response:
+    """
+    Route to get the counters of the meal lookup cache.
+
+    Returns:
+        JSON response with the cache size and hit/miss/eviction/invalidation counters.
+    """
+    app.logger.info('Retrieving meal cache stats')
+    return make_response(jsonify({'status': 'success', 'meal_cache': get_meal_cache().stats()}), 200)
+
+@app.route('/api/random-pool-stats', methods=['GET'])
+def random_pool_stats() -> Response:
+    """
+    Route to get the counters of the prefetched random number pool.
+
+    Returns:
+        JSON response with the numbers available and the hit/refill/fallback counters.
+    """
+    app.logger.info('Retrieving random pool stats')
+    return make_response(jsonify({'status': 'success', 'random_pool': get_random_pool().stats()}), 200)
+
 
 ##########################################################
 #
@@ -115,6 +180,56 @@ def add_meal() -> Response:
         app.logger.error("Failed to add combatant: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/create-meals', methods=['POST'])
+def add_meals() -> Response:
+    """
+    Route to add many meals to the database at once.
+
+    Expected Input, chosen by Content-Type:
+        - application/json: an array of objects with meal, cuisine, price and difficulty.
+        - application/x-ndjson: one such object per line, read as it streams in.
+        - text/csv: a header row naming the four fields, then one meal per row, read as it streams in.
+
+    Returns:
+        JSON response with the number of rows read and inserted, the per-row errors
+        (invalid rows and duplicate names are skipped, not fatal) and the rows per second.
+    Raises:
+        400 error if the body is not one of the supported formats.
+        500 error if there is an issue adding the meals to the database.
+    """
+    app.logger.info('Bulk creating meals')
+    try:
+        content_type = request.mimetype
+        if content_type == 'application/json':
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return make_response(jsonify({'error': 'Invalid input, expected a JSON array of meals'}), 400)
+        elif content_type == 'application/x-ndjson':
+            rows = _iter_ndjson(request.stream)
+        elif content_type == 'text/csv':
+            rows = csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+        else:
+            return make_response(jsonify({'error': f'Unsupported content type: {content_type}'}), 400)
+
+        result = kitchen_model.create_meals(rows)
+
+        app.logger.info("Bulk import added %d of %d meals", result['inserted'], result['rows'])
+        return make_response(jsonify({'status': 'success', **result}), 201)
+    except Exception as e:
+        app.logger.error("Failed to bulk add meals: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+def _iter_ndjson(stream) -> Iterator[Any]:
+    # a malformed line is passed through as text so it is reported as an invalid row
+    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
 @app.route('/api/clear-meals', methods=['DELETE'])
 def clear_catalog() -> Response:
     """
@@ -146,6 +261,7 @@ def delete_meal(meal_id: int) -> Response:
         app.logger.info(f"Deleting meal by ID: {meal_id}")
 
         kitchen_model.delete_meal(meal_id)
+        get_matchmaking_queue().discard(meal_id)
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
         app.logger.error(f"Error deleting meal: {e}")
@@ -202,20 +318,78 @@ def get_meal_by_name(meal_name: str) -> Response:
 ############################################################
 
 
+def get_arena():
+    # Clients pick their arena with ?arena= or an X-Arena-Id header; without one
+    # they share the default arena, as before arenas existed. Raises ValueError for
+    # an id that was never created or has been evicted.
+    arena_id = request.args.get('arena') or request.headers.get('X-Arena-Id')
+    return get_arena_registry().get(arena_id)
+
+@app.route('/api/create-arena', methods=['POST'])
+def create_arena() -> Response:
+    """
+    Route to create a private arena, with its own combatants, for a client.
+
+    Returns:
+        JSON response with the arena id to pass as ?arena= or X-Arena-Id to the battle routes.
+    """
+    arena = get_arena_registry().create()
+    app.logger.info("Created arena %s", arena.id)
+    return make_response(jsonify({'status': 'success', 'arena_id': arena.id}), 201)
+
+@app.route('/api/delete-arena/<string:arena_id>', methods=['DELETE'])
+def delete_arena(arena_id: str) -> Response:
+    """
+    Route to delete an arena and its combatants.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        404 error if there is no such arena, or it is the default arena.
+    """
+    try:
+        get_arena_registry().remove(arena_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
+@app.route('/api/arena-stats', methods=['GET'])
+def arena_stats() -> Response:
+    """
+    Route to get the number of live arenas and the creation/eviction counters.
+
+    Returns:
+        JSON response with the arena registry stats.
+    """
+    app.logger.info('Retrieving arena stats')
+    return make_response(jsonify({'status': 'success', 'arena_registry': get_arena_registry().stats()}), 200)
+
 @app.route('/api/battle', methods=['GET'])
 def battle() -> Response:
     """
-    Route to initiate a battle between the two currently prepared meals.
+    Route to initiate a battle between the two meals prepared in the arena.
+
+    Query Parameters:
+        - arena (str, optional): The arena to battle in; also read from the X-Arena-Id header.
 
     Returns:
         JSON response indicating the result of the battle and the winner.
     Raises:
+        404 error if there is no such arena.
         500 error if there is an issue during the battle.
     """
+    try:
+        arena = get_arena()
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
     try:
         app.logger.info('Two meals enter, one meal leaves!')
 
-        winner = battle_model.battle()
+        winner = arena.battle()
 
         return make_response(jsonify({'status': 'success', 'winner': winner}), 200)
     except Exception as e:
@@ -225,16 +399,25 @@ def battle() -> Response:
 @app.route('/api/clear-combatants', methods=['POST'])
 def clear_combatants() -> Response:
     """
-    Route to clear the list of combatants for the battle.
+    Route to clear the list of combatants in the arena.
+
+    Query Parameters:
+        - arena (str, optional): The arena to clear; also read from the X-Arena-Id header.
 
     Returns:
         JSON response indicating success of the operation.
     Raises:
+        404 error if there is no such arena.
         500 error if there is an issue clearing combatants.
     """
+    try:
+        arena = get_arena()
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
     try:
         app.logger.info('Clearing all combatants...')
-        battle_model.clear_combatants()
+        arena.clear_combatants()
         app.logger.info('Combatants cleared.')
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
@@ -244,14 +427,24 @@ def clear_combatants() -> Response:
 @app.route('/api/get-combatants', methods=['GET'])
 def get_combatants() -> Response:
     """
-    Route to get the list of combatants for the battle.
+    Route to get the list of combatants in the arena.
+
+    Query Parameters:
+        - arena (str, optional): The arena to read; also read from the X-Arena-Id header.
 
     Returns:
         JSON response with the list of combatants.
+    Raises:
+        404 error if there is no such arena.
     """
+    try:
+        arena = get_arena()
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
     try:
         app.logger.info('Getting combatants...')
-        combatants = battle_model.get_combatants()
+        combatants = arena.get_combatants()
         return make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
     except Exception as e:
         app.logger.error("Failed to get combatants: %s", str(e))
@@ -265,11 +458,20 @@ def prep_combatant() -> Response:
     Parameters:
         - meal (str): The name of the meal
 
+    Query Parameters:
+        - arena (str, optional): The arena to prep in; also read from the X-Arena-Id header.
+
     Returns:
         JSON response indicating the success of combatant preparation.
     Raises:
+        404 error if there is no such arena.
         500 error if there is an issue preparing combatants.
     """
+    try:
+        arena = get_arena()
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
     try:
         data = request.json
         meal = data.get('meal')
@@ -280,8 +482,7 @@ def prep_combatant() -> Response:
 
         try:
             meal = kitchen_model.get_meal_by_name(meal)
-            battle_model.prep_combatant(meal)
-            combatants = battle_model.get_combatants()
+            combatants = arena.prep_combatant(meal)
         except Exception as e:
             app.logger.error("Failed to prepare combatant: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
@@ -292,6 +493,214 @@ def prep_combatant() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+############################################################
+#
+# Tournaments
+#
+############################################################
+
+
+@app.route('/api/create-tournament', methods=['POST'])
+def create_tournament() -> Response:
+    """
+    Route to start a tournament between meals, fought out in the background.
+
+    Expected JSON Input:
+        - meal_ids (list of int): The meals entering, in seed order.
+        - format (str, optional): 'single_elimination' (default) or 'round_robin'.
+
+    Returns:
+        JSON response with the tournament id to poll and its initial state.
+    Raises:
+        400 error if the input is invalid.
+        500 error if there is an issue starting the tournament.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_ids = data.get('meal_ids')
+        tournament_format = data.get('format', 'single_elimination')
+
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'meal_ids must be a list of meal IDs'}), 400)
+
+        app.logger.info("Starting %s tournament with %d meals", tournament_format, len(meal_ids))
+        tournament = get_tournament_registry().start(meal_ids, tournament_format)
+
+        return make_response(jsonify({'status': 'success', 'tournament_id': tournament.id,
+                                      'tournament': tournament.to_dict()}), 202)
+    except ValueError as e:
+        app.logger.error("Invalid tournament: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to start tournament: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-tournament/<string:tournament_id>', methods=['GET'])
+def get_tournament(tournament_id: str) -> Response:
+    """
+    Route to poll a tournament's progress and, once it is completed, its standings.
+
+    Path Parameter:
+        - tournament_id (str): The ID returned when the tournament was created.
+
+    Query Parameters:
+        - rounds (bool, optional): Include every battle result, round by round.
+
+    Returns:
+        JSON response with the tournament's status, progress, champion and standings.
+    Raises:
+        404 error if there is no such tournament.
+    """
+    try:
+        app.logger.info("Retrieving tournament %s", tournament_id)
+        include_rounds = request.args.get('rounds', 'false').lower() == 'true'
+        tournament = get_tournament_registry().get_state(tournament_id, include_rounds)
+        return make_response(jsonify({'status': 'success', 'tournament': tournament}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
+
+@app.route('/api/simulate-battles', methods=['POST'])
+def simulate_battles_route() -> Response:
+    """
+    Route to estimate pairwise win probabilities by simulation, without recording any battles.
+
+    Expected JSON Input:
+        - meal_ids (list of int): The meals to pair up.
+        - trials (int, optional): The number of simulated battles per ordered pair.
+        - seed (int, optional): Seed for a reproducible simulation.
+
+    Returns:
+        JSON response with the win probability matrix and the meals ranked by expected wins.
+    Raises:
+        400 error if the input is invalid, the simulation is too large, or a meal does not exist.
+        500 error if there is an issue running the simulation.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_ids = data.get('meal_ids')
+        trials = data.get('trials', SIMULATION_TRIALS)
+        seed = data.get('seed')
+
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'meal_ids must be a list of meal IDs'}), 400)
+        if not isinstance(trials, int) or (seed is not None and not isinstance(seed, int)):
+            return make_response(jsonify({'error': 'trials and seed must be integers'}), 400)
+
+        app.logger.info("Simulating %d trials between %d meals", trials, len(meal_ids))
+        simulation = simulate_battles(meal_ids, trials, seed)
+
+        return make_response(jsonify({'status': 'success', 'simulation': simulation}), 200)
+    except ValueError as e:
+        app.logger.error("Invalid simulation: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to run simulation: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Matchmaking
+#
+############################################################
+
+
+@app.route('/api/enqueue-meals', methods=['POST'])
+def enqueue_meals() -> Response:
+    """
+    Route to put meals in the matchmaking queue, pairing each with the waiting meal of nearest battle score.
+
+    Expected JSON Input:
+        - meal_ids (list of int): The meals looking for an opponent.
+
+    Returns:
+        JSON response with the matches made; they are fought by /api/dispatch-battles.
+    Raises:
+        400 error if the input is invalid, a meal does not exist or is already queued.
+        500 error if there is an issue enqueueing the meals.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meal_ids = data.get('meal_ids')
+
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'meal_ids must be a list of meal IDs'}), 400)
+
+        app.logger.info("Enqueueing %d meals for matchmaking", len(meal_ids))
+        matches = get_matchmaking_queue().enqueue(meal_ids)
+
+        return make_response(jsonify({'status': 'success', 'matches': [list(match) for match in matches]}), 200)
+    except ValueError as e:
+        app.logger.error("Invalid matchmaking request: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to enqueue meals: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/dequeue-meal/<int:meal_id>', methods=['DELETE'])
+def dequeue_meal(meal_id: int) -> Response:
+    """
+    Route to take a meal out of the matchmaking queue; an opponent it was matched with is matched again.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        404 error if the meal is not in the queue or is battling.
+    """
+    try:
+        get_matchmaking_queue().dequeue(meal_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+
+@app.route('/api/dispatch-battles', methods=['POST'])
+def dispatch_battles() -> Response:
+    """
+    Route to fight the queued matches in one batch and record the results.
+
+    Expected JSON Input:
+        - max_battles (int, optional): The most matches to fight; defaults to the batch size.
+
+    Returns:
+        JSON response with the battles fought and any dropped because a meal was deleted.
+    Raises:
+        400 error if max_battles is invalid.
+        500 error if there is an issue recording the battles; the matches stay queued.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        max_battles = data.get('max_battles')
+
+        if max_battles is not None and not isinstance(max_battles, int):
+            return make_response(jsonify({'error': 'max_battles must be an integer'}), 400)
+
+        app.logger.info("Dispatching matchmaking battles")
+        dispatch = get_matchmaking_queue().dispatch(max_battles)
+
+        return make_response(jsonify({'status': 'success', **dispatch}), 200)
+    except ValueError as e:
+        app.logger.error("Invalid dispatch: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to dispatch battles: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/matchmaking-stats', methods=['GET'])
+def matchmaking_stats() -> Response:
+    """
+    Route to get the number of waiting meals and queued matches, and the matchmaking counters.
+
+    Returns:
+        JSON response with the matchmaking queue stats.
+    """
+    app.logger.info('Retrieving matchmaking stats')
+    return make_response(jsonify({'status': 'success', 'matchmaking': get_matchmaking_queue().stats()}), 200)
+
+
 ############################################################
 #
 # Leaderboard
@@ -306,23 +715,66 @@ def get_leaderboard() -> Response:
 
     Query Parameters:
         - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - limit (int, optional): Return at most this many meals.
+        - offset (int, optional): Skip this many meals from the top. Default is 0.
 
     Returns:
         JSON response with a sorted leaderboard of meals.
     Raises:
+        400 error if the sort, limit or offset is invalid.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
-        app.logger.info("Generating leaderboard sorted by %s", sort_by)
+        # parsed here rather than with type=int, which turns a malformed value into the default
+        try:
+            limit = int(request.args['limit']) if 'limit' in request.args else None
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit and offset must be integers'}), 400)
+        app.logger.info("Generating leaderboard sorted by %s, limit=%s, offset=%s", sort_by, limit, offset)
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+        leaderboard_data = kitchen_model.get_leaderboard(sort_by, limit, offset)
 
         return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid leaderboard request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/leaderboard-rank/<int:meal_id>', methods=['GET'])
+def get_meal_rank(meal_id: int) -> Response:
+    """
+    Route to get a meal's rank and percentile on the leaderboard.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Query Parameters:
+        - sort (str): The field to rank by ('wins' or 'win_pct'). Default is 'wins'.
+
+    Returns:
+        JSON response with the meal's rank, the number of ranked meals and its percentile.
+    Raises:
+        400 error if the meal does not exist, has been deleted or has not battled.
+        500 error if there is an issue computing the rank.
+    """
+    try:
+        sort_by = request.args.get('sort', 'wins')
+        app.logger.info("Getting leaderboard rank of meal %s by %s", meal_id, sort_by)
+
+        rank = kitchen_model.get_meal_rank(meal_id, sort_by)
+
+        return make_response(jsonify({'status': 'success', 'rank': rank}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid rank request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error getting meal rank: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,39 @@
+"""
+Production server settings for the meal battle service.
+
+    gunicorn app:app
+
+The app is imported once in the master process (preload_app), which applies the
+migrations, and then forked into GUNICORN_WORKERS worker processes. Arenas,
+tournament progress and the matchmaking queue are kept in the meals database
+instead of process memory, so any worker can serve any client, and each worker
+reloads its leaderboard index when another worker changes the meal stats.
+"""
+import multiprocessing
+import os
+
+# must be set before the app is preloaded
+os.environ.setdefault("STATE_STORE", "sqlite")
+# bounds how long a worker can serve a meal that another worker deleted
+os.environ.setdefault("MEAL_CACHE_TTL", "5")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    # SQLite connections must not cross a fork: close the ones preloading opened so
+    # each worker opens its own
+    from meal_max.utils.sql_utils import close_pool
+    close_pool()
+
+
+def post_fork(server, worker):
+    # the refill thread of the preloaded random number pool did not survive the fork
+    from meal_max.utils.random_utils import get_random_pool, reset_random_pool
+    reset_random_pool()
+    get_random_pool().prefill()
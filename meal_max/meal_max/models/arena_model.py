@@ -0,0 +1,356 @@
+from collections import OrderedDict
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Union
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal, apply_battle_result
+from meal_max.models.leaderboard_model import get_leaderboard_index
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import STATE_STORE, get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+DEFAULT_ARENA_ID = "default"
+ARENA_MAX_COUNT = int(os.getenv("ARENA_MAX_COUNT", "1000"))
+ARENA_IDLE_TIMEOUT = float(os.getenv("ARENA_IDLE_TIMEOUT", "1800"))
+
+
+class Arena:
+    """
+    One client's battle: a BattleModel guarded by its own lock.
+
+    Every operation holds the lock, so two requests for the same arena cannot
+    interleave their prep and battle steps, while battles in different arenas
+    run in parallel.
+    """
+
+    def __init__(self, arena_id: str):
+        self.id = arena_id
+        self.battle_model = BattleModel()
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def prep_combatant(self, meal: Meal) -> List[Meal]:
+        with self.lock:
+            self.battle_model.prep_combatant(meal)
+            return list(self.battle_model.get_combatants())
+
+    def battle(self) -> str:
+        with self.lock:
+            return self.battle_model.battle()
+
+    def clear_combatants(self) -> None:
+        with self.lock:
+            self.battle_model.clear_combatants()
+
+    def get_combatants(self) -> List[Meal]:
+        with self.lock:
+            return list(self.battle_model.get_combatants())
+
+
+class ArenaRegistry:
+    """
+    Arenas by id, least recently used first.
+
+    Arenas idle for longer than idle_timeout are dropped whenever the registry is
+    used, and creating an arena beyond max_arenas drops the least recently used
+    one, so memory stays bounded however many clients come and go. The default
+    arena is shared by clients that never create one; it is neither counted nor
+    evicted.
+    """
+
+    def __init__(self, max_arenas: int = ARENA_MAX_COUNT, idle_timeout: float = ARENA_IDLE_TIMEOUT):
+        if max_arenas < 1:
+            raise ValueError(f"Invalid arena count: {max_arenas}. Must be at least 1.")
+        self.max_arenas = max_arenas
+        self.idle_timeout = idle_timeout
+
+        self._arenas: "OrderedDict[str, Arena]" = OrderedDict()
+        self._default = Arena(DEFAULT_ARENA_ID)
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_full = 0
+
+    def _evict_idle(self, now: float) -> None:
+        # called with the lock held
+        while self._arenas:
+            arena = next(iter(self._arenas.values()))
+            if now - arena.last_used <= self.idle_timeout:
+                break
+            del self._arenas[arena.id]
+            self.evicted_idle += 1
+            logger.info("Evicted idle arena %s", arena.id)
+
+    def _add(self, arena_id: str, now: float) -> Arena:
+        # called with the lock held
+        while len(self._arenas) >= self.max_arenas:
+            evicted_id, _ = self._arenas.popitem(last=False)
+            self.evicted_full += 1
+            logger.warning("Arena limit of %d reached, evicted arena %s", self.max_arenas, evicted_id)
+        arena = Arena(arena_id)
+        arena.last_used = now
+        self._arenas[arena_id] = arena
+        self.created += 1
+        return arena
+
+    def create(self) -> Arena:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            arena = self._add(uuid.uuid4().hex, now)
+        logger.info("Created arena %s", arena.id)
+        return arena
+
+    def get(self, arena_id: Optional[str] = None) -> Arena:
+        # Only create() makes arenas, so client-supplied ids cannot push real ones out
+        arena_id = arena_id or DEFAULT_ARENA_ID
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if arena_id == DEFAULT_ARENA_ID:
+                arena = self._default
+            else:
+                arena = self._arenas.get(arena_id)
+                if arena is None:
+                    logger.info("Arena %s not found", arena_id)
+                    raise ValueError(f"Arena {arena_id} not found")
+                self._arenas.move_to_end(arena_id)
+            arena.last_used = now
+            return arena
+
+    def remove(self, arena_id: str) -> None:
+        if arena_id == DEFAULT_ARENA_ID:
+            raise ValueError("The default arena cannot be removed")
+        with self._lock:
+            if self._arenas.pop(arena_id, None) is None:
+                logger.info("Arena %s not found", arena_id)
+                raise ValueError(f"Arena {arena_id} not found")
+        logger.info("Removed arena %s", arena_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return {
+                'arenas': len(self._arenas),
+                'max_arenas': self.max_arenas,
+                'idle_timeout': self.idle_timeout,
+                'created': self.created,
+                'evicted_idle': self.evicted_idle,
+                'evicted_full': self.evicted_full,
+            }
+
+
+class SQLiteArena:
+    """
+    An arena whose combatants live in the meals database, shared by every worker.
+
+    Each operation is one transaction that takes the database write lock up front,
+    which serializes it with every other arena operation and battle in any process.
+    A battle removes the loser and records the result in the same transaction, so
+    the two can never disagree.
+    """
+
+    def __init__(self, arena_id: str):
+        self.id = arena_id
+
+    def _check_exists(self, cursor: sqlite3.Cursor) -> None:
+        # an arena evicted since it was looked up must not come back through _touch
+        if self.id == DEFAULT_ARENA_ID:
+            return
+        cursor.execute("SELECT 1 FROM arenas WHERE id = ?", (self.id,))
+        if cursor.fetchone() is None:
+            logger.info("Arena %s not found", self.id)
+            raise ValueError(f"Arena {self.id} not found")
+
+    def _touch(self, cursor: sqlite3.Cursor) -> None:
+        cursor.execute(
+            "INSERT INTO arenas (id, last_used) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET last_used = excluded.last_used",
+            (self.id, time.time())
+        )
+
+    def _load(self, cursor: sqlite3.Cursor) -> List[Meal]:
+        cursor.execute(
+            "SELECT meal_id, meal, cuisine, price, difficulty FROM arena_combatants WHERE arena_id = ? ORDER BY slot",
+            (self.id,)
+        )
+        return [Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4]) for row in cursor.fetchall()]
+
+    def _save(self, cursor: sqlite3.Cursor, combatants: List[Meal]) -> None:
+        cursor.execute("DELETE FROM arena_combatants WHERE arena_id = ?", (self.id,))
+        cursor.executemany(
+            "INSERT INTO arena_combatants (arena_id, slot, meal_id, meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(self.id, slot, meal.id, meal.meal, meal.cuisine, meal.price, meal.difficulty)
+             for slot, meal in enumerate(combatants)]
+        )
+
+    def _run(self, operation, write: bool = True):
+        # runs operation(cursor, battle_model) on the stored combatants in one transaction
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                self._check_exists(cursor)
+                battle_model = BattleModel()
+                battle_model.combatants = self._load(cursor)
+                result = operation(cursor, battle_model)
+                if write:
+                    self._save(cursor, battle_model.combatants)
+                    self._touch(cursor)
+                conn.commit()
+            except BaseException as e:
+                conn.rollback()
+                if isinstance(e, sqlite3.Error):
+                    logger.error("Database error in arena %s: %s", self.id, str(e))
+                    # the index may hold a battle that was never committed
+                    get_leaderboard_index().invalidate()
+                raise
+            return result
+
+    def prep_combatant(self, meal: Meal) -> List[Meal]:
+        def prep(cursor, battle_model):
+            battle_model.prep_combatant(meal)
+            return list(battle_model.get_combatants())
+        return self._run(prep)
+
+    def battle(self) -> str:
+        return self._run(lambda cursor, battle_model: battle_model.battle(
+            record_result=lambda winner_id, loser_id: apply_battle_result(cursor, winner_id, loser_id)))
+
+    def clear_combatants(self) -> None:
+        self._run(lambda cursor, battle_model: battle_model.clear_combatants())
+
+    def get_combatants(self) -> List[Meal]:
+        return self._run(lambda cursor, battle_model: list(battle_model.get_combatants()), write=False)
+
+
+class SQLiteArenaRegistry:
+    """
+    ArenaRegistry over the arenas table, for several worker processes.
+
+    Arenas are made by create(); the default arena's row appears on first use and
+    is never evicted. Idle arenas and, beyond max_arenas, the least recently used
+    ones are deleted whenever an arena is created.
+    """
+
+    def __init__(self, max_arenas: int = ARENA_MAX_COUNT, idle_timeout: float = ARENA_IDLE_TIMEOUT):
+        if max_arenas < 1:
+            raise ValueError(f"Invalid arena count: {max_arenas}. Must be at least 1.")
+        self.max_arenas = max_arenas
+        self.idle_timeout = idle_timeout
+
+    def _evict(self, cursor: sqlite3.Cursor, keep: int) -> int:
+        # drops idle arenas, then the least recently used ones until at most keep are left
+        idle_before = time.time() - self.idle_timeout
+        cursor.execute("SELECT id FROM arenas WHERE last_used < ? AND id != ?", (idle_before, DEFAULT_ARENA_ID))
+        evicted = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT COUNT(*) FROM arenas WHERE id != ?", (DEFAULT_ARENA_ID,))
+        excess = cursor.fetchone()[0] - len(evicted) - keep
+        if excess > 0:
+            cursor.execute("SELECT id FROM arenas WHERE last_used >= ? AND id != ? ORDER BY last_used LIMIT ?",
+                           (idle_before, DEFAULT_ARENA_ID, excess))
+            evicted.extend(row[0] for row in cursor.fetchall())
+        for arena_id in evicted:
+            cursor.execute("DELETE FROM arena_combatants WHERE arena_id = ?", (arena_id,))
+            cursor.execute("DELETE FROM arenas WHERE id = ?", (arena_id,))
+        if evicted:
+            logger.info("Evicted %d arenas", len(evicted))
+        return len(evicted)
+
+    def create(self) -> SQLiteArena:
+        arena = SQLiteArena(uuid.uuid4().hex)
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                self._evict(cursor, self.max_arenas - 1)
+                arena._touch(cursor)
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        logger.info("Created arena %s", arena.id)
+        return arena
+
+    def get(self, arena_id: Optional[str] = None) -> SQLiteArena:
+        arena = SQLiteArena(arena_id or DEFAULT_ARENA_ID)
+        try:
+            with get_db_connection() as conn:
+                arena._check_exists(conn.cursor())
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        return arena
+
+    def remove(self, arena_id: str) -> None:
+        if arena_id == DEFAULT_ARENA_ID:
+            raise ValueError("The default arena cannot be removed")
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM arena_combatants WHERE arena_id = ?", (arena_id,))
+                cursor.execute("DELETE FROM arenas WHERE id = ?", (arena_id,))
+                removed = cursor.rowcount
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        if not removed:
+            logger.info("Arena %s not found", arena_id)
+            raise ValueError(f"Arena {arena_id} not found")
+        logger.info("Removed arena %s", arena_id)
+
+    def stats(self) -> dict:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                evicted = self._evict(cursor, self.max_arenas)
+                cursor.execute("SELECT COUNT(*) FROM arenas WHERE id != ?", (DEFAULT_ARENA_ID,))
+                count = cursor.fetchone()[0]
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        return {
+            'store': 'sqlite',
+            'arenas': count,
+            'max_arenas': self.max_arenas,
+            'idle_timeout': self.idle_timeout,
+            'evicted': evicted,
+        }
+
+
+_registry: Optional[Union[ArenaRegistry, SQLiteArenaRegistry]] = None
+_registry_lock = threading.Lock()
+
+
+def get_arena_registry() -> Union[ArenaRegistry, SQLiteArenaRegistry]:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                if STATE_STORE == "sqlite":
+                    _registry = SQLiteArenaRegistry()
+                elif STATE_STORE == "memory":
+                    _registry = ArenaRegistry()
+                else:
+                    raise ValueError(f"Unknown state store: {STATE_STORE}")
+    return _registry
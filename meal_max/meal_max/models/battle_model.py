@@ -1,7 +1,7 @@
 import logging
-from typing import List
+from typing import Callable, List, Optional
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.kitchen_model import Meal, record_battle_result
 from meal_max.utils.logger import configure_logger
 from meal_max.utils.random_utils import get_random
 
@@ -10,12 +10,23 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# subtracted from a meal's battle score; harder meals lose less
+DIFFICULTY_MODIFIERS = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+
+def first_combatant_wins(score_1: float, score_2: float, random_number: float) -> bool:
+    # The normalized score gap is the first combatant's chance of winning
+    delta = abs(score_1 - score_2) / 100
+    return delta > random_number
+
+
 class BattleModel:
 
     def __init__(self):
         self.combatants: List[Meal] = []
 
-    def battle(self) -> str:
+    def battle(self, record_result: Optional[Callable[[int, int], None]] = None) -> str:
+        # record_result(winner_id, loser_id) defaults to record_battle_result
         logger.info("Two meals enter, one meal leaves!")
 
         if len(self.combatants) < 2:
@@ -42,14 +53,14 @@ class BattleModel:
         # Log the delta and normalized delta
         logger.info("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
+        # Get random number from the prefetched random.org pool
         random_number = get_random()
 
         # Log the random number
-        logger.info("Random number from random.org: %.3f", random_number)
+        logger.info("Random number: %.3f", random_number)
 
         # Determine the winner based on the normalized delta
-        if delta > random_number:
+        if first_combatant_wins(score_1, score_2, random_number):
             winner = combatant_1
             loser = combatant_2
         else:
@@ -59,9 +70,8 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
+        # Update stats for both combatants in a single transaction
+        (record_result or record_battle_result)(winner.id, loser.id)
 
         # Remove the losing combatant from combatants
         self.combatants.remove(loser)
@@ -73,14 +83,12 @@ class BattleModel:
         self.combatants.clear()
 
     def get_battle_score(self, combatant: Meal) -> float:
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
         # Log the calculation process
         logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
                     combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
 
         # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
+        score = (combatant.price * len(combatant.cuisine)) - DIFFICULTY_MODIFIERS[combatant.difficulty]
 
         # Log the calculated score
         logger.info("Battle score for %s: %.3f", combatant.meal, score)
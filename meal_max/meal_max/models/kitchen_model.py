@@ -1,16 +1,32 @@
 from dataclasses import dataclass
 import logging
+import math
 import os
+from collections import Counter
 import sqlite3
-from typing import Any
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
 
-from meal_max.utils.sql_utils import get_db_connection
+from meal_max.models.leaderboard_model import get_leaderboard_index
+from meal_max.utils.meal_cache import get_meal_cache
+from meal_max.utils.sql_utils import apply_migrations, get_db_connection
 from meal_max.utils.logger import configure_logger
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+LEADERBOARD_COLUMNS = "id, meal, cuisine, price, difficulty, battles, wins"
+
+# rows per transaction for create_meals; also bounds the duplicate check's IN list
+MEAL_IMPORT_CHUNK_SIZE = int(os.getenv("MEAL_IMPORT_CHUNK_SIZE", "500"))
+# battles per transaction for record_battle_results
+BATTLE_RESULTS_CHUNK_SIZE = int(os.getenv("BATTLE_RESULTS_CHUNK_SIZE", "256"))
+
+# bumped by clear_meals in this process; the recreated table hands out the old ids
+# again, so in-memory state keyed by meal id checks it before trusting those ids
+_catalog_generation = 0
+
 
 @dataclass
 class Meal:
@@ -28,8 +44,7 @@ class Meal:
 
 
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
-    if not isinstance(price, (int, float)) or price <= 0:
-        raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
+    _validate_price(price)
     if difficulty not in ['LOW', 'MED', 'HIGH']:
         raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
 
@@ -52,13 +67,127 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
+def create_meals(rows: Iterable[Any], chunk_size: int=MEAL_IMPORT_CHUNK_SIZE) -> dict[str, Any]:
+    """
+    Bulk-inserts meals, one transaction per chunk of rows.
+
+    Rows are dicts with meal, cuisine, price and difficulty, and are consumed lazily so a
+    streamed body is never held in memory. A row that fails validation or names an existing
+    meal is reported in 'errors' (by its 0-based position) and skipped; the rest of the
+    batch is still inserted.
+
+    Raises:
+        sqlite3.Error: If any database error occurs. Chunks committed before it are kept.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size}. Must be a positive number.")
+
+    start = time.perf_counter()
+    total = 0
+    inserted = 0
+    errors: List[dict[str, Any]] = []
+    seen = set()
+    chunk: List[tuple] = []
+
+    try:
+        with get_db_connection() as conn:
+            for position, row in enumerate(rows):
+                total += 1
+                try:
+                    values = _validate_meal_row(row)
+                except ValueError as e:
+                    errors.append({'row': position, 'error': str(e)})
+                    continue
+                if values[0] in seen:
+                    errors.append({'row': position, 'meal': values[0], 'error': f"Duplicate meal name in batch: {values[0]}"})
+                    continue
+                seen.add(values[0])
+                chunk.append((position, values))
+                if len(chunk) >= chunk_size:
+                    inserted += _insert_meal_chunk(conn, chunk, errors)
+                    chunk = []
+            if chunk:
+                inserted += _insert_meal_chunk(conn, chunk, errors)
+
+    except sqlite3.Error as e:
+        logger.error("Database error after inserting %d meals: %s", inserted, str(e))
+        raise e
+
+    elapsed = time.perf_counter() - start
+    logger.info("Bulk import inserted %d of %d meals in %.3f s", inserted, total, elapsed)
+    return {
+        'rows': total,
+        'inserted': inserted,
+        'failed': len(errors),
+        'errors': sorted(errors, key=lambda error: error['row']),
+        'elapsed': round(elapsed, 3),
+        'rows_per_second': round(total / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def _validate_meal_row(row: Any) -> tuple:
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object with meal, cuisine, price and difficulty")
+    meal, cuisine, price, difficulty = (row.get(field) for field in ('meal', 'cuisine', 'price', 'difficulty'))
+    if not meal or not isinstance(meal, str):
+        raise ValueError("Invalid meal name: it must be a non-empty string")
+    if not cuisine or not isinstance(cuisine, str):
+        raise ValueError("Invalid cuisine: it must be a non-empty string")
+    if isinstance(price, str):
+        # CSV rows carry the price as text
+        try:
+            price = float(price)
+        except ValueError:
+            raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
+    _validate_price(price)
+    if difficulty not in ['LOW', 'MED', 'HIGH']:
+        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+    return (meal, cuisine, price, difficulty)
+
+def _validate_price(price: Any) -> None:
+    # NaN compares false against everything and inf passes "> 0", so both are checked explicitly
+    if not isinstance(price, (int, float)) or not math.isfinite(price) or price <= 0:
+        raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
+
+def _insert_meal_chunk(conn: sqlite3.Connection, chunk: List[tuple], errors: List[dict[str, Any]]) -> int:
+    # BEGIN IMMEDIATE takes the write lock up front, so no other writer can add one of
+    # these names between the duplicate check and the insert.
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        names = [values[0] for _, values in chunk]
+        placeholders = ", ".join("?" for _ in names)
+        cursor.execute(f"SELECT meal FROM meals WHERE meal IN ({placeholders})", names)
+        existing = {row[0] for row in cursor.fetchall()}
+
+        new_rows = []
+        for position, values in chunk:
+            if values[0] in existing:
+                errors.append({'row': position, 'meal': values[0], 'error': f"Meal with name '{values[0]}' already exists"})
+            else:
+                new_rows.append(values)
+
+        cursor.executemany("""
+            INSERT INTO meals (meal, cuisine, price, difficulty)
+            VALUES (?, ?, ?, ?)
+        """, new_rows)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    return len(new_rows)
+
+def get_catalog_generation() -> int:
+    return _catalog_generation
+
 def clear_meals() -> None:
     """
-    Recreates the meals table, effectively deleting all meals.
+    Recreates the meals table, effectively deleting all meals, and empties the matchmaking queue.
 
     Raises:
         sqlite3.Error: If any database error occurs.
     """
+    global _catalog_generation
     try:
         with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql"), "r") as fh:
             create_table_script = fh.read()
@@ -66,6 +195,19 @@ def clear_meals() -> None:
             cursor = conn.cursor()
             cursor.executescript(create_table_script)
             conn.commit()
+            # recreating the table dropped its indexes
+            apply_migrations(conn)
+            cursor.execute("BEGIN IMMEDIATE")
+            # queued meals would otherwise be fought under the ids of the next meals created
+            cursor.execute("DELETE FROM matchmaking_entries")
+            cursor.execute("DELETE FROM matchmaking_matches")
+            cursor.execute("UPDATE matchmaking_state SET size = 0, matches = 0 WHERE id = 0")
+            # tell other workers their leaderboards are gone
+            _bump_stats_version(cursor)
+            conn.commit()
+            _catalog_generation += 1
+            get_meal_cache().clear()
+            get_leaderboard_index().invalidate()
 
             logger.info("Meals cleared successfully.")
 
@@ -88,56 +230,106 @@ def delete_meal(meal_id: int) -> None:
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
+            version = _bump_stats_version(cursor)
+            get_leaderboard_index().remove(meal_id, version)
             conn.commit()
+            get_meal_cache().invalidate(meal_id)
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
+        # the index may hold a change that was never committed
+        get_leaderboard_index().invalidate()
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
-    query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
-        FROM meals WHERE deleted = false AND battles > 0
-    """
+def get_leaderboard(sort_by: str="wins", limit: Optional[int]=None, offset: int=0) -> List[dict[str, Any]]:
+    # Served from the in-memory leaderboard index, which is loaded on first use and
+    # kept current by every recorded battle. A page costs O(log n + limit).
+    if sort_by not in ("wins", "win_pct"):
+        logger.error("Invalid sort_by parameter: %s", sort_by)
+        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit: {limit}. Must be zero or more.")
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {offset}. Must be zero or more.")
+
+    leaderboard = _get_leaderboard_index().get_leaderboard(sort_by, limit, offset)
+    logger.info("Leaderboard retrieved successfully")
+    return leaderboard
 
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
-    else:
+def get_meal_rank(meal_id: int, sort_by: str="wins") -> dict[str, Any]:
+    if sort_by not in ("wins", "win_pct"):
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
 
+    rank = _get_leaderboard_index().get_rank(meal_id, sort_by)
+    if rank is None:
+        # raises if the meal is missing or deleted
+        get_meal_by_id(meal_id)
+        logger.info("Meal with ID %s has not battled yet", meal_id)
+        raise ValueError(f"Meal with ID {meal_id} has not battled yet")
+
+    logger.info("Meal with ID %s is ranked %d of %d by %s", meal_id, rank['rank'], rank['ranked_meals'], sort_by)
+    return rank
+
+def _get_leaderboard_index():
+    # One primary key lookup tells whether another worker changed any stats since
+    # the index was built; in a single process the index is always current.
+    index = get_leaderboard_index()
+    if not index.loaded or index.version != get_stats_version():
+        load_leaderboard()
+    return index
+
+def get_stats_version() -> int:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM meal_stats_version WHERE id = 0")
+            return cursor.fetchone()[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def _bump_stats_version(cursor: sqlite3.Cursor) -> int:
+    # called inside the write transaction that changes the stats
+    cursor.execute("UPDATE meal_stats_version SET version = version + 1 WHERE id = 0")
+    cursor.execute("SELECT version FROM meal_stats_version WHERE id = 0")
+    return cursor.fetchone()[0]
+
+def load_leaderboard() -> None:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
-            }
-            leaderboard.append(meal)
-
-        logger.info("Leaderboard retrieved successfully")
-        return leaderboard
+            # one read transaction, so the rows match the version
+            cursor.execute("BEGIN")
+            cursor.execute("SELECT version FROM meal_stats_version WHERE id = 0")
+            version = cursor.fetchone()[0]
+            cursor.execute(f"SELECT {LEADERBOARD_COLUMNS} FROM meals WHERE deleted = FALSE AND battles > 0")
+            get_leaderboard_index().rebuild(cursor.fetchall(), version)
+            conn.commit()
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+def _refresh_leaderboard(cursor: sqlite3.Cursor, meal_ids: List[int]) -> None:
+    # Called inside the write transaction, before commit: the rows read here are exactly
+    # what is about to be committed, and the write lock orders concurrent updates.
+    version = _bump_stats_version(cursor)
+    index = get_leaderboard_index()
+    if not index.loaded:
+        return
+    placeholders = ", ".join("?" for _ in meal_ids)
+    cursor.execute(f"SELECT {LEADERBOARD_COLUMNS} FROM meals WHERE id IN ({placeholders})", meal_ids)
+    index.upsert(cursor.fetchall(), version)
+
 def get_meal_by_id(meal_id: int) -> Meal:
+    meal = get_meal_cache().get_by_id(meal_id)
+    if meal is not None:
+        return meal
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -148,7 +340,9 @@ def get_meal_by_id(meal_id: int) -> Meal:
                 if row[5]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                get_meal_cache().put(meal)
+                return meal
             else:
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
@@ -158,7 +352,43 @@ def get_meal_by_id(meal_id: int) -> Meal:
         raise e
 
 
+def get_meals_by_ids(meal_ids: Sequence[int]) -> List[Meal]:
+    # One query for the whole list, returned in the order asked for
+    if not meal_ids:
+        return []
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in meal_ids)
+            cursor.execute(
+                f"SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id IN ({placeholders})",
+                list(meal_ids)
+            )
+            rows = {row[0]: row for row in cursor.fetchall()}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    meals = []
+    for meal_id in meal_ids:
+        row = rows.get(meal_id)
+        if row is None:
+            logger.info("Meal with ID %s not found", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} not found")
+        if row[5]:
+            logger.info("Meal with ID %s has been deleted", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} has been deleted")
+        meals.append(Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4]))
+    return meals
+
+
 def get_meal_by_name(meal_name: str) -> Meal:
+    meal = get_meal_cache().get_by_name(meal_name)
+    if meal is not None:
+        return meal
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -169,7 +399,9 @@ def get_meal_by_name(meal_name: str) -> Meal:
                 if row[5]:
                     logger.info("Meal with name %s has been deleted", meal_name)
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                get_meal_cache().put(meal)
+                return meal
             else:
                 logger.info("Meal with name %s not found", meal_name)
                 raise ValueError(f"Meal with name {meal_name} not found")
@@ -200,8 +432,179 @@ def update_meal_stats(meal_id: int, result: str) -> None:
             else:
                 raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
 
+            _refresh_leaderboard(cursor, [meal_id])
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        # the index may hold a change that was never committed
+        get_leaderboard_index().invalidate()
+        raise e
+
+
+def record_battle_result(winner_id: int, loser_id: int) -> None:
+    # Both rows are updated in one transaction, so a battle is either fully recorded or
+    # not at all. The deleted check is folded into the UPDATE; the extra SELECT only runs
+    # when a row was not updated, to report why.
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            apply_battle_result(cursor, winner_id, loser_id)
             conn.commit()
 
+            logger.info("Recorded battle result: winner ID %s, loser ID %s", winner_id, loser_id)
+
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
+        # the index may hold a change that was never committed
+        get_leaderboard_index().invalidate()
         raise e
+
+def apply_battle_result(cursor: sqlite3.Cursor, winner_id: int, loser_id: int) -> None:
+    # The statements of record_battle_result, for callers that commit the battle
+    # together with other changes in their own transaction.
+    if winner_id == loser_id:
+        # a meal prepped against itself wins and loses the battle, as it always has
+        cursor.execute(
+            "UPDATE meals SET battles = battles + 2, wins = wins + 1 WHERE id = ? AND deleted = FALSE",
+            (winner_id,)
+        )
+        if cursor.rowcount == 0:
+            _raise_meal_not_updatable(cursor, winner_id)
+        _refresh_leaderboard(cursor, [winner_id])
+        return
+
+    cursor.execute(
+        "UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ? AND deleted = FALSE",
+        (winner_id,)
+    )
+    if cursor.rowcount == 0:
+        _raise_meal_not_updatable(cursor, winner_id)
+
+    cursor.execute("UPDATE meals SET battles = battles + 1 WHERE id = ? AND deleted = FALSE", (loser_id,))
+    if cursor.rowcount == 0:
+        _raise_meal_not_updatable(cursor, loser_id)
+
+    _refresh_leaderboard(cursor, [winner_id, loser_id])
+
+def record_battle_results(results: Sequence[Tuple[int, int]], chunk_size: int=BATTLE_RESULTS_CHUNK_SIZE) -> None:
+    # Records (winner_id, loser_id) pairs, one transaction per chunk of battles.
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size}. Must be a positive number.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(results), chunk_size):
+                try:
+                    apply_battle_results(cursor, results[start:start + chunk_size])
+                except ValueError:
+                    conn.rollback()
+                    raise
+                conn.commit()
+
+            logger.info("Recorded %d battle results", len(results))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        # the index may hold a change that was never committed
+        get_leaderboard_index().invalidate()
+        raise e
+
+def apply_battle_results(cursor: sqlite3.Cursor, results: Sequence[Tuple[int, int]]) -> None:
+    # The statements of record_battle_results for one chunk, for callers that commit the
+    # battles in their own transaction. Each meal's battles and wins are summed and
+    # written with a single UPDATE; the caller rolls back if this raises.
+    if not results:
+        return
+    battles = Counter()
+    wins = Counter()
+    for winner_id, loser_id in results:
+        battles[winner_id] += 1
+        battles[loser_id] += 1
+        wins[winner_id] += 1
+
+    cursor.executemany(
+        "UPDATE meals SET battles = battles + ?, wins = wins + ? WHERE id = ? AND deleted = FALSE",
+        [(count, wins[meal_id], meal_id) for meal_id, count in battles.items()]
+    )
+    if cursor.rowcount != len(battles):
+        _raise_meals_not_updatable(cursor, list(battles))
+
+    _refresh_leaderboard(cursor, list(battles))
+
+def record_live_battle_results(results: Sequence[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], List[dict[str, Any]]]:
+    """
+    Records the battles whose meals are all live, in a single transaction.
+
+    A battle with a deleted or missing meal is skipped and reported rather than
+    failing the others. Either every returned battle is committed or, if this
+    raises, none is.
+
+    Returns:
+        The recorded (winner_id, loser_id) pairs, and one error per skipped battle.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # the write lock keeps meals from being deleted between the check and the update
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                recorded, errors = apply_live_battle_results(cursor, results)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        # the index may hold a change that was never committed
+        get_leaderboard_index().invalidate()
+        raise e
+
+    logger.info("Recorded %d battle results, skipped %d", len(recorded), len(errors))
+    return recorded, errors
+
+def apply_live_battle_results(cursor: sqlite3.Cursor, results: Sequence[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], List[dict[str, Any]]]:
+    # The statements of record_live_battle_results, for callers that commit the battles
+    # in their own write transaction
+    live = _live_meal_ids(cursor, list({meal_id for battle in results for meal_id in battle}))
+    recorded = []
+    errors = []
+    for winner_id, loser_id in results:
+        unavailable = next((meal_id for meal_id in (winner_id, loser_id) if meal_id not in live), None)
+        if unavailable is None:
+            recorded.append((winner_id, loser_id))
+            continue
+        try:
+            _raise_meal_not_updatable(cursor, unavailable)
+        except ValueError as e:
+            errors.append({'winner_id': winner_id, 'loser_id': loser_id, 'error': str(e)})
+
+    apply_battle_results(cursor, recorded)
+    return recorded, errors
+
+def _live_meal_ids(cursor: sqlite3.Cursor, meal_ids: List[int]) -> set:
+    if not meal_ids:
+        return set()
+    placeholders = ", ".join("?" for _ in meal_ids)
+    cursor.execute(f"SELECT id FROM meals WHERE id IN ({placeholders}) AND deleted = FALSE", meal_ids)
+    return {row[0] for row in cursor.fetchall()}
+
+def _raise_meals_not_updatable(cursor: sqlite3.Cursor, meal_ids: List[int]) -> None:
+    live = _live_meal_ids(cursor, meal_ids)
+    for meal_id in meal_ids:
+        if meal_id not in live:
+            _raise_meal_not_updatable(cursor, meal_id)
+
+def _raise_meal_not_updatable(cursor: sqlite3.Cursor, meal_id: int) -> None:
+    cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
+    row = cursor.fetchone()
+    if row is None:
+        logger.info("Meal with ID %s not found", meal_id)
+        raise ValueError(f"Meal with ID {meal_id} not found")
+    logger.info("Meal with ID %s has been deleted", meal_id)
+    raise ValueError(f"Meal with ID {meal_id} has been deleted")
@@ -0,0 +1,175 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sortedcontainers import SortedList
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SORT_KEYS = ("wins", "win_pct")
+
+
+class LeaderboardIndex:
+    """
+    In-memory leaderboard of meals that have fought at least one battle.
+
+    Meals are kept in two sorted lists, one ordered by wins and one by win
+    percentage, with ties broken by id. Recording a battle re-positions the two
+    meals in O(log n), and a top-K listing is O(log n + K), so serving the
+    leaderboard never touches the database once it has been loaded.
+
+    The index holds rows as read from the database, not deltas, and callers
+    update it while their write transaction still holds the SQLite write lock,
+    so concurrent battles are applied in commit order.
+
+    `version` is the stats version the index reflects. A change stamped with any
+    version but the next one means another process wrote in between, so the
+    index drops itself and is reloaded on the next read.
+    """
+
+    def __init__(self):
+        self._meals: Dict[int, Dict[str, Any]] = {}
+        self._by_wins = SortedList()
+        self._by_win_pct = SortedList()
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.version: Optional[int] = None
+
+    @staticmethod
+    def _wins_key(meal: Dict[str, Any]) -> tuple:
+        return (-meal['wins'], meal['id'])
+
+    @staticmethod
+    def _win_pct_key(meal: Dict[str, Any]) -> tuple:
+        return (-(meal['wins'] / meal['battles']), meal['id'])
+
+    def _discard(self, meal_id: int) -> None:
+        # called with the lock held
+        meal = self._meals.pop(meal_id, None)
+        if meal is not None:
+            self._by_wins.remove(self._wins_key(meal))
+            self._by_win_pct.remove(self._win_pct_key(meal))
+
+    def _add(self, row: Sequence) -> None:
+        # called with the lock held; row is (id, meal, cuisine, price, difficulty, battles, wins)
+        meal = {
+            'id': row[0],
+            'meal': row[1],
+            'cuisine': row[2],
+            'price': row[3],
+            'difficulty': row[4],
+            'battles': row[5],
+            'wins': row[6],
+        }
+        if meal['battles'] <= 0:
+            return
+        self._meals[meal['id']] = meal
+        self._by_wins.add(self._wins_key(meal))
+        self._by_win_pct.add(self._win_pct_key(meal))
+
+    def rebuild(self, rows: Iterable[Sequence], version: Optional[int] = None) -> None:
+        with self._lock:
+            self._meals = {}
+            self._by_wins = SortedList()
+            self._by_win_pct = SortedList()
+            for row in rows:
+                self._add(row)
+            self.loaded = True
+            self.version = version
+        logger.info("Leaderboard index rebuilt with %d meals", len(self._meals))
+
+    def _advance(self, version: Optional[int]) -> bool:
+        # called with the lock held; False if the change cannot be applied in order
+        if version is None:
+            return True
+        if self.version is None or version != self.version + 1:
+            self._clear()
+            logger.info("Leaderboard index is behind stats version %d, will reload", version)
+            return False
+        self.version = version
+        return True
+
+    def upsert(self, rows: Iterable[Sequence], version: Optional[int] = None) -> None:
+        with self._lock:
+            if self._advance(version):
+                for row in rows:
+                    self._discard(row[0])
+                    self._add(row)
+
+    def remove(self, meal_id: int, version: Optional[int] = None) -> None:
+        with self._lock:
+            if self._advance(version):
+                self._discard(meal_id)
+
+    def _clear(self) -> None:
+        # called with the lock held
+        self.loaded = False
+        self.version = None
+        self._meals = {}
+        self._by_wins = SortedList()
+        self._by_win_pct = SortedList()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+        logger.info("Leaderboard index invalidated")
+
+    def _keys(self, sort_by: str) -> SortedList:
+        if sort_by not in SORT_KEYS:
+            raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+        return self._by_wins if sort_by == "wins" else self._by_win_pct
+
+    def get_leaderboard(self, sort_by: str = "wins", limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = self._keys(sort_by)
+            stop = offset + limit if limit is not None else None
+            leaderboard = []
+            for _, meal_id in keys.islice(offset, stop):
+                meal = dict(self._meals[meal_id])
+                meal['win_pct'] = round(meal['wins'] / meal['battles'] * 100, 1)  # Convert to percentage
+                leaderboard.append(meal)
+        return leaderboard
+
+    def get_rank(self, meal_id: int, sort_by: str = "wins") -> Optional[Dict[str, Any]]:
+        # Competition ranking: meals with the same score share a rank. Both counts are
+        # bisections of the sorted keys, so this is O(log n).
+        with self._lock:
+            keys = self._keys(sort_by)
+            meal = self._meals.get(meal_id)
+            if meal is None:
+                return None
+            key = self._wins_key(meal) if sort_by == "wins" else self._win_pct_key(meal)
+            better = keys.bisect_left((key[0], float('-inf')))
+            not_worse = keys.bisect_right((key[0], float('inf')))
+            total = len(keys)
+
+        return {
+            'id': meal_id,
+            'meal': meal['meal'],
+            'sort_by': sort_by,
+            'rank': better + 1,
+            'ranked_meals': total,
+            # share of ranked meals that this one beats outright
+            'percentile': round((total - not_worse) / total * 100, 1),
+        }
+
+    def __len__(self) -> int:
+        return len(self._meals)
+
+
+_index: Optional[LeaderboardIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_leaderboard_index() -> LeaderboardIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LeaderboardIndex()
+    return _index
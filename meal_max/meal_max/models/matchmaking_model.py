@@ -0,0 +1,464 @@
+from collections import deque
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from sortedcontainers import SortedList
+
+from meal_max.models.battle_model import BattleModel, first_combatant_wins
+from meal_max.models.kitchen_model import Meal, apply_live_battle_results, get_catalog_generation, get_meals_by_ids, record_live_battle_results
+from meal_max.models.leaderboard_model import get_leaderboard_index
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.random_utils import get_randoms
+from meal_max.utils.sql_utils import STATE_STORE, get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# battles fought and committed together by one dispatch
+MATCHMAKING_BATCH_SIZE = int(os.getenv("MATCHMAKING_BATCH_SIZE", "256"))
+# a meal waits rather than face an opponent whose score is further away than this
+MATCHMAKING_MAX_GAP = float(os.getenv("MATCHMAKING_MAX_GAP", "inf"))
+MATCHMAKING_MAX_SIZE = int(os.getenv("MATCHMAKING_MAX_SIZE", "10000"))
+
+
+class MatchmakingQueue:
+    """
+    Meals waiting for an opponent, kept sorted by battle score.
+
+    A meal's score is computed once, when it is enqueued. An entrant is paired with
+    the waiting meal whose score is nearest its own, found by bisecting the sorted
+    list, so placing a meal is O(log n); with no opponent within max_gap it waits.
+    Pairs queue up as matches, and dispatch fights them in batches exactly as
+    BattleModel would, with one bulk random draw and one commit per batch. Meals
+    leave the queue once they have fought.
+
+    The queue lives in this process only, so it serves a single worker; with the
+    "sqlite" state store SQLiteMatchmakingQueue is used instead. Clearing the meals
+    empties it, since the recreated table gives the queued ids to new meals.
+    """
+
+    def __init__(self, max_gap: float = MATCHMAKING_MAX_GAP, batch_size: int = MATCHMAKING_BATCH_SIZE,
+                 max_size: int = MATCHMAKING_MAX_SIZE):
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+        if max_gap < 0:
+            raise ValueError(f"Invalid score gap: {max_gap}. Must not be negative.")
+        self.max_gap = max_gap
+        self.batch_size = batch_size
+        self.max_size = max_size
+
+        # every meal in the queue, waiting, matched or battling, with its score
+        self._entries: Dict[int, Tuple[Meal, float]] = {}
+        # (score, ticket, meal_id); the ticket breaks ties in favour of the longest wait
+        self._waiting = SortedList()
+        self._waiting_keys: Dict[int, Tuple[float, int, int]] = {}
+        self._matches: Deque[Tuple[int, int]] = deque()
+        self._battling: set = set()
+        self._tickets = 0
+        self._generation = get_catalog_generation()
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.matched = 0
+        self.dispatched = 0
+        self.dropped = 0
+
+    def _sync(self) -> None:
+        # called with the lock held; drops every queued meal if the meals were cleared since
+        generation = get_catalog_generation()
+        if generation != self._generation:
+            logger.info("Meals were cleared, emptying the matchmaking queue")
+            self._entries.clear()
+            self._waiting.clear()
+            self._waiting_keys.clear()
+            self._matches.clear()
+            self._battling.clear()
+            self._generation = generation
+
+    def _place(self, meal_id: int) -> Optional[Tuple[int, int]]:
+        # called with the lock held; matches the meal with its nearest waiting neighbour or makes it wait
+        score = self._entries[meal_id][1]
+        index = self._waiting.bisect_left((score,))
+        # the nearest score is either side of the insertion point; ties go to the longer wait
+        neighbours = [(abs(self._waiting[i][0] - score), self._waiting[i][1], i)
+                      for i in (index - 1, index) if 0 <= i < len(self._waiting)]
+        best = min(neighbours, default=None)
+
+        if best is None or best[0] > self.max_gap:
+            key = (score, self._tickets, meal_id)
+            self._tickets += 1
+            self._waiting.add(key)
+            self._waiting_keys[meal_id] = key
+            return None
+
+        opponent_id = self._waiting.pop(best[2])[2]
+        del self._waiting_keys[opponent_id]
+        # the meal that waited is prepped first
+        match = (opponent_id, meal_id)
+        self._matches.append(match)
+        self.matched += 1
+        return match
+
+    def enqueue(self, meal_ids: List[int]) -> List[Tuple[int, int]]:
+        # Returns the matches the new meals made, in the order they were made
+        if len(set(meal_ids)) != len(meal_ids):
+            raise ValueError("A meal can only be enqueued once.")
+        meals = get_meals_by_ids(meal_ids)
+        battle_model = BattleModel()
+        scores = [battle_model.get_battle_score(meal) for meal in meals]
+
+        with self._lock:
+            self._sync()
+            for meal in meals:
+                if meal.id in self._entries:
+                    raise ValueError(f"Meal with ID {meal.id} is already in the matchmaking queue")
+            if len(self._entries) + len(meals) > self.max_size:
+                raise ValueError(f"The matchmaking queue is full ({self.max_size} meals).")
+
+            matches = []
+            for meal, score in zip(meals, scores):
+                self._entries[meal.id] = (meal, score)
+                match = self._place(meal.id)
+                if match is not None:
+                    matches.append(match)
+            self.enqueued += len(meals)
+
+        logger.info("Enqueued %d meals, %d matches made", len(meals), len(matches))
+        return matches
+
+    def dequeue(self, meal_id: int) -> None:
+        # Takes a meal out of the queue; if it was matched, its opponent is matched again
+        with self._lock:
+            self._sync()
+            if meal_id not in self._entries:
+                logger.info("Meal with ID %s is not in the matchmaking queue", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} is not in the matchmaking queue")
+            if meal_id in self._battling:
+                raise ValueError(f"Meal with ID {meal_id} is battling")
+
+            del self._entries[meal_id]
+            key = self._waiting_keys.pop(meal_id, None)
+            if key is not None:
+                self._waiting.remove(key)
+            else:
+                match = next(match for match in self._matches if meal_id in match)
+                self._matches.remove(match)
+                self._place(match[0] if match[1] == meal_id else match[1])
+        logger.info("Dequeued meal with ID %s", meal_id)
+
+    def discard(self, meal_id: int) -> None:
+        # dequeue for callers that do not care whether the meal was queued
+        try:
+            self.dequeue(meal_id)
+        except ValueError:
+            pass
+
+    def dispatch(self, max_battles: Optional[int] = None) -> Dict[str, Any]:
+        # Fights up to max_battles (default batch_size) queued matches
+        max_battles = self.batch_size if max_battles is None else max_battles
+        if max_battles < 1:
+            raise ValueError(f"Invalid battle count: {max_battles}. Must be at least 1.")
+
+        with self._lock:
+            self._sync()
+            generation = self._generation
+            matches = [self._matches.popleft() for _ in range(min(max_battles, len(self._matches)))]
+            scores = {meal_id: self._entries[meal_id][1] for match in matches for meal_id in match}
+            names = {meal_id: self._entries[meal_id][0].meal for meal_id in scores}
+            self._battling.update(scores)
+        if not matches:
+            return {'battles': [], 'errors': []}
+
+        results = []
+        errors = []
+        try:
+            for (id_1, id_2), random_number in zip(matches, get_randoms(len(matches))):
+                if first_combatant_wins(scores[id_1], scores[id_2], random_number):
+                    results.append((id_1, id_2))
+                else:
+                    results.append((id_2, id_1))
+
+            # one transaction: battles with a meal deleted since it was enqueued are
+            # dropped, and if anything fails none of the batch is recorded
+            results, errors = record_live_battle_results(results)
+
+        except Exception:
+            # nothing about these matches changed; put them back at the front
+            with self._lock:
+                # unless the meals were cleared meanwhile, which emptied the queue
+                if generation == self._generation:
+                    self._matches.extendleft(reversed(matches))
+                    self._battling.difference_update(scores)
+            raise
+
+        battles = [{
+            'winner_id': winner_id,
+            'winner': names[winner_id],
+            'loser_id': loser_id,
+            'loser': names[loser_id],
+        } for winner_id, loser_id in results]
+        with self._lock:
+            if generation == self._generation:
+                for meal_id in scores:
+                    del self._entries[meal_id]
+                self._battling.difference_update(scores)
+            self.dispatched += len(results)
+            self.dropped += len(errors)
+
+        logger.info("Dispatched %d battles, %d dropped", len(results), len(errors))
+        return {'battles': battles, 'errors': errors}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            return {
+                'waiting': len(self._waiting),
+                'matches': len(self._matches),
+                'battling': len(self._battling) // 2,
+                'enqueued': self.enqueued,
+                'matched': self.matched,
+                'dispatched': self.dispatched,
+                'dropped': self.dropped,
+                'batch_size': self.batch_size,
+                'max_gap': None if math.isinf(self.max_gap) else self.max_gap,
+                'max_size': self.max_size,
+            }
+
+
+class SQLiteMatchmakingQueue:
+    """
+    MatchmakingQueue over the matchmaking tables, for several worker processes.
+
+    Meals are paired as in MatchmakingQueue, with the nearest waiting scores found
+    through the partial index on (score, ticket). Every operation is one transaction
+    that takes the database write lock up front, so a meal is queued at most once
+    across all workers, and a dispatch records its battles and removes their meals
+    from the queue together: a failed dispatch leaves every match queued and nothing
+    recorded.
+    """
+
+    def __init__(self, max_gap: float = MATCHMAKING_MAX_GAP, batch_size: int = MATCHMAKING_BATCH_SIZE,
+                 max_size: int = MATCHMAKING_MAX_SIZE):
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+        if max_gap < 0:
+            raise ValueError(f"Invalid score gap: {max_gap}. Must not be negative.")
+        self.max_gap = max_gap
+        self.batch_size = batch_size
+        self.max_size = max_size
+
+    def _run(self, operation):
+        # runs operation(cursor) in one write transaction
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(cursor)
+                conn.commit()
+            except BaseException as e:
+                conn.rollback()
+                if isinstance(e, sqlite3.Error):
+                    logger.error("Database error in the matchmaking queue: %s", str(e))
+                    # the index may hold a battle that was never committed
+                    get_leaderboard_index().invalidate()
+                raise
+            return result
+
+    def _nearest(self, cursor: sqlite3.Cursor, score: float) -> Optional[Tuple[float, int, int]]:
+        # (gap, ticket, meal_id) of the nearest waiting meal, either side of score
+        cursor.execute("""
+            SELECT score, ticket, meal_id FROM matchmaking_entries
+            WHERE match_id IS NULL AND score >= ? ORDER BY score, ticket LIMIT 1
+        """, (score,))
+        rows = cursor.fetchall()
+        cursor.execute("""
+            SELECT score, ticket, meal_id FROM matchmaking_entries
+            WHERE match_id IS NULL AND score < ? ORDER BY score DESC, ticket DESC LIMIT 1
+        """, (score,))
+        rows.extend(cursor.fetchall())
+        return min(((abs(row[0] - score), row[1], row[2]) for row in rows), default=None)
+
+    def _place(self, cursor: sqlite3.Cursor, meal_id: int, score: float) -> Optional[Tuple[int, int]]:
+        # matches a meal that is not waiting with its nearest waiting neighbour, or makes it wait
+        best = self._nearest(cursor, score)
+        if best is None or best[0] > self.max_gap:
+            cursor.execute("UPDATE matchmaking_state SET tickets = tickets + 1 WHERE id = 0")
+            cursor.execute("""
+                UPDATE matchmaking_entries SET match_id = NULL,
+                    ticket = (SELECT tickets FROM matchmaking_state WHERE id = 0)
+                WHERE meal_id = ?
+            """, (meal_id,))
+            return None
+
+        # the meal that waited is prepped first
+        match = (best[2], meal_id)
+        cursor.execute("INSERT INTO matchmaking_matches (first_id, second_id) VALUES (?, ?)", match)
+        cursor.execute("UPDATE matchmaking_entries SET match_id = ? WHERE meal_id IN (?, ?)", (cursor.lastrowid, *match))
+        cursor.execute("UPDATE matchmaking_state SET matches = matches + 1, matched = matched + 1 WHERE id = 0")
+        return match
+
+    def enqueue(self, meal_ids: List[int]) -> List[Tuple[int, int]]:
+        # Returns the matches the new meals made, in the order they were made
+        if len(set(meal_ids)) != len(meal_ids):
+            raise ValueError("A meal can only be enqueued once.")
+        meals = get_meals_by_ids(meal_ids)
+        battle_model = BattleModel()
+        scores = [battle_model.get_battle_score(meal) for meal in meals]
+
+        def enqueue(cursor):
+            placeholders = ", ".join("?" for _ in meals)
+            cursor.execute(f"SELECT meal_id FROM matchmaking_entries WHERE meal_id IN ({placeholders})",
+                           [meal.id for meal in meals])
+            queued = {row[0] for row in cursor.fetchall()}
+            for meal in meals:
+                if meal.id in queued:
+                    raise ValueError(f"Meal with ID {meal.id} is already in the matchmaking queue")
+            cursor.execute("SELECT size FROM matchmaking_state WHERE id = 0")
+            if cursor.fetchone()[0] + len(meals) > self.max_size:
+                raise ValueError(f"The matchmaking queue is full ({self.max_size} meals).")
+
+            # match_id 0 keeps the meals out of the waiting index until each is placed
+            cursor.executemany(
+                "INSERT INTO matchmaking_entries (meal_id, meal, score, ticket, match_id) VALUES (?, ?, ?, 0, 0)",
+                [(meal.id, meal.meal, score) for meal, score in zip(meals, scores)]
+            )
+            cursor.execute("UPDATE matchmaking_state SET size = size + ?, enqueued = enqueued + ? WHERE id = 0",
+                           (len(meals), len(meals)))
+            matches = []
+            for meal, score in zip(meals, scores):
+                match = self._place(cursor, meal.id, score)
+                if match is not None:
+                    matches.append(match)
+            return matches
+
+        matches = self._run(enqueue)
+        logger.info("Enqueued %d meals, %d matches made", len(meals), len(matches))
+        return matches
+
+    def dequeue(self, meal_id: int) -> None:
+        # Takes a meal out of the queue; if it was matched, its opponent is matched again
+        def dequeue(cursor):
+            cursor.execute("SELECT match_id FROM matchmaking_entries WHERE meal_id = ?", (meal_id,))
+            row = cursor.fetchone()
+            if row is None:
+                logger.info("Meal with ID %s is not in the matchmaking queue", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} is not in the matchmaking queue")
+
+            cursor.execute("DELETE FROM matchmaking_entries WHERE meal_id = ?", (meal_id,))
+            cursor.execute("UPDATE matchmaking_state SET size = size - 1 WHERE id = 0")
+            if row[0] is not None:
+                cursor.execute("SELECT first_id, second_id FROM matchmaking_matches WHERE id = ?", (row[0],))
+                first_id, second_id = cursor.fetchone()
+                cursor.execute("DELETE FROM matchmaking_matches WHERE id = ?", (row[0],))
+                cursor.execute("UPDATE matchmaking_state SET matches = matches - 1 WHERE id = 0")
+                opponent_id = first_id if second_id == meal_id else second_id
+                cursor.execute("SELECT score FROM matchmaking_entries WHERE meal_id = ?", (opponent_id,))
+                self._place(cursor, opponent_id, cursor.fetchone()[0])
+
+        self._run(dequeue)
+        logger.info("Dequeued meal with ID %s", meal_id)
+
+    def discard(self, meal_id: int) -> None:
+        # dequeue for callers that do not care whether the meal was queued
+        try:
+            self.dequeue(meal_id)
+        except ValueError:
+            pass
+
+    def dispatch(self, max_battles: Optional[int] = None) -> Dict[str, Any]:
+        # Fights up to max_battles (default batch_size) queued matches in one transaction
+        max_battles = self.batch_size if max_battles is None else max_battles
+        if max_battles < 1:
+            raise ValueError(f"Invalid battle count: {max_battles}. Must be at least 1.")
+
+        def dispatch(cursor):
+            # the oldest matches first; ids start at 1, so the range reads only the rows taken
+            cursor.execute("SELECT id, first_id, second_id FROM matchmaking_matches WHERE id > 0 ORDER BY id LIMIT ?",
+                           (max_battles,))
+            matches = cursor.fetchall()
+            if not matches:
+                return [], []
+            meal_ids = [meal_id for _, first_id, second_id in matches for meal_id in (first_id, second_id)]
+            placeholders = ", ".join("?" for _ in meal_ids)
+            cursor.execute(f"SELECT meal_id, meal, score FROM matchmaking_entries WHERE meal_id IN ({placeholders})",
+                           meal_ids)
+            entries = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+            results = []
+            for (_, id_1, id_2), random_number in zip(matches, get_randoms(len(matches))):
+                if first_combatant_wins(entries[id_1][1], entries[id_2][1], random_number):
+                    results.append((id_1, id_2))
+                else:
+                    results.append((id_2, id_1))
+            # battles with a meal deleted since it was enqueued are dropped
+            results, errors = apply_live_battle_results(cursor, results)
+
+            cursor.execute(f"DELETE FROM matchmaking_entries WHERE meal_id IN ({placeholders})", meal_ids)
+            cursor.execute("DELETE FROM matchmaking_matches WHERE id <= ?", (matches[-1][0],))
+            cursor.execute("""
+                UPDATE matchmaking_state SET size = size - ?, matches = matches - ?,
+                    dispatched = dispatched + ?, dropped = dropped + ?
+                WHERE id = 0
+            """, (len(meal_ids), len(matches), len(results), len(errors)))
+            battles = [{
+                'winner_id': winner_id,
+                'winner': entries[winner_id][0],
+                'loser_id': loser_id,
+                'loser': entries[loser_id][0],
+            } for winner_id, loser_id in results]
+            return battles, errors
+
+        battles, errors = self._run(dispatch)
+        if battles or errors:
+            logger.info("Dispatched %d battles, %d dropped", len(battles), len(errors))
+        return {'battles': battles, 'errors': errors}
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT size, matches, enqueued, matched, dispatched, dropped FROM matchmaking_state WHERE id = 0
+                """)
+                size, matches, enqueued, matched, dispatched, dropped = cursor.fetchone()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        return {
+            'store': 'sqlite',
+            'waiting': size - 2 * matches,
+            'matches': matches,
+            'enqueued': enqueued,
+            'matched': matched,
+            'dispatched': dispatched,
+            'dropped': dropped,
+            'batch_size': self.batch_size,
+            'max_gap': None if math.isinf(self.max_gap) else self.max_gap,
+            'max_size': self.max_size,
+        }
+
+
+_queue: Optional[Union[MatchmakingQueue, SQLiteMatchmakingQueue]] = None
+_queue_lock = threading.Lock()
+
+
+def get_matchmaking_queue() -> Union[MatchmakingQueue, SQLiteMatchmakingQueue]:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if STATE_STORE == "sqlite":
+                    _queue = SQLiteMatchmakingQueue()
+                elif STATE_STORE == "memory":
+                    _queue = MatchmakingQueue()
+                else:
+                    raise ValueError(f"Unknown state store: {STATE_STORE}")
+    return _queue
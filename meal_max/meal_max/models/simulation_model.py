@@ -0,0 +1,108 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from meal_max.models.battle_model import DIFFICULTY_MODIFIERS
+from meal_max.models.kitchen_model import Meal, get_meals_by_ids
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SIMULATION_TRIALS = int(os.getenv("SIMULATION_TRIALS", "10000"))
+SIMULATION_MAX_TRIALS = int(os.getenv("SIMULATION_MAX_TRIALS", "100000"))
+SIMULATION_MAX_MEALS = int(os.getenv("SIMULATION_MAX_MEALS", "500"))
+# battles simulated by one request, trials times ordered pairs; the work grows with
+# the square of the meal count, and this keeps a request to a few seconds
+SIMULATION_MAX_DRAWS = int(os.getenv("SIMULATION_MAX_DRAWS", "200000000"))
+# random draws held in memory at once (int8, so this many bytes)
+SIMULATION_CHUNK_SIZE = int(os.getenv("SIMULATION_CHUNK_SIZE", str(16 * 1024 * 1024)))
+
+# random.org fractions have two decimals, so a battle draws one of these
+RANDOM_LEVELS = np.arange(100) / 100
+
+
+def battle_scores(meals: Sequence[Meal]) -> np.ndarray:
+    # BattleModel.get_battle_score for many meals at once
+    prices = np.array([meal.price for meal in meals], dtype=np.float64)
+    cuisine_lengths = np.array([len(meal.cuisine) for meal in meals], dtype=np.float64)
+    modifiers = np.array([DIFFICULTY_MODIFIERS[meal.difficulty] for meal in meals], dtype=np.float64)
+    return prices * cuisine_lengths - modifiers
+
+def simulate_battles(meal_ids: List[int], trials: int = SIMULATION_TRIALS, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Estimates win probabilities by simulating every pairing of the given meals.
+
+    Battles are decided as in BattleModel.battle: the first combatant wins when the
+    normalized score gap beats a two-decimal random number. Entry [i][j] of the
+    matrix is the chance that meal i beats meal j when i is prepped first; meals are
+    ranked by expected wins when each one challenges every other meal once. The
+    numbers come from a local generator, and no stats are written.
+
+    Raises:
+        ValueError: If the meals or trial count are invalid, the simulation would run more
+            than SIMULATION_MAX_DRAWS battles, or a meal is missing or deleted.
+    """
+    if len(meal_ids) < 2:
+        raise ValueError("A simulation needs at least two meals.")
+    if len(meal_ids) > SIMULATION_MAX_MEALS:
+        raise ValueError(f"A simulation can have at most {SIMULATION_MAX_MEALS} meals.")
+    if len(set(meal_ids)) != len(meal_ids):
+        raise ValueError("A meal can only enter a simulation once.")
+    if not 0 < trials <= SIMULATION_MAX_TRIALS:
+        raise ValueError(f"Invalid trials: {trials}. Must be between 1 and {SIMULATION_MAX_TRIALS}.")
+    draws = trials * len(meal_ids) * (len(meal_ids) - 1)
+    if draws > SIMULATION_MAX_DRAWS:
+        raise ValueError(f"A simulation of {trials} trials between {len(meal_ids)} meals would run {draws} battles; "
+                         f"the limit is {SIMULATION_MAX_DRAWS}.")
+
+    start = time.perf_counter()
+    meals = get_meals_by_ids(meal_ids)
+    n = len(meals)
+    scores = battle_scores(meals)
+
+    # The first combatant wins on draw k/100 exactly when k < thresholds[i, j], so the
+    # comparison runs on small integers with no rounding error.
+    deltas = np.abs(scores[:, None] - scores[None, :]) / 100
+    thresholds = np.searchsorted(RANDOM_LEVELS, deltas, side="left").astype(np.int8)
+
+    rng = np.random.default_rng(seed)
+    wins = np.zeros((n, n), dtype=np.int64)
+    trials_per_chunk = max(1, SIMULATION_CHUNK_SIZE // (n * n))
+    for done in range(0, trials, trials_per_chunk):
+        draws = rng.integers(0, 100, size=(min(trials_per_chunk, trials - done), n, n), dtype=np.int8)
+        wins += (draws < thresholds).sum(axis=0)
+
+    probabilities = wins / trials
+    np.fill_diagonal(probabilities, 0.0)
+    expected_wins = probabilities.sum(axis=1)
+    order = np.lexsort((np.arange(n), -expected_wins))
+
+    matrix = probabilities.round(4).tolist()
+    for i in range(n):
+        matrix[i][i] = None
+
+    elapsed = time.perf_counter() - start
+    logger.info("Simulated %d battles between %d meals in %.3f s", trials * n * (n - 1), n, elapsed)
+    return {
+        'meal_ids': [meal.id for meal in meals],
+        'trials': trials,
+        'battles_simulated': trials * n * (n - 1),
+        'win_probability': matrix,
+        'rankings': [
+            {
+                'id': meals[i].id,
+                'meal': meals[i].meal,
+                'score': round(float(scores[i]), 3),
+                'expected_wins': round(float(expected_wins[i]), 3),
+                'win_pct': round(float(expected_wins[i]) / (n - 1) * 100, 1),
+            }
+            for i in order
+        ],
+        'elapsed': round(elapsed, 3),
+    }
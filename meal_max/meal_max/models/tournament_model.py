@@ -0,0 +1,343 @@
+from collections import OrderedDict
+from itertools import combinations
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from meal_max.models.battle_model import BattleModel, first_combatant_wins
+from meal_max.models.kitchen_model import Meal, get_meals_by_ids, record_battle_results
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.random_utils import get_randoms
+from meal_max.utils.sql_utils import STATE_STORE, get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+TOURNAMENT_FORMATS = ("single_elimination", "round_robin")
+TOURNAMENT_MAX_MEALS = int(os.getenv("TOURNAMENT_MAX_MEALS", "256"))
+# battles drawn and committed together
+TOURNAMENT_CHUNK_SIZE = int(os.getenv("TOURNAMENT_CHUNK_SIZE", "256"))
+# finished tournaments kept for polling; the oldest are dropped first
+TOURNAMENT_HISTORY = int(os.getenv("TOURNAMENT_HISTORY", "100"))
+
+
+class Tournament:
+    """
+    A bracket of meals fought out server-side.
+
+    Single elimination pairs the remaining meals in seed order each round; with an
+    odd number left, the lowest seed that has not had a bye yet sits the round out.
+    Round robin fights every pair once and ranks meals by wins. Battles are decided
+    exactly as in BattleModel, with the random numbers drawn in bulk and the results
+    committed in chunks.
+    """
+
+    def __init__(self, meal_ids: List[int], format: str = "single_elimination"):
+        if format not in TOURNAMENT_FORMATS:
+            raise ValueError(f"Invalid tournament format: {format}. Must be one of {', '.join(TOURNAMENT_FORMATS)}.")
+        if len(meal_ids) < 2:
+            raise ValueError("A tournament needs at least two meals.")
+        if len(meal_ids) > TOURNAMENT_MAX_MEALS:
+            raise ValueError(f"A tournament can have at most {TOURNAMENT_MAX_MEALS} meals.")
+        if len(set(meal_ids)) != len(meal_ids):
+            raise ValueError("A meal can only enter a tournament once.")
+
+        self.id = uuid.uuid4().hex
+        self.format = format
+        self.meal_ids = list(meal_ids)
+        n = len(meal_ids)
+        self.total_battles = n - 1 if format == "single_elimination" else n * (n - 1) // 2
+
+        self.status = "pending"
+        self.battles_played = 0
+        self.rounds: List[List[Dict[str, int]]] = []
+        # every battle as (round, winner_id, loser_id), in the order fought
+        self._battles: List[Tuple[int, int, int]] = []
+        self.standings: List[Dict[str, Any]] = []
+        self.champion: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        self._meals: Dict[int, Meal] = {}
+        self._scores: Dict[int, float] = {}
+        self._wins: Dict[int, int] = {}
+        # single elimination ranks meals by how far they got before their wins
+        self._rounds_survived: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+        # called with the tournament whenever its state changes
+        self.on_progress: Optional[Callable[["Tournament"], None]] = None
+
+    def _publish(self) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(self)
+        except Exception as e:
+            # progress reports are best effort and never stop the tournament
+            logger.warning("Could not publish progress of tournament %s: %s", self.id, str(e))
+
+    def run(self) -> None:
+        with self._lock:
+            self.status = "running"
+        self._publish()
+        logger.info("Tournament %s started: %s with %d meals", self.id, self.format, len(self.meal_ids))
+
+        try:
+            meals = get_meals_by_ids(self.meal_ids)
+            self._meals = {meal.id: meal for meal in meals}
+            battle_model = BattleModel()
+            self._scores = {meal.id: battle_model.get_battle_score(meal) for meal in meals}
+            self._wins = {meal.id: 0 for meal in meals}
+            self._rounds_survived = {meal.id: 0 for meal in meals}
+
+            if self.format == "single_elimination":
+                self._run_single_elimination()
+            else:
+                self._run_round_robin()
+
+        except Exception as e:
+            logger.error("Tournament %s failed: %s", self.id, str(e))
+            with self._lock:
+                self.status = "failed"
+                self.error = str(e)
+                self.finished_at = time.time()
+            self._publish()
+            return
+
+        with self._lock:
+            self.standings = self._rank()
+            self.champion = self.standings[0]
+            self.status = "completed"
+            self.finished_at = time.time()
+        self._publish()
+        logger.info("Tournament %s completed, champion: %s", self.id, self.champion['meal'])
+
+    def _run_single_elimination(self) -> None:
+        remaining = list(self.meal_ids)
+        had_bye = set()
+        while len(remaining) > 1:
+            bye = None
+            if len(remaining) % 2:
+                # byes rotate, so no meal is carried to the final without fighting
+                bye = next((meal_id for meal_id in reversed(remaining) if meal_id not in had_bye), remaining[-1])
+                had_bye.add(bye)
+            fighting = [meal_id for meal_id in remaining if meal_id != bye]
+            pairs = [(fighting[i], fighting[i + 1]) for i in range(0, len(fighting), 2)]
+            results = self._fight(pairs)
+            winners = {winner_id for winner_id, _ in results}
+            # winners and the bye keep their bracket position
+            remaining = [meal_id for meal_id in remaining if meal_id in winners or meal_id == bye]
+            for _, loser_id in results:
+                self._rounds_survived[loser_id] = len(self.rounds)
+        self._rounds_survived[remaining[0]] = len(self.rounds) + 1
+
+    def _run_round_robin(self) -> None:
+        self._fight(list(combinations(self.meal_ids, 2)))
+
+    def _fight(self, pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        # Fights one round, chunk by chunk: one bulk random draw and one commit per chunk
+        results = []
+        with self._lock:
+            round_index = len(self.rounds)
+            self.rounds.append([])
+        for start in range(0, len(pairs), TOURNAMENT_CHUNK_SIZE):
+            chunk = pairs[start:start + TOURNAMENT_CHUNK_SIZE]
+            chunk_results = []
+            for (id_1, id_2), random_number in zip(chunk, get_randoms(len(chunk))):
+                if first_combatant_wins(self._scores[id_1], self._scores[id_2], random_number):
+                    chunk_results.append((id_1, id_2))
+                else:
+                    chunk_results.append((id_2, id_1))
+
+            record_battle_results(chunk_results, chunk_size=len(chunk_results))
+
+            with self._lock:
+                for winner_id, loser_id in chunk_results:
+                    self._wins[winner_id] += 1
+                    self.rounds[round_index].append({'winner_id': winner_id, 'loser_id': loser_id})
+                    self._battles.append((round_index, winner_id, loser_id))
+                self.battles_played += len(chunk_results)
+            results.extend(chunk_results)
+            self._publish()
+
+        return results
+
+    def _rank(self) -> List[Dict[str, Any]]:
+        # called with the lock held; ties keep seed order
+        seeds = {meal_id: seed for seed, meal_id in enumerate(self.meal_ids)}
+        ranked = sorted(self.meal_ids, key=lambda meal_id: (
+            -self._rounds_survived[meal_id], -self._wins[meal_id], seeds[meal_id]))
+        return [{'id': meal_id, 'meal': self._meals[meal_id].meal, 'wins': self._wins[meal_id]} for meal_id in ranked]
+
+    def battles_since(self, start: int) -> List[Tuple[int, int, int]]:
+        # the battles fought after the first start ones, as (round, winner_id, loser_id)
+        with self._lock:
+            return self._battles[start:]
+
+    def to_dict(self, include_rounds: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            tournament = {
+                'id': self.id,
+                'format': self.format,
+                'status': self.status,
+                'meal_ids': list(self.meal_ids),
+                'battles_played': self.battles_played,
+                'total_battles': self.total_battles,
+                'progress': round(self.battles_played / self.total_battles, 3),
+                'champion': self.champion,
+                'standings': list(self.standings),
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+            }
+            if include_rounds:
+                tournament['rounds'] = [list(round_results) for round_results in self.rounds]
+        return tournament
+
+
+class TournamentRegistry:
+    """
+    Tournaments of this process, by id.
+
+    Each tournament runs on its own background thread, so creating one returns at
+    once and clients poll its progress. Only the most recent finished tournaments
+    are kept. With the "sqlite" store every change of state is also written to the
+    tournaments table, and each chunk's battles are appended to tournament_battles,
+    so a poll answered by another worker process sees it too.
+    """
+
+    def __init__(self, history: int = TOURNAMENT_HISTORY, store: str = STATE_STORE):
+        if store not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown state store: {store}")
+        self.history = history
+        self.store = store
+        self._tournaments: "OrderedDict[str, Tournament]" = OrderedDict()
+        # battles of each running tournament already written to tournament_battles
+        self._saved_battles: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def start(self, meal_ids: List[int], format: str = "single_elimination") -> Tournament:
+        tournament = Tournament(meal_ids, format)
+        if self.store == "sqlite":
+            tournament.on_progress = self._save
+            self._save(tournament)
+        with self._lock:
+            self._tournaments[tournament.id] = tournament
+            self._prune()
+        threading.Thread(target=tournament.run, name=f"tournament-{tournament.id}", daemon=True).start()
+        return tournament
+
+    def _prune(self) -> None:
+        # called with the lock held
+        finished = [tid for tid, t in self._tournaments.items() if t.status in ("completed", "failed")]
+        for tid in finished[:max(0, len(finished) - self.history)]:
+            del self._tournaments[tid]
+
+    def _save(self, tournament: Tournament) -> None:
+        # Writes the summary and only the battles fought since the last save, so the
+        # write volume per chunk stays constant however long the tournament runs
+        with self._lock:
+            saved = self._saved_battles.get(tournament.id, 0)
+        battles = tournament.battles_since(saved)
+        state = tournament.to_dict()
+        finished = state['status'] in ("completed", "failed")
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO tournament_battles (tournament_id, seq, round, winner_id, loser_id) VALUES (?, ?, ?, ?, ?)",
+                [(tournament.id, saved + i, round_index, winner_id, loser_id)
+                 for i, (round_index, winner_id, loser_id) in enumerate(battles)]
+            )
+            cursor.execute("INSERT OR REPLACE INTO tournaments (id, state, updated_at) VALUES (?, ?, ?)",
+                           (tournament.id, json.dumps(state), time.time()))
+            if finished:
+                # the newest tournament past the history, and everything older, goes
+                cursor.execute("SELECT updated_at FROM tournaments ORDER BY updated_at DESC LIMIT 1 OFFSET ?",
+                               (self.history,))
+                row = cursor.fetchone()
+                if row is not None:
+                    cursor.execute("""
+                        DELETE FROM tournament_battles WHERE tournament_id IN (
+                            SELECT id FROM tournaments WHERE updated_at <= ?
+                        )
+                    """, (row[0],))
+                    cursor.execute("DELETE FROM tournaments WHERE updated_at <= ?", (row[0],))
+            conn.commit()
+
+        with self._lock:
+            if finished:
+                self._saved_battles.pop(tournament.id, None)
+            else:
+                self._saved_battles[tournament.id] = saved + len(battles)
+
+    def get(self, tournament_id: str) -> Tournament:
+        with self._lock:
+            tournament = self._tournaments.get(tournament_id)
+        if tournament is None:
+            logger.info("Tournament %s not found", tournament_id)
+            raise ValueError(f"Tournament {tournament_id} not found")
+        return tournament
+
+    def get_state(self, tournament_id: str, include_rounds: bool = False) -> Dict[str, Any]:
+        # the live state when this process runs the tournament, the stored state otherwise
+        with self._lock:
+            tournament = self._tournaments.get(tournament_id)
+        if tournament is not None:
+            return tournament.to_dict(include_rounds)
+
+        if self.store == "sqlite":
+            try:
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT state FROM tournaments WHERE id = ?", (tournament_id,))
+                    row = cursor.fetchone()
+                    battles = []
+                    if row is not None and include_rounds:
+                        cursor.execute(
+                            "SELECT round, winner_id, loser_id FROM tournament_battles WHERE tournament_id = ? ORDER BY seq",
+                            (tournament_id,)
+                        )
+                        battles = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error("Database error: %s", str(e))
+                raise e
+            if row is not None:
+                state = json.loads(row[0])
+                # states saved before tournament_battles existed carry their rounds inline
+                rounds = state.pop('rounds', [])
+                if include_rounds:
+                    for round_index, winner_id, loser_id in battles:
+                        while len(rounds) <= round_index:
+                            rounds.append([])
+                        rounds[round_index].append({'winner_id': winner_id, 'loser_id': loser_id})
+                    state['rounds'] = rounds
+                return state
+
+        logger.info("Tournament %s not found", tournament_id)
+        raise ValueError(f"Tournament {tournament_id} not found")
+
+    def list(self) -> List[Tournament]:
+        with self._lock:
+            return list(self._tournaments.values())
+
+
+_registry: Optional[TournamentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_tournament_registry() -> TournamentRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TournamentRegistry()
+    return _registry
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from meal_max.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+MEAL_CACHE_SIZE = int(os.getenv("MEAL_CACHE_SIZE", "512"))
+# 0 keeps entries until they are evicted or invalidated; meal rows only change by being deleted
+MEAL_CACHE_TTL = float(os.getenv("MEAL_CACHE_TTL", "0"))
+
+
+class MealCache:
+    """
+    Size-bounded LRU cache of Meal objects, addressable by id and by name.
+
+    Each meal is stored once under its id, with a second map from name to id, so
+    a hit by either key refreshes the same entry and evicting it drops both. With
+    a TTL, entries also expire so that deletes made by other worker processes are
+    eventually seen.
+    """
+
+    def __init__(self, max_size: int = MEAL_CACHE_SIZE, ttl: float = MEAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._meals: "OrderedDict[int, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._ids_by_name: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _drop(self, meal_id: int) -> None:
+        # called with the lock held
+        meal, _ = self._meals.pop(meal_id)
+        if self._ids_by_name.get(meal.meal) == meal_id:
+            del self._ids_by_name[meal.meal]
+
+    def _lookup(self, meal_id: Optional[int]) -> Optional[Any]:
+        # called with the lock held
+        entry = self._meals.get(meal_id) if meal_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        meal, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._drop(meal_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._meals.move_to_end(meal_id)
+        self.hits += 1
+        return meal
+
+    def get_by_id(self, meal_id: int) -> Optional[Any]:
+        with self._lock:
+            return self._lookup(meal_id)
+
+    def get_by_name(self, meal_name: str) -> Optional[Any]:
+        with self._lock:
+            return self._lookup(self._ids_by_name.get(meal_name))
+
+    def put(self, meal: Any) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if meal.id in self._meals:
+                self._drop(meal.id)
+            self._meals[meal.id] = (meal, expires_at)
+            self._ids_by_name[meal.meal] = meal.id
+            while len(self._meals) > self.max_size:
+                self._drop(next(iter(self._meals)))
+                self.evictions += 1
+
+    def invalidate(self, meal_id: int) -> None:
+        with self._lock:
+            if meal_id in self._meals:
+                self._drop(meal_id)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._meals)
+            self._meals.clear()
+            self._ids_by_name.clear()
+        logger.info("Meal cache cleared")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._meals),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+_cache: Optional[MealCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_meal_cache() -> MealCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MealCache()
+    return _cache
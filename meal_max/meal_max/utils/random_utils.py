@@ -1,4 +1,10 @@
+from collections import deque
 import logging
+import os
+import secrets
+import threading
+from typing import Deque, List, Optional
+
 import requests
 
 from meal_max.utils.logger import configure_logger
@@ -7,27 +13,32 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-def get_random() -> float:
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+# random.org hands out up to 10,000 fractions per request
+RANDOM_BATCH_SIZE = int(os.getenv("RANDOM_BATCH_SIZE", "100"))
+RANDOM_LOW_WATER = int(os.getenv("RANDOM_LOW_WATER", "20"))
+
+
+def fetch_random_numbers(num: int) -> List[float]:
+    url = f"https://www.random.org/decimal-fractions/?num={num}&dec=2&col=1&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
-        logger.info("Fetching random number from %s", url)
+        logger.info("Fetching %d random numbers from %s", num, url)
 
         response = requests.get(url, timeout=5)
 
         # Check if the request was successful
         response.raise_for_status()
 
-        random_number_str = response.text.strip()
+        random_numbers = []
+        for random_number_str in response.text.split():
+            try:
+                random_numbers.append(float(random_number_str))
+            except ValueError:
+                raise ValueError("Invalid response from random.org: %s" % random_number_str)
 
-        try:
-            random_number = float(random_number_str)
-        except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
-
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        logger.info("Received %d random numbers", len(random_numbers))
+        return random_numbers
 
     except requests.exceptions.Timeout:
         logger.error("Request to random.org timed out.")
@@ -36,3 +47,111 @@ def get_random() -> float:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+class RandomPool:
+    """
+    Prefetched random numbers from random.org.
+
+    Numbers are fetched in batches and handed out from memory. When the pool drops
+    below the low-water mark a background thread refills it, so callers never wait
+    on the network. If the pool is empty, or random.org is unavailable, numbers come
+    from the local CSPRNG with the same two-decimal precision instead.
+    """
+
+    def __init__(self, batch_size: int = RANDOM_BATCH_SIZE, low_water: int = RANDOM_LOW_WATER):
+        self.batch_size = batch_size
+        self.low_water = low_water
+
+        self._numbers: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+
+        self.hits = 0
+        self.refills = 0
+        self.refill_failures = 0
+        self.fallbacks = 0
+
+    def _refill(self) -> None:
+        numbers = None
+        try:
+            numbers = fetch_random_numbers(self.batch_size)
+        except (RuntimeError, ValueError) as e:
+            logger.warning("Could not refill random number pool: %s", e)
+        except Exception:
+            # anything else is a bug, but the next refill must still be able to start
+            logger.exception("Unexpected error refilling random number pool")
+        finally:
+            with self._lock:
+                if numbers is None:
+                    self.refill_failures += 1
+                else:
+                    self._numbers.extend(numbers)
+                    self.refills += 1
+                self._refilling = False
+
+        if numbers is not None:
+            logger.info("Random number pool refilled, %d available", len(self._numbers))
+
+    def _start_refill(self) -> None:
+        # called with the lock held; at most one refill runs at a time
+        if self._refilling:
+            return
+        self._refilling = True
+        threading.Thread(target=self._refill, name="random-pool-refill", daemon=True).start()
+
+    def prefill(self) -> None:
+        with self._lock:
+            self._start_refill()
+
+    def take(self, count: int) -> List[float]:
+        with self._lock:
+            taken = [self._numbers.popleft() for _ in range(min(count, len(self._numbers)))]
+            self.hits += len(taken)
+            missing = count - len(taken)
+            self.fallbacks += missing
+            # a dry pool refills whatever the low-water mark
+            if missing or len(self._numbers) < self.low_water:
+                self._start_refill()
+
+        if missing:
+            logger.warning("Random number pool ran dry, using %d local random numbers", missing)
+            taken.extend(secrets.randbelow(100) / 100 for _ in range(missing))
+        return taken
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'available': len(self._numbers),
+                'hits': self.hits,
+                'refills': self.refills,
+                'refill_failures': self.refill_failures,
+                'fallbacks': self.fallbacks,
+            }
+
+
+_pool: Optional[RandomPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_random_pool() -> RandomPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RandomPool()
+    return _pool
+
+def reset_random_pool() -> None:
+    # a forked worker inherits the parent's pool but not its refill thread
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def get_random() -> float:
+    random_number = get_random_pool().take(1)[0]
+    logger.info("Random number: %.3f", random_number)
+    return random_number
+
+def get_randoms(count: int) -> List[float]:
+    return get_random_pool().take(count)
@@ -1,7 +1,11 @@
 from contextlib import contextmanager
 import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
 
 from meal_max.utils.logger import configure_logger
 
@@ -13,6 +17,18 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# connection pool sizing, also configurable from the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# where arenas and tournaments live: "memory" in this process, "sqlite" in the
+# database, shared by every worker process
+STATE_STORE = os.getenv("STATE_STORE", "memory")
+
+# versioned schema migrations, named NNN_description.sql
+SQL_MIGRATIONS_PATH = os.getenv("SQL_MIGRATIONS_PATH", "/app/sql/migrations")
+
 
 def check_database_connection():
     try:
@@ -37,6 +53,159 @@ def check_table_exists(tablename: str):
         logger.error(error_message)
         raise Exception(error_message) from e
 
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections shared by all request threads.
+
+    Idle connections are kept on a stack so the most recently used (and warmest)
+    connection is handed out first. A thread that releases a connection and asks
+    again gets the same one back when nobody else took it in between.
+    """
+
+    def __init__(self, db_path: str, max_size: int = DB_POOL_SIZE,
+                 max_idle: float = DB_POOL_MAX_IDLE, timeout: float = DB_POOL_TIMEOUT):
+        if max_size < 1:
+            raise ValueError(f"Invalid pool size: {max_size}. Must be at least 1.")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        self._idle: List[Tuple[sqlite3.Connection, float]] = []
+        self._in_use = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.health_check_failures = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections migrate between threads, so the same-thread check is off;
+        # the pool guarantees a connection is only ever used by one thread at a time
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        logger.debug("Opened new database connection to %s", self.db_path)
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning("Discarding unhealthy pooled connection: %s", str(e))
+            return False
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Error while closing pooled connection: %s", str(e))
+
+    def _evict_expired(self, now: float) -> List[sqlite3.Connection]:
+        # called with the lock held; the oldest connections sit at the bottom of the stack
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            expired.append(self._idle.pop(0)[0])
+            self.evictions += 1
+        return expired
+
+    def acquire(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            expired = self._evict_expired(time.monotonic())
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error("Timed out waiting for a database connection (pool size %d)", self.max_size)
+                    raise sqlite3.OperationalError("Timed out waiting for a database connection from the pool")
+                self._cond.wait(remaining)
+            conn = self._idle.pop()[0] if self._idle else None
+            self._in_use += 1
+
+        for stale in expired:
+            self._close(stale)
+
+        if conn is not None:
+            if self._is_healthy(conn):
+                self._count('hits')
+                return conn
+            self._count('health_check_failures')
+            self._close(conn)
+
+        self._count('misses')
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _count(self, counter: str) -> None:
+        with self._cond:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        # never hand out a connection with a half-finished transaction
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if not discard:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if discard:
+            self._close(conn)
+
+    def close_all(self) -> None:
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+        logger.info("Closed %d pooled database connections.", len(idle))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'health_check_failures': self.health_check_failures,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+def get_pool_stats() -> dict:
+    return get_pool().stats()
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
 ###################################################
 #
 # This one yields rather than returns.
@@ -45,14 +214,51 @@ def check_table_exists(tablename: str):
 ###################################################
 @contextmanager
 def get_db_connection():
+    pool = get_pool()
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = pool.acquire()
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
         if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+            # hand the connection back instead of closing it, the pool rolls back
+            # anything left uncommitted and health-checks it on the next checkout
+            pool.release(conn)
+
+
+def get_migrations(path: Optional[str] = None) -> List[Tuple[int, str]]:
+    path = path or SQL_MIGRATIONS_PATH
+    migrations = []
+    for filename in os.listdir(path):
+        match = re.match(r"^(\d+)_.*\.sql$", filename)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(path, filename)))
+    return sorted(migrations)
+
+def apply_migrations(conn: Optional[sqlite3.Connection] = None, path: Optional[str] = None) -> int:
+    # the schema version lives in PRAGMA user_version; the create table script resets it to 0
+    if conn is None:
+        with get_db_connection() as conn:
+            return apply_migrations(conn, path)
+
+    try:
+        current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, filename in get_migrations(path):
+            if version <= current_version:
+                continue
+            with open(filename, "r") as fh:
+                script = fh.read()
+            logger.info("Applying migration %s", os.path.basename(filename))
+            # user_version is part of the transaction, so a failed migration leaves no trace
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+            current_version = version
+        return current_version
+
+    except sqlite3.Error as e:
+        logger.error("Database error while applying migrations: %s", str(e))
+        if conn.in_transaction:
+            conn.rollback()
+        raise e
@@ -1,3 +1,5 @@
+-- Recreating the table drops its indexes, so start the migrations over
+PRAGMA user_version = 0;
 DROP TABLE IF EXISTS meals;
 CREATE TABLE meals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -0,0 +1,7 @@
+-- Partial indexes for get_leaderboard. Both only contain live meals, so the
+-- deleted filter never has to touch the table, and each one already returns
+-- rows in leaderboard order so no sort step is needed.
+-- The WHERE clauses must match the query text exactly (deleted = FALSE, not 0)
+-- for SQLite to use a partial index.
+CREATE INDEX IF NOT EXISTS idx_meals_wins ON meals (wins DESC, battles) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS idx_meals_win_pct ON meals ((wins * 1.0 / battles) DESC) WHERE deleted = FALSE AND battles > 0;
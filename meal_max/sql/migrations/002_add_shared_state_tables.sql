@@ -0,0 +1,35 @@
+-- State shared by worker processes when STATE_STORE=sqlite.
+
+-- Bumped in the same transaction as every change to battle stats, so each worker
+-- can tell whether its in-memory leaderboard is current.
+CREATE TABLE IF NOT EXISTS meal_stats_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meal_stats_version (id, version) VALUES (0, 0);
+
+-- Battle arenas and the meals prepped in them. Combatants are snapshots of the
+-- meal row, as BattleModel keeps Meal objects.
+CREATE TABLE IF NOT EXISTS arenas (
+    id TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_arenas_last_used ON arenas (last_used);
+CREATE TABLE IF NOT EXISTS arena_combatants (
+    arena_id TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    meal TEXT NOT NULL,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    PRIMARY KEY (arena_id, slot)
+);
+
+-- Tournament progress, so any worker can answer a poll.
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tournaments_updated_at ON tournaments (updated_at);
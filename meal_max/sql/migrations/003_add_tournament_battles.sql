@@ -0,0 +1,10 @@
+-- Tournament battles, one row each, written chunk by chunk as they are fought. The
+-- tournaments row keeps only the summary, so a save no longer rewrites every round.
+CREATE TABLE IF NOT EXISTS tournament_battles (
+    tournament_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    winner_id INTEGER NOT NULL,
+    loser_id INTEGER NOT NULL,
+    PRIMARY KEY (tournament_id, seq)
+);
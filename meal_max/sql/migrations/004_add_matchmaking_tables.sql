@@ -0,0 +1,34 @@
+-- Matchmaking queue shared by worker processes when STATE_STORE=sqlite.
+
+-- Every queued meal, with the name and battle score it was enqueued with. match_id is
+-- NULL while the meal waits for an opponent, and 0 for the moment before it is placed.
+CREATE TABLE IF NOT EXISTS matchmaking_entries (
+    meal_id INTEGER PRIMARY KEY,
+    meal TEXT NOT NULL,
+    score REAL NOT NULL,
+    ticket INTEGER NOT NULL,
+    match_id INTEGER
+);
+-- nearest-score lookups among the waiting meals; the ticket breaks ties by longest wait
+CREATE INDEX IF NOT EXISTS idx_matchmaking_waiting ON matchmaking_entries (score, ticket) WHERE match_id IS NULL;
+
+-- Pairs waiting to be fought, in the order they were made. first_id waited longer.
+CREATE TABLE IF NOT EXISTS matchmaking_matches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_id INTEGER NOT NULL,
+    second_id INTEGER NOT NULL
+);
+
+-- Queue sizes and counters, kept here so stats never count the tables.
+CREATE TABLE IF NOT EXISTS matchmaking_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    tickets INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    matches INTEGER NOT NULL,
+    enqueued INTEGER NOT NULL,
+    matched INTEGER NOT NULL,
+    dispatched INTEGER NOT NULL,
+    dropped INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO matchmaking_state (id, tickets, size, matches, enqueued, matched, dispatched, dropped)
+VALUES (0, 0, 0, 0, 0, 0, 0, 0);
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from meal_max.models.kitchen_model import create_meal
+from meal_max.models.leaderboard_model import get_leaderboard_index
+from meal_max.utils.meal_cache import get_meal_cache
+from meal_max.utils.sql_utils import ConnectionPool, apply_migrations
+
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+
+@pytest.fixture
+def meal_db(tmp_path, mocker):
+    """Real meals database with the migrations applied, served through the shared connection pool."""
+    pool = ConnectionPool(str(tmp_path / "meal_max.db"))
+    conn = pool.acquire()
+    conn.executescript((SQL_DIR / "create_meal_table.sql").read_text())
+    apply_migrations(conn, str(SQL_DIR / "migrations"))
+    pool.release(conn)
+
+    mocker.patch("meal_max.utils.sql_utils._pool", pool)
+    mocker.patch("meal_max.utils.sql_utils.SQL_MIGRATIONS_PATH", str(SQL_DIR / "migrations"))
+    mocker.patch.dict('os.environ', {'SQL_CREATE_TABLE_PATH': str(SQL_DIR / "create_meal_table.sql")})
+    # battles must never wait on random.org
+    mocker.patch("meal_max.utils.random_utils.fetch_random_numbers", side_effect=RuntimeError("offline"))
+    get_meal_cache().clear()
+    get_leaderboard_index().invalidate()
+
+    yield pool
+    pool.close_all()
+    get_meal_cache().clear()
+    get_leaderboard_index().invalidate()
+
+@pytest.fixture
+def meals(meal_db):
+    """Fixture providing four meals with battle scores 26, 37, 62 and 82 (ids 1 to 4)."""
+    create_meal("Tacos", "Mexican", 4.0, "MED")
+    create_meal("Ramen", "Japanese", 5.0, "LOW")
+    create_meal("Pizza", "Italian", 9.0, "HIGH")
+    create_meal("Curry", "Indian", 14.0, "MED")
+    return meal_db
+
+@pytest.fixture
+def fetch_all(meal_db):
+    """Fixture providing a function that runs one query on the test database and returns its rows."""
+    def fetch_all(sql, params=()):
+        conn = meal_db.acquire()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            meal_db.release(conn)
+    return fetch_all
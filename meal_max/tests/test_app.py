@@ -0,0 +1,183 @@
+import json
+
+import pytest
+
+from meal_max.models.kitchen_model import record_battle_results
+
+
+@pytest.fixture
+def client(meals):
+    """Fixture providing a Flask test client over the test database (meals 1 to 4 already exist)."""
+    # imported here so the import-time prefill and migrations run against the patched pool
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def meal_names(fetch_all):
+    return [row[0] for row in fetch_all("SELECT meal FROM meals ORDER BY id")]
+
+
+##################################################
+# Bulk Create Test Cases
+##################################################
+
+def test_create_meals_json(client, fetch_all):
+    """Test a JSON import that skips invalid, duplicate and existing meals but inserts the rest."""
+    rows = [
+        {'meal': "Sushi", 'cuisine': "Japanese", 'price': 12.5, 'difficulty': "HIGH"},
+        {'meal': "Tacos", 'cuisine': "Mexican", 'price': 4.0, 'difficulty': "MED"},
+        {'meal': "Sushi", 'cuisine': "Japanese", 'price': 12.5, 'difficulty': "HIGH"},
+        {'meal': "Pho", 'cuisine': "Vietnamese", 'price': 0, 'difficulty': "LOW"},
+        {'meal': "Paella", 'cuisine': "Spanish", 'price': 9.99, 'difficulty': "EXTREME"},
+        "not a meal",
+        {'meal': "Gyro", 'cuisine': "Greek", 'price': 7.125, 'difficulty': "LOW"},
+    ]
+
+    response = client.post('/api/create-meals', json=rows)
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['rows'], body['inserted'], body['failed']) == (7, 2, 5)
+    assert [error['row'] for error in body['errors']] == [1, 2, 3, 4, 5]
+    assert body['errors'][0]['error'] == "Meal with name 'Tacos' already exists"
+    assert body['errors'][1]['error'] == "Duplicate meal name in batch: Sushi"
+    assert meal_names(fetch_all)[4:] == ["Sushi", "Gyro"]
+
+def test_create_meals_json_not_a_list(client):
+    """Test that a JSON body that is not an array is refused."""
+    response = client.post('/api/create-meals', json={'meal': "Sushi"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("price", ["NaN", "Infinity", "-Infinity"])
+def test_create_meals_rejects_non_finite_price(client, fetch_all, price):
+    """Test that the NaN and Infinity literals Python's JSON parser accepts are invalid prices."""
+    body = f'[{{"meal": "Sushi", "cuisine": "Japanese", "price": {price}, "difficulty": "HIGH"}}]'
+
+    response = client.post('/api/create-meals', data=body, content_type='application/json')
+
+    assert response.status_code == 201
+    assert response.get_json()['errors'][0]['error'].startswith("Invalid price")
+    assert len(meal_names(fetch_all)) == 4
+
+def test_create_meals_ndjson(client, fetch_all):
+    """Test an NDJSON import, where a malformed line is reported as an invalid row."""
+    lines = [
+        json.dumps({'meal': "Sushi", 'cuisine': "Japanese", 'price': 12.5, 'difficulty': "HIGH"}),
+        "",
+        "{not json",
+        json.dumps({'meal': "Ramen", 'cuisine': "Japanese", 'price': 5.0, 'difficulty': "LOW"}),
+        json.dumps({'meal': "Pho", 'cuisine': "Vietnamese", 'price': "8.5", 'difficulty': "LOW"}),
+    ]
+
+    response = client.post('/api/create-meals', data="\n".join(lines) + "\n",
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['rows'], body['inserted'], body['failed']) == (4, 2, 2)
+    assert body['errors'][0] == {'row': 1, 'error': "Row must be an object with meal, cuisine, price and difficulty"}
+    assert body['errors'][1]['error'] == "Meal with name 'Ramen' already exists"
+    assert meal_names(fetch_all)[4:] == ["Sushi", "Pho"]
+
+def test_create_meals_csv(client, fetch_all):
+    """Test a CSV import, where prices arrive as text."""
+    body = "\n".join([
+        "meal,cuisine,price,difficulty",
+        "Sushi,Japanese,12.5,HIGH",
+        "Gyro,Greek,7.125,LOW",
+        "Pho,Vietnamese,cheap,LOW",
+        "Paella,Spanish,inf,MED",
+        "Sushi,Japanese,11,HIGH",
+        "Pizza,Italian,9.0,HIGH",
+    ]) + "\n"
+
+    response = client.post('/api/create-meals', data=body, content_type='text/csv')
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['rows'], body['inserted'], body['failed']) == (6, 2, 4)
+    assert [error['row'] for error in body['errors']] == [2, 3, 4, 5]
+    assert body['errors'][0]['error'] == "Invalid price: cheap. Price must be a positive number."
+    assert body['errors'][1]['error'] == "Invalid price: inf. Price must be a positive number."
+    assert fetch_all("SELECT price FROM meals WHERE meal = 'Gyro'") == [(7.125,)]
+
+def test_create_meals_unsupported_content_type(client):
+    """Test that a body in an unsupported format is refused."""
+    response = client.post('/api/create-meals', data="meal=Sushi", content_type='text/plain')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Unsupported content type: text/plain"
+
+
+##################################################
+# Leaderboard Test Cases
+##################################################
+
+def test_leaderboard_page(client):
+    """Test that limit and offset select a page of the leaderboard."""
+    record_battle_results([(4, 1), (4, 2), (3, 1)])
+
+    response = client.get('/api/leaderboard?limit=1&offset=1')
+
+    assert response.status_code == 200
+    assert [meal['meal'] for meal in response.get_json()['leaderboard']] == ["Pizza"]
+
+@pytest.mark.parametrize("query, error", [
+    ("limit=abc", "limit and offset must be integers"),
+    ("offset=-x", "limit and offset must be integers"),
+    ("limit=1.5", "limit and offset must be integers"),
+    ("limit=", "limit and offset must be integers"),
+    ("offset=-1", "Invalid offset: -1"),
+    ("sort=price", "Invalid sort_by parameter: price"),
+])
+def test_invalid_leaderboard_request(client, query, error):
+    """Test that a malformed limit or offset is refused instead of falling back to the default page."""
+    response = client.get(f'/api/leaderboard?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(error)
+
+
+##################################################
+# Simulation Test Cases
+##################################################
+
+def test_simulation_over_the_draw_limit_is_refused(client, mocker):
+    """Test that a simulation too large to finish within a request is a bad request."""
+    mocker.patch("meal_max.models.simulation_model.SIMULATION_MAX_DRAWS", 1000)
+
+    response = client.post('/api/simulate-battles', json={'meal_ids': [1, 2, 3, 4], 'trials': 100})
+
+    assert response.status_code == 400
+    assert "the limit is 1000" in response.get_json()['error']
+    assert client.post('/api/simulate-battles', json={'meal_ids': [1, 2], 'trials': 100}).status_code == 200
+
+
+##################################################
+# Arena Test Cases
+##################################################
+
+@pytest.mark.parametrize("method, route", [
+    ("get", "/api/battle"),
+    ("post", "/api/clear-combatants"),
+    ("get", "/api/get-combatants"),
+    ("post", "/api/prep-combatant"),
+])
+def test_unknown_arena_is_not_found(client, method, route):
+    """Test that the battle routes refuse an arena id that was never created."""
+    response = getattr(client, method)(route, headers={'X-Arena-Id': "made-up"}, json={'meal': "Tacos"})
+
+    assert response.status_code == 404
+    assert response.get_json()['error'] == "Arena made-up not found"
+
+def test_created_arena_is_found(client):
+    """Test that a created arena serves the battle routes until it is deleted."""
+    arena_id = client.post('/api/create-arena').get_json()['arena_id']
+
+    response = client.post(f'/api/prep-combatant?arena={arena_id}', json={'meal': "Tacos"})
+    assert response.status_code == 200
+    assert client.get('/api/get-combatants').get_json()['combatants'] == []
+
+    assert client.delete(f'/api/delete-arena/{arena_id}').status_code == 200
+    assert client.get(f'/api/get-combatants?arena={arena_id}').status_code == 404
+    assert client.delete('/api/delete-arena/default').status_code == 404
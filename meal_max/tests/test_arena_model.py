@@ -0,0 +1,209 @@
+import threading
+
+import pytest
+
+from meal_max.models.arena_model import DEFAULT_ARENA_ID, ArenaRegistry, SQLiteArenaRegistry
+from meal_max.models.kitchen_model import delete_meal, get_meal_by_id
+
+
+@pytest.fixture
+def second_wins(mocker):
+    """Fixture making every battle go to the second combatant (no score gap beats 0.99)."""
+    mocker.patch("meal_max.models.battle_model.get_random", return_value=0.99)
+
+@pytest.fixture
+def mock_time(mocker):
+    """Fixture freezing the registry clock at 100."""
+    return mocker.patch("meal_max.models.arena_model.time.monotonic", return_value=100.0)
+
+
+##################################################
+# Arena Lock Test Cases
+##################################################
+
+def test_arena_lock_serializes_one_arena_only(meals):
+    """Test that an operation waits for its own arena's lock but not for another arena's."""
+    registry = ArenaRegistry()
+    busy, free = registry.create(), registry.create()
+    done = threading.Event()
+
+    def read_busy_arena():
+        busy.get_combatants()
+        done.set()
+
+    with busy.lock:
+        thread = threading.Thread(target=read_busy_arena)
+        thread.start()
+        assert not done.wait(0.05)
+        assert free.prep_combatant(get_meal_by_id(1))[0].meal == "Tacos"
+    thread.join(1)
+    assert done.is_set()
+
+def test_arenas_keep_their_own_combatants(meals):
+    """Test that prepping in one arena leaves the others, and the default arena, empty."""
+    registry = ArenaRegistry()
+    arena = registry.create()
+    arena.prep_combatant(get_meal_by_id(1))
+
+    assert [meal.meal for meal in registry.get(arena.id).get_combatants()] == ["Tacos"]
+    assert registry.get().get_combatants() == []
+    assert registry.get(DEFAULT_ARENA_ID) is registry.get()
+
+
+##################################################
+# Registry Test Cases
+##################################################
+
+def test_unknown_arena_is_not_created():
+    """Test that an id that was never created is refused instead of taking a slot."""
+    registry = ArenaRegistry(max_arenas=1)
+    arena = registry.create()
+
+    with pytest.raises(ValueError, match="Arena made-up not found"):
+        registry.get("made-up")
+    assert registry.get(arena.id) is arena
+    assert registry.stats()['created'] == 1
+
+def test_idle_arenas_are_evicted(mock_time):
+    """Test that an arena unused for longer than the idle timeout is dropped."""
+    registry = ArenaRegistry(idle_timeout=10)
+    stale, fresh = registry.create(), registry.create()
+    default = registry.get()
+
+    mock_time.return_value = 105.0
+    registry.get(fresh.id)
+    mock_time.return_value = 111.0
+
+    with pytest.raises(ValueError, match=f"Arena {stale.id} not found"):
+        registry.get(stale.id)
+    assert registry.get(fresh.id) is fresh
+    assert registry.get() is default
+    assert registry.stats()['evicted_idle'] == 1
+
+def test_least_recently_used_arena_is_evicted(mock_time):
+    """Test that creating an arena beyond the limit drops the least recently used one."""
+    registry = ArenaRegistry(max_arenas=2)
+    first, second = registry.create(), registry.create()
+    registry.get(first.id)
+
+    third = registry.create()
+
+    with pytest.raises(ValueError, match=f"Arena {second.id} not found"):
+        registry.get(second.id)
+    assert registry.get(first.id) is first
+    assert registry.get(third.id) is third
+    assert registry.stats()['arenas'] == 2
+    assert registry.stats()['evicted_full'] == 1
+
+def test_default_arena_is_never_evicted(mock_time):
+    """Test that the default arena survives idle and LRU eviction and cannot be removed."""
+    registry = ArenaRegistry(max_arenas=1, idle_timeout=10)
+    default = registry.get()
+    registry.create()
+    registry.create()
+
+    mock_time.return_value = 1000.0
+    assert registry.stats()['arenas'] == 0
+    assert registry.get() is default
+    with pytest.raises(ValueError, match="The default arena cannot be removed"):
+        registry.remove(DEFAULT_ARENA_ID)
+
+def test_remove_arena():
+    """Test that a removed arena is gone and cannot be removed twice."""
+    registry = ArenaRegistry()
+    arena = registry.create()
+    registry.remove(arena.id)
+
+    with pytest.raises(ValueError, match=f"Arena {arena.id} not found"):
+        registry.get(arena.id)
+    with pytest.raises(ValueError, match=f"Arena {arena.id} not found"):
+        registry.remove(arena.id)
+
+
+##################################################
+# Shared Registry Test Cases
+##################################################
+
+def test_sqlite_unknown_arena_is_not_created(meal_db, fetch_all):
+    """Test that the shared registry refuses ids that were never created."""
+    registry = SQLiteArenaRegistry()
+
+    with pytest.raises(ValueError, match="Arena made-up not found"):
+        registry.get("made-up")
+    assert registry.get().get_combatants() == []
+    assert fetch_all("SELECT id FROM arenas") == []
+
+def test_sqlite_default_arena_is_never_evicted(meals, fetch_all):
+    """Test that the default arena's row is neither counted nor evicted."""
+    registry = SQLiteArenaRegistry(max_arenas=1, idle_timeout=0)
+    registry.get().prep_combatant(get_meal_by_id(1))
+    registry.create()
+    latest = registry.create()
+
+    assert sorted(row[0] for row in fetch_all("SELECT id FROM arenas")) == sorted([DEFAULT_ARENA_ID, latest.id])
+    assert registry.stats()['arenas'] == 0
+    assert [meal.meal for meal in registry.get().get_combatants()] == ["Tacos"]
+    with pytest.raises(ValueError, match="The default arena cannot be removed"):
+        registry.remove(DEFAULT_ARENA_ID)
+
+def test_sqlite_registries_share_arenas(meals):
+    """Test that an arena created through one registry is used and removed through another."""
+    worker_1, worker_2 = SQLiteArenaRegistry(), SQLiteArenaRegistry()
+    arena_id = worker_1.create().id
+
+    worker_2.get(arena_id).prep_combatant(get_meal_by_id(1))
+    assert [meal.meal for meal in worker_1.get(arena_id).get_combatants()] == ["Tacos"]
+
+    worker_1.remove(arena_id)
+    with pytest.raises(ValueError, match=f"Arena {arena_id} not found"):
+        worker_2.get(arena_id)
+
+def test_sqlite_arenas_keep_their_own_combatants(meals):
+    """Test that two arenas in one database do not see each other's combatants."""
+    registry = SQLiteArenaRegistry()
+    first, second = registry.create(), registry.create()
+    first.prep_combatant(get_meal_by_id(1))
+    second.prep_combatant(get_meal_by_id(2))
+    second.prep_combatant(get_meal_by_id(3))
+
+    assert [meal.meal for meal in first.get_combatants()] == ["Tacos"]
+    assert [meal.meal for meal in second.get_combatants()] == ["Ramen", "Pizza"]
+    second.clear_combatants()
+    assert second.get_combatants() == []
+    assert len(first.get_combatants()) == 1
+
+def test_sqlite_battle_removes_loser_and_records_result(meals, second_wins, fetch_all):
+    """Test that a battle drops the loser from the arena and records both meals in one go."""
+    arena = SQLiteArenaRegistry().create()
+    arena.prep_combatant(get_meal_by_id(4))
+    arena.prep_combatant(get_meal_by_id(1))
+
+    assert arena.battle() == "Tacos"
+
+    assert [meal.meal for meal in SQLiteArenaRegistry().get(arena.id).get_combatants()] == ["Tacos"]
+    assert fetch_all("SELECT id, battles, wins FROM meals WHERE id IN (1, 4) ORDER BY id") == [(1, 1, 1), (4, 1, 0)]
+
+def test_sqlite_failed_battle_changes_nothing(meals, second_wins, fetch_all):
+    """Test that a battle whose result cannot be recorded leaves the arena and the stats as they were."""
+    arena = SQLiteArenaRegistry().create()
+    arena.prep_combatant(get_meal_by_id(4))
+    arena.prep_combatant(get_meal_by_id(1))
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        arena.battle()
+
+    assert [meal.meal for meal in arena.get_combatants()] == ["Curry", "Tacos"]
+    assert fetch_all("SELECT battles, wins FROM meals WHERE id = 4") == [(0, 0)]
+
+def test_sqlite_evicted_arena_is_not_revived(meals):
+    """Test that an arena evicted after it was looked up is refused instead of being recreated."""
+    registry = SQLiteArenaRegistry(max_arenas=1)
+    stale = registry.create()
+    registry.create()
+
+    with pytest.raises(ValueError, match=f"Arena {stale.id} not found"):
+        stale.prep_combatant(get_meal_by_id(1))
+    with pytest.raises(ValueError, match=f"Arena {stale.id} not found"):
+        registry.get(stale.id)
+
@@ -0,0 +1,55 @@
+import pytest
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import delete_meal, get_meal_by_id, record_battle_results
+
+
+@pytest.fixture
+def battle_model(meals, mocker):
+    """Fixture providing a BattleModel whose random draw always favours the second combatant."""
+    mocker.patch("meal_max.models.battle_model.get_random", return_value=0.99)
+    return BattleModel()
+
+
+##################################################
+# Battle Test Cases
+##################################################
+
+def test_battle_records_both_sides(battle_model, fetch_all):
+    """Test that a battle records the win and the loss and removes the loser."""
+    battle_model.prep_combatant(get_meal_by_id(1))
+    battle_model.prep_combatant(get_meal_by_id(4))
+
+    assert battle_model.battle() == "Curry"
+
+    assert [meal.id for meal in battle_model.get_combatants()] == [4]
+    assert fetch_all("SELECT id, battles, wins FROM meals WHERE id IN (1, 4) ORDER BY id") == [(1, 1, 0), (4, 1, 1)]
+
+def test_battle_against_itself(battle_model, fetch_all):
+    """Test that a meal prepped twice fights itself, winning and losing one battle."""
+    meal = get_meal_by_id(2)
+    battle_model.prep_combatant(meal)
+    battle_model.prep_combatant(meal)
+
+    assert battle_model.battle() == "Ramen"
+
+    assert battle_model.get_combatants() == [meal]
+    assert fetch_all("SELECT battles, wins FROM meals WHERE id = 2") == [(2, 1)]
+
+def test_battle_results_against_itself(meals, fetch_all):
+    """Test that the bulk path records a self battle the same way."""
+    record_battle_results([(3, 3), (3, 1)])
+
+    assert fetch_all("SELECT id, battles, wins FROM meals WHERE id IN (1, 3) ORDER BY id") == [(1, 1, 0), (3, 3, 2)]
+
+def test_battle_with_deleted_meal(battle_model, fetch_all):
+    """Test that a battle with a deleted meal records nothing and keeps both combatants."""
+    battle_model.prep_combatant(get_meal_by_id(1))
+    battle_model.prep_combatant(get_meal_by_id(4))
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        battle_model.battle()
+
+    assert len(battle_model.get_combatants()) == 2
+    assert fetch_all("SELECT SUM(battles) FROM meals") == [(0,)]
@@ -0,0 +1,154 @@
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.models.leaderboard_model import LeaderboardIndex
+
+
+def row(meal_id: int, battles: int, wins: int) -> tuple:
+    """A meals row as the kitchen model reads it: (id, meal, cuisine, price, difficulty, battles, wins)."""
+    return (meal_id, f"Meal {meal_id}", "Italian", 10.0, "MED", battles, wins)
+
+@pytest.fixture
+def index():
+    """Fixture providing an index over five meals; meal 5 has never battled."""
+    index = LeaderboardIndex()
+    index.rebuild([row(1, 4, 2), row(2, 2, 2), row(3, 10, 4), row(4, 4, 2), row(5, 0, 0)], version=7)
+    return index
+
+def ids(leaderboard):
+    return [meal["id"] for meal in leaderboard]
+
+
+##################################################
+# Ordering Test Cases
+##################################################
+
+def test_rebuild_orders_by_wins_then_id(index):
+    """Test ordering by wins, ties broken by id, skipping meals without battles."""
+    assert ids(index.get_leaderboard("wins")) == [3, 1, 2, 4]
+    assert len(index) == 4
+    assert index.loaded and index.version == 7
+
+def test_rebuild_orders_by_win_pct_then_id(index):
+    """Test ordering by win percentage, ties broken by id."""
+    leaderboard = index.get_leaderboard("win_pct")
+
+    assert ids(leaderboard) == [2, 1, 4, 3]
+    assert [meal["win_pct"] for meal in leaderboard] == [100.0, 50.0, 50.0, 40.0]
+
+def test_upsert_repositions_meal(index):
+    """Test that an updated row moves the meal in both orders."""
+    index.upsert([row(4, 6, 4), row(5, 1, 1)], version=8)
+
+    assert ids(index.get_leaderboard("wins")) == [3, 4, 1, 2, 5]
+    assert ids(index.get_leaderboard("win_pct")) == [2, 5, 4, 1, 3]
+    assert index.version == 8
+
+def test_remove_meal(index):
+    """Test that a removed meal leaves both orders."""
+    index.remove(3, version=8)
+
+    assert ids(index.get_leaderboard("wins")) == [1, 2, 4]
+    assert ids(index.get_leaderboard("win_pct")) == [2, 1, 4]
+
+def test_out_of_order_version_clears_index(index):
+    """Test that a change stamped with anything but the next version drops the index."""
+    index.upsert([row(1, 5, 3)], version=9)
+
+    assert not index.loaded
+    assert index.version is None
+    assert index.get_leaderboard("wins") == []
+
+def test_unversioned_change_is_applied(index):
+    """Test that changes without a version are applied as they come."""
+    index.upsert([row(1, 5, 5)])
+    assert ids(index.get_leaderboard("wins")) == [1, 3, 2, 4]
+    assert index.version == 7
+
+def test_invalid_sort_key(index):
+    """Test error when sorting by an unknown key."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: price"):
+        index.get_leaderboard("price")
+
+
+##################################################
+# Pagination and Rank Test Cases
+##################################################
+
+def test_pagination(index):
+    """Test pages taken with limit and offset."""
+    assert ids(index.get_leaderboard("wins", limit=2)) == [3, 1]
+    assert ids(index.get_leaderboard("wins", limit=2, offset=2)) == [2, 4]
+    assert ids(index.get_leaderboard("wins", limit=2, offset=4)) == []
+    assert ids(index.get_leaderboard("wins", offset=3)) == [4]
+    assert index.get_leaderboard("wins", limit=0) == []
+
+def test_rank_shares_ties(index):
+    """Test competition ranking: equal scores share a rank and the next rank is skipped."""
+    assert index.get_rank(3, "wins") == {'id': 3, 'meal': "Meal 3", 'sort_by': "wins", 'rank': 1,
+                                         'ranked_meals': 4, 'percentile': 75.0}
+    assert [index.get_rank(meal_id, "wins")["rank"] for meal_id in (1, 2, 4)] == [2, 2, 2]
+    assert index.get_rank(2, "wins")["percentile"] == 0.0
+
+    assert [index.get_rank(meal_id, "win_pct")["rank"] for meal_id in (2, 1, 4, 3)] == [1, 2, 2, 4]
+    assert index.get_rank(1, "win_pct")["percentile"] == 25.0
+
+def test_rank_of_unranked_meal(index):
+    """Test that a meal without battles has no rank."""
+    assert index.get_rank(5, "wins") is None
+    assert index.get_rank(99, "wins") is None
+
+
+##################################################
+# Kitchen Model Test Cases
+##################################################
+
+def test_get_leaderboard_follows_battles(meals):
+    """Test that recorded battles and deletes show up in the served leaderboard."""
+    kitchen_model.record_battle_result(4, 1)
+    kitchen_model.record_battle_result(2, 4)
+    kitchen_model.record_battle_result(2, 3)
+
+    assert ids(kitchen_model.get_leaderboard("wins")) == [2, 4, 1, 3]
+    assert ids(kitchen_model.get_leaderboard("win_pct", limit=2, offset=1)) == [4, 1]
+
+    kitchen_model.delete_meal(2)
+    assert ids(kitchen_model.get_leaderboard("wins")) == [4, 1, 3]
+
+def test_get_leaderboard_bad_page(meals):
+    """Test error on a negative limit or offset."""
+    with pytest.raises(ValueError, match="Invalid limit: -1"):
+        kitchen_model.get_leaderboard("wins", limit=-1)
+    with pytest.raises(ValueError, match="Invalid offset: -2"):
+        kitchen_model.get_leaderboard("wins", offset=-2)
+
+def test_get_meal_rank(meals):
+    """Test ranking a meal, and the errors for meals that have no rank."""
+    kitchen_model.record_battle_result(4, 1)
+    kitchen_model.record_battle_result(4, 2)
+
+    rank = kitchen_model.get_meal_rank(4, "wins")
+    assert (rank["rank"], rank["ranked_meals"], rank["percentile"]) == (1, 3, 66.7)
+    assert kitchen_model.get_meal_rank(1, "win_pct")["rank"] == 2
+
+    with pytest.raises(ValueError, match="Meal with ID 3 has not battled yet"):
+        kitchen_model.get_meal_rank(3)
+    with pytest.raises(ValueError, match="Meal with ID 99 not found"):
+        kitchen_model.get_meal_rank(99)
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: price"):
+        kitchen_model.get_meal_rank(4, "price")
+
+def test_leaderboard_reloads_after_another_worker_writes(meals):
+    """Test that a stats change made outside this process's index is picked up on the next read."""
+    kitchen_model.record_battle_result(1, 2)
+    assert ids(kitchen_model.get_leaderboard("wins")) == [1, 2]
+
+    # another worker records a battle: it bumps the version but this index never sees the rows
+    conn = meals.acquire()
+    conn.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = 3")
+    conn.execute("UPDATE meals SET battles = battles + 1 WHERE id = 1")
+    conn.execute("UPDATE meal_stats_version SET version = version + 1 WHERE id = 0")
+    conn.commit()
+    meals.release(conn)
+
+    assert ids(kitchen_model.get_leaderboard("wins")) == [1, 3, 2]
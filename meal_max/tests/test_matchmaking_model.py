@@ -0,0 +1,187 @@
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.models.kitchen_model import clear_meals, create_meal
+from meal_max.models.matchmaking_model import MatchmakingQueue, SQLiteMatchmakingQueue
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_queue(request, meals):
+    """Fixture providing a factory for either matchmaking queue over the four meals (scores 26, 37, 62, 82)."""
+    queue_class = MatchmakingQueue if request.param == "memory" else SQLiteMatchmakingQueue
+    return lambda **kwargs: queue_class(**kwargs)
+
+@pytest.fixture
+def second_wins(mocker):
+    """Fixture making every battle go to the second combatant (no score gap beats 0.99)."""
+    return mocker.patch("meal_max.models.matchmaking_model.get_randoms", side_effect=lambda count: [0.99] * count)
+
+def stats(fetch_all):
+    return {meal_id: (battles, wins) for meal_id, battles, wins in fetch_all("SELECT id, battles, wins FROM meals")}
+
+def mark_deleted(pool, meal_id):
+    # a delete made by another worker, which this queue never hears about
+    conn = pool.acquire()
+    conn.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
+    conn.commit()
+    pool.release(conn)
+
+
+##################################################
+# Pairing Test Cases
+##################################################
+
+def test_nearest_neighbour_pairing(make_queue):
+    """Test that an entrant is paired with the waiting meal of nearest score within the gap."""
+    queue = make_queue(max_gap=30)
+
+    assert queue.enqueue([1, 4]) == []
+    assert queue.enqueue([3]) == [(4, 3)]
+    assert queue.enqueue([2]) == [(1, 2)]
+
+    queue_stats = queue.stats()
+    assert (queue_stats['waiting'], queue_stats['matches'], queue_stats['enqueued'], queue_stats['matched']) == (0, 2, 4, 2)
+
+@pytest.mark.parametrize("order, opponent", [([5, 1], 5), ([1, 5], 1)])
+def test_equal_gaps_go_to_longer_wait(make_queue, order, opponent):
+    """Test that an entrant exactly between two waiting meals is paired with the one that waited longer."""
+    create_meal("Gyro", "Greek", 10.0, "MED")  # id 5, score 48
+    queue = make_queue(max_gap=15)
+
+    assert queue.enqueue(order) == []
+    assert queue.enqueue([2]) == [(opponent, 2)]
+
+def test_dequeue_rematches_opponent(make_queue):
+    """Test that dequeuing a matched meal puts its opponent back through matchmaking."""
+    queue = make_queue()
+    assert queue.enqueue([1, 2]) == [(1, 2)]
+    assert queue.enqueue([3]) == []
+
+    queue.dequeue(1)
+    assert (queue.stats()['waiting'], queue.stats()['matches']) == (0, 1)
+
+    queue.dequeue(3)
+    assert (queue.stats()['waiting'], queue.stats()['matches']) == (1, 0)
+    assert queue.enqueue([4]) == [(2, 4)]
+
+def test_invalid_enqueue_and_dequeue(make_queue):
+    """Test errors for meals queued twice, a full queue and meals that are not queued."""
+    queue = make_queue(max_size=3)
+    queue.enqueue([1])
+
+    with pytest.raises(ValueError, match="Meal with ID 1 is already in the matchmaking queue"):
+        queue.enqueue([2, 1])
+    with pytest.raises(ValueError, match="A meal can only be enqueued once."):
+        queue.enqueue([2, 2])
+    with pytest.raises(ValueError, match=r"The matchmaking queue is full \(3 meals\)"):
+        queue.enqueue([2, 3, 4])
+    with pytest.raises(ValueError, match="Meal with ID 4 is not in the matchmaking queue"):
+        queue.dequeue(4)
+    assert queue.stats()['waiting'] == 1
+
+
+##################################################
+# Dispatch Test Cases
+##################################################
+
+def test_dispatch_records_battles(make_queue, second_wins, fetch_all):
+    """Test that queued matches are fought in order, recorded, and their meals leave the queue."""
+    queue = make_queue()
+    queue.enqueue([1, 2, 3, 4])
+
+    assert queue.dispatch(max_battles=1) == {
+        'battles': [{'winner_id': 2, 'winner': "Ramen", 'loser_id': 1, 'loser': "Tacos"}],
+        'errors': [],
+    }
+    assert [battle['winner_id'] for battle in queue.dispatch()['battles']] == [4]
+    assert queue.dispatch() == {'battles': [], 'errors': []}
+
+    assert stats(fetch_all) == {1: (1, 0), 2: (1, 1), 3: (1, 0), 4: (1, 1)}
+    assert queue.stats()['dispatched'] == 2
+    assert queue.enqueue([1, 2]) == [(1, 2)]
+
+def test_dispatch_drops_battles_of_deleted_meals(make_queue, second_wins, meals, fetch_all):
+    """Test that a meal deleted after it was matched drops only its own battle."""
+    queue = make_queue()
+    queue.enqueue([1, 2, 3, 4])
+    mark_deleted(meals, 3)
+
+    result = queue.dispatch()
+
+    assert [(battle['winner_id'], battle['loser_id']) for battle in result['battles']] == [(2, 1)]
+    assert result['errors'] == [{'winner_id': 4, 'loser_id': 3, 'error': "Meal with ID 3 has been deleted"}]
+    assert stats(fetch_all) == {1: (1, 0), 2: (1, 1), 3: (0, 0), 4: (0, 0)}
+    stats_after = queue.stats()
+    assert (stats_after['matches'], stats_after['dispatched'], stats_after['dropped']) == (0, 1, 1)
+
+def test_failed_dispatch_requeues_without_recording(make_queue, second_wins, mocker, meals, fetch_all):
+    """Test that a dispatch failing after some battles were written records none, and a retry records each once."""
+    refresh_leaderboard = kitchen_model._refresh_leaderboard
+    calls = []
+
+    def fail_first_refresh(cursor, meal_ids):
+        calls.append(meal_ids)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("disk I/O error")
+        refresh_leaderboard(cursor, meal_ids)
+
+    queue = make_queue()
+    queue.enqueue([1, 2, 3, 4])
+    mark_deleted(meals, 3)
+    mocker.patch("meal_max.models.kitchen_model._refresh_leaderboard", side_effect=fail_first_refresh)
+
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        queue.dispatch()
+    assert stats(fetch_all)[2] == (0, 0)
+    assert queue.stats()['matches'] == 2
+
+    result = queue.dispatch()
+
+    assert len(result['battles']) == 1 and len(result['errors']) == 1
+    assert stats(fetch_all) == {1: (1, 0), 2: (1, 1), 3: (0, 0), 4: (0, 0)}
+
+def test_invalid_dispatch(make_queue):
+    """Test error on a battle count that is not positive."""
+    with pytest.raises(ValueError, match="Invalid battle count: 0"):
+        make_queue().dispatch(max_battles=0)
+
+
+##################################################
+# Shared Queue Test Cases
+##################################################
+
+def test_sqlite_queue_is_shared_between_workers(meals, second_wins):
+    """Test that meals enqueued through one worker's queue are matched, dequeued and dispatched through another."""
+    worker_1, worker_2 = SQLiteMatchmakingQueue(), SQLiteMatchmakingQueue()
+
+    assert worker_1.enqueue([1]) == []
+    assert worker_2.enqueue([2, 3]) == [(1, 2)]
+    with pytest.raises(ValueError, match="Meal with ID 3 is already in the matchmaking queue"):
+        worker_1.enqueue([3])
+
+    worker_1.discard(3)
+    assert worker_2.stats()['waiting'] == 0
+    assert [battle['winner_id'] for battle in worker_1.dispatch()['battles']] == [2]
+    assert worker_2.dispatch() == {'battles': [], 'errors': []}
+
+
+##################################################
+# Clear Meals Test Cases
+##################################################
+
+def test_clear_meals_empties_the_queue(make_queue, second_wins, fetch_all):
+    """Test that meals created after a clear, which reuse the queued ids, are not fought by an old match."""
+    queue = make_queue()
+    assert queue.enqueue([1, 2]) == [(1, 2)]
+    queue.enqueue([3])
+
+    clear_meals()
+    create_meal("New1", "Thai", 5.0, "LOW")
+    create_meal("New2", "Thai", 6.0, "LOW")
+
+    assert queue.dispatch() == {'battles': [], 'errors': []}
+    assert fetch_all("SELECT battles, wins FROM meals") == [(0, 0), (0, 0)]
+    assert (queue.stats()['waiting'], queue.stats()['matches']) == (0, 0)
+    assert queue.enqueue([1, 2]) == [(1, 2)]
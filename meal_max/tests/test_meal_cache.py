@@ -0,0 +1,134 @@
+import pytest
+
+from meal_max.models.kitchen_model import Meal, clear_meals, delete_meal, get_meal_by_id, get_meal_by_name
+from meal_max.utils.meal_cache import MealCache, get_meal_cache
+
+
+@pytest.fixture
+def cache():
+    """Fixture to provide a small MealCache."""
+    return MealCache(max_size=2, ttl=60)
+
+def make_meal(meal_id: int) -> Meal:
+    return Meal(meal_id, f"Meal {meal_id}", "Italian", 10.0 + meal_id, "MED")
+
+
+##################################################
+# Lookup Test Cases
+##################################################
+
+def test_lookup_by_id_and_name(cache):
+    """Test that a cached meal is found by either key."""
+    meal = make_meal(1)
+    cache.put(meal)
+
+    assert cache.get_by_id(1) is meal
+    assert cache.get_by_name("Meal 1") is meal
+    assert cache.get_by_id(2) is None
+    assert cache.get_by_name("Meal 2") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+def test_least_recently_used_is_evicted(cache):
+    """Test that the least recently used meal is evicted from both maps."""
+    cache.put(make_meal(1))
+    cache.put(make_meal(2))
+    cache.get_by_name("Meal 1")
+    cache.put(make_meal(3))
+
+    assert cache.get_by_id(2) is None
+    assert cache.get_by_name("Meal 2") is None
+    assert cache.get_by_id(1) is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_put_replaces_entry(cache):
+    """Test that putting a meal again replaces it instead of evicting another one."""
+    cache.put(make_meal(1))
+    cache.put(make_meal(2))
+    cache.put(make_meal(1))
+
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 0
+
+def test_entries_expire(mocker):
+    """Test that an entry older than the TTL is a miss by either key."""
+    mock_time = mocker.patch("meal_max.utils.meal_cache.time.monotonic", return_value=100.0)
+    cache = MealCache(max_size=2, ttl=10)
+    cache.put(make_meal(1))
+
+    mock_time.return_value = 109.0
+    assert cache.get_by_name("Meal 1") is not None
+
+    mock_time.return_value = 110.0
+    assert cache.get_by_id(1) is None
+    assert cache.get_by_name("Meal 1") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_no_ttl_never_expires(mocker):
+    """Test that a TTL of 0 keeps entries until they are evicted or invalidated."""
+    mock_time = mocker.patch("meal_max.utils.meal_cache.time.monotonic", return_value=100.0)
+    cache = MealCache(max_size=2, ttl=0)
+    cache.put(make_meal(1))
+
+    mock_time.return_value = 1e9
+    assert cache.get_by_id(1) is not None
+
+def test_disabled_cache():
+    """Test that a cache with max_size 0 stores nothing."""
+    cache = MealCache(max_size=0)
+    cache.put(make_meal(1))
+    assert cache.get_by_id(1) is None
+
+def test_invalidate_and_clear(cache):
+    """Test that invalidated and cleared meals are gone by both keys."""
+    cache.put(make_meal(1))
+    cache.put(make_meal(2))
+
+    cache.invalidate(1)
+    cache.invalidate(5)
+    assert cache.get_by_name("Meal 1") is None
+    assert cache.stats()["invalidations"] == 1
+
+    cache.clear()
+    assert cache.get_by_id(2) is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 2
+
+
+##################################################
+# Kitchen Model Invalidation Test Cases
+##################################################
+
+def test_lookups_are_cached(meals):
+    """Test that a second lookup by id or name is served from the cache."""
+    meal = get_meal_by_id(1)
+    hits = get_meal_cache().stats()["hits"]
+
+    assert get_meal_by_id(1) is meal
+    assert get_meal_by_name("Tacos") is meal
+    assert get_meal_cache().stats()["hits"] == hits + 2
+
+def test_delete_meal_invalidates(meals):
+    """Test that a deleted meal is no longer served from the cache."""
+    get_meal_by_id(1)
+    get_meal_by_name("Tacos")
+
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_by_id(1)
+    with pytest.raises(ValueError, match="Meal with name Tacos has been deleted"):
+        get_meal_by_name("Tacos")
+
+def test_clear_meals_clears_cache(meals):
+    """Test that clearing the meals empties the cache."""
+    get_meal_by_id(2)
+
+    clear_meals()
+
+    assert get_meal_cache().stats()["size"] == 0
+    with pytest.raises(ValueError, match="Meal with ID 2 not found"):
+        get_meal_by_id(2)
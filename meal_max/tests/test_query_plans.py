@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from pathlib import Path
+import re
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.models.arena_model import DEFAULT_ARENA_ID, SQLiteArena, SQLiteArenaRegistry
+from meal_max.models.leaderboard_model import get_leaderboard_index
+from meal_max.models.matchmaking_model import SQLiteMatchmakingQueue
+from meal_max.models.tournament_model import Tournament, TournamentRegistry
+from meal_max.utils.meal_cache import get_meal_cache
+from meal_max.utils.sql_utils import apply_migrations
+
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+# Statements that never read the meals table and so have no plan worth checking
+UNPLANNED_STATEMENT = re.compile(r"^\s*(INSERT|PRAGMA|BEGIN|COMMIT|ROLLBACK|CREATE|DROP|SELECT 1\b)", re.IGNORECASE)
+
+# A plan step that walks the whole table: "SCAN meals", but not "SCAN meals USING INDEX ..."
+FULL_TABLE_SCAN = re.compile(r"^SCAN \w+$")
+
+# A plan step that sorts rows after reading them: every ORDER BY here is meant to be
+# served in index order, so a lost ordering index shows up as one of these
+TEMP_BTREE_SORT = re.compile(r"^USE TEMP B-TREE FOR .*ORDER BY$")
+
+
+@pytest.fixture
+def traced_db(tmp_path, mocker):
+    """Real meals database with the migrations applied, recording every statement the kitchen model runs."""
+    conn = sqlite3.connect(str(tmp_path / "meal_max.db"))
+    conn.executescript((SQL_DIR / "create_meal_table.sql").read_text())
+    apply_migrations(conn, str(SQL_DIR / "migrations"))
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Meal {i}", "Italian", 10.0 + i, ("LOW", "MED", "HIGH")[i % 3], i % 5, i % 3) for i in range(1, 51)]
+    )
+    conn.commit()
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    @contextmanager
+    def traced_get_db_connection():
+        yield conn
+
+    mocker.patch("meal_max.models.kitchen_model.get_db_connection", traced_get_db_connection)
+    mocker.patch("meal_max.models.arena_model.get_db_connection", traced_get_db_connection)
+    mocker.patch("meal_max.models.tournament_model.get_db_connection", traced_get_db_connection)
+    mocker.patch("meal_max.models.matchmaking_model.get_db_connection", traced_get_db_connection)
+    # battles must never wait on random.org
+    mocker.patch("meal_max.utils.random_utils.fetch_random_numbers", side_effect=RuntimeError("offline"))
+    get_meal_cache().clear()
+    get_leaderboard_index().invalidate()
+    yield conn, statements
+    conn.close()
+
+def assert_no_full_table_scans(conn, statements):
+    conn.set_trace_callback(None)
+    checked = 0
+    for statement in statements:
+        if UNPLANNED_STATEMENT.match(statement):
+            continue
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+        scans = [step for step in plan if FULL_TABLE_SCAN.match(step)]
+        assert not scans, f"Full-table scan in query plan {plan} for statement: {statement}"
+        sorts = [step for step in plan if TEMP_BTREE_SORT.match(step)]
+        assert not sorts, f"Sort outside an index in query plan {plan} for statement: {statement}"
+        checked += 1
+    assert checked, "No statements were checked"
+
+
+def test_sort_outside_an_index_is_caught(traced_db):
+    """Test that a query sorted without an index fails the check even though it scans no table."""
+    conn, _ = traced_db
+    with pytest.raises(AssertionError, match="Sort outside an index"):
+        assert_no_full_table_scans(conn, ["SELECT id FROM meals WHERE id > 10 ORDER BY price"])
+
+def test_partial_indexes_need_uppercase_false(traced_db):
+    """Test that the live-meal filter must be spelled as in the index: SQLite compares FALSE by its text."""
+    conn, _ = traced_db
+    assert_no_full_table_scans(conn, ["SELECT id FROM meals WHERE deleted = FALSE ORDER BY wins DESC, battles"])
+    for spelling in ("false", "0"):
+        with pytest.raises(AssertionError):
+            assert_no_full_table_scans(conn, [f"SELECT id FROM meals WHERE deleted = {spelling} ORDER BY wins DESC, battles"])
+
+
+KITCHEN_MODEL_CALLS = {
+    "get_meal_by_id": lambda: kitchen_model.get_meal_by_id(1),
+    "get_meal_by_name": lambda: kitchen_model.get_meal_by_name("Meal 2"),
+    "get_leaderboard_wins": lambda: kitchen_model.get_leaderboard("wins"),
+    "get_leaderboard_win_pct": lambda: kitchen_model.get_leaderboard("win_pct"),
+    "get_leaderboard_page": lambda: kitchen_model.get_leaderboard("wins", limit=10, offset=10),
+    "get_meal_rank_unranked": lambda: pytest.raises(ValueError, kitchen_model.get_meal_rank, 5, "win_pct"),
+    "update_meal_stats": lambda: kitchen_model.update_meal_stats(3, "win"),
+    "record_battle_result": lambda: kitchen_model.record_battle_result(3, 6),
+    "record_battle_result_with_leaderboard": lambda: (kitchen_model.load_leaderboard(),
+                                                      kitchen_model.record_battle_result(3, 6)),
+    "create_meals": lambda: kitchen_model.create_meals(
+        [{"meal": f"Meal {i}", "cuisine": "Thai", "price": 9.5, "difficulty": "LOW"} for i in range(45, 60)],
+        chunk_size=5),
+    "get_meals_by_ids": lambda: kitchen_model.get_meals_by_ids([7, 3, 11]),
+    "record_battle_results": lambda: (kitchen_model.load_leaderboard(),
+                                      kitchen_model.record_battle_results([(3, 6), (6, 9), (9, 3)], chunk_size=2)),
+    "delete_meal": lambda: kitchen_model.delete_meal(4),
+    "get_stats_version": lambda: kitchen_model.get_stats_version(),
+}
+
+@pytest.mark.parametrize("call", KITCHEN_MODEL_CALLS.values(), ids=KITCHEN_MODEL_CALLS.keys())
+def test_kitchen_model_queries_use_indexes(traced_db, call):
+    """Test that no kitchen model query falls back to scanning the meals table."""
+    conn, statements = traced_db
+    call()
+    assert_no_full_table_scans(conn, statements)
+
+
+def sqlite_arena_battle():
+    arena = SQLiteArenaRegistry().create()
+    arena.prep_combatant(kitchen_model.get_meal_by_id(3))
+    arena.prep_combatant(kitchen_model.get_meal_by_id(6))
+    kitchen_model.load_leaderboard()
+    arena.battle()
+    return arena.get_combatants()
+
+SQLITE_ARENA_CALLS = {
+    "battle": sqlite_arena_battle,
+    "clear_combatants": lambda: SQLiteArenaRegistry().get(SQLiteArenaRegistry().create().id).clear_combatants(),
+    "default_arena": lambda: SQLiteArena(DEFAULT_ARENA_ID).get_combatants(),
+    "create_and_stats": lambda: (SQLiteArenaRegistry(max_arenas=2).create(),
+                                 SQLiteArenaRegistry(max_arenas=2).create(),
+                                 SQLiteArenaRegistry(max_arenas=1, idle_timeout=0).stats()),
+    "remove": lambda: SQLiteArenaRegistry().remove(SQLiteArenaRegistry().create().id),
+}
+
+@pytest.mark.parametrize("call", SQLITE_ARENA_CALLS.values(), ids=SQLITE_ARENA_CALLS.keys())
+def test_sqlite_arena_queries_use_indexes(traced_db, call):
+    """Test that no shared arena query scans the arena or meals tables."""
+    conn, statements = traced_db
+    call()
+    assert_no_full_table_scans(conn, statements)
+
+
+def sqlite_tournaments():
+    registry = TournamentRegistry(history=1, store="sqlite")
+    for _ in range(2):
+        tournament = Tournament([3, 6, 9, 12, 15])
+        tournament.on_progress = registry._save
+        tournament.run()
+    return TournamentRegistry(store="sqlite").get_state(tournament.id, include_rounds=True)
+
+def test_sqlite_tournament_queries_use_indexes(traced_db):
+    """Test that saving, pruning and polling shared tournaments scans no table."""
+    conn, statements = traced_db
+    sqlite_tournaments()
+    assert_no_full_table_scans(conn, statements)
+
+
+def sqlite_matchmaking():
+    queue = SQLiteMatchmakingQueue(max_gap=10)
+    queue.enqueue(list(range(1, 31, 3)))
+    queue.enqueue(list(range(2, 31, 3)))
+    queue.dequeue(2)
+    queue.dequeue(4)
+    queue.dispatch(max_battles=3)
+    return queue.stats()
+
+def test_sqlite_matchmaking_queries_use_indexes(traced_db):
+    """Test that pairing, dequeuing and dispatching through the shared queue scans no table."""
+    conn, statements = traced_db
+    assert sqlite_matchmaking()['dispatched'] == 3
+    assert_no_full_table_scans(conn, statements)
+
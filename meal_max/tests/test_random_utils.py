@@ -0,0 +1,137 @@
+import pytest
+
+from meal_max.utils import random_utils
+from meal_max.utils.random_utils import RandomPool, get_random_pool, reset_random_pool
+
+
+class DeferredThread:
+    """Stand-in for threading.Thread that queues its target; run_refills() runs the queue."""
+
+    started = []
+
+    def __init__(self, target, name=None, daemon=None):
+        self.target = target
+
+    def start(self):
+        self.started.append(self.target)
+
+def run_refills():
+    while DeferredThread.started:
+        DeferredThread.started.pop(0)()
+
+
+@pytest.fixture
+def mock_fetch(mocker):
+    """Fixture replacing the random.org request; each call returns the requested count of 0.25s."""
+    DeferredThread.started.clear()
+    mocker.patch("meal_max.utils.random_utils.threading.Thread", DeferredThread)
+    return mocker.patch("meal_max.utils.random_utils.fetch_random_numbers",
+                        side_effect=lambda num: [0.25] * num)
+
+
+##################################################
+# Pool Test Cases
+##################################################
+
+def test_take_from_prefilled_pool(mock_fetch):
+    """Test that numbers are handed out from the prefetched batch."""
+    pool = RandomPool(batch_size=10, low_water=2)
+    pool.prefill()
+    run_refills()
+
+    assert pool.take(3) == [0.25, 0.25, 0.25]
+
+    stats = pool.stats()
+    assert stats["available"] == 7
+    assert stats["hits"] == 3
+    assert stats["refills"] == 1
+    assert stats["fallbacks"] == 0
+
+def test_low_water_triggers_refill(mock_fetch):
+    """Test that dropping below the low-water mark fetches another batch."""
+    pool = RandomPool(batch_size=10, low_water=5)
+    pool.prefill()
+    run_refills()
+
+    pool.take(4)
+    run_refills()
+    assert mock_fetch.call_count == 1
+
+    pool.take(2)
+    run_refills()
+    assert mock_fetch.call_count == 2
+    assert pool.stats()["available"] == 14
+
+def test_empty_pool_falls_back_to_local_numbers(mock_fetch):
+    """Test that numbers missing from the pool come from the local generator and are counted."""
+    mock_fetch.side_effect = RuntimeError("Request to random.org timed out.")
+    pool = RandomPool(batch_size=10, low_water=2)
+
+    numbers = pool.take(5)
+    run_refills()
+
+    assert len(numbers) == 5
+    assert all(0 <= number < 1 and round(number, 2) == number for number in numbers)
+    stats = pool.stats()
+    assert stats["fallbacks"] == 5
+    assert stats["hits"] == 0
+    assert stats["refill_failures"] == 1
+
+def test_partial_fallback(mock_fetch):
+    """Test that a take larger than the pool uses what is there and falls back for the rest."""
+    pool = RandomPool(batch_size=3, low_water=0)
+    pool.prefill()
+    run_refills()
+    mock_fetch.side_effect = ValueError("Invalid response from random.org: oops")
+
+    numbers = pool.take(5)
+    run_refills()
+
+    assert numbers[:3] == [0.25, 0.25, 0.25]
+    stats = pool.stats()
+    assert stats["hits"] == 3
+    assert stats["fallbacks"] == 2
+    assert stats["refill_failures"] == 1
+
+def test_one_refill_at_a_time(mock_fetch):
+    """Test that only one refill runs at a time, and a failed one does not block the next."""
+    mock_fetch.side_effect = [RuntimeError("Request to random.org failed"), [0.5] * 4]
+    pool = RandomPool(batch_size=4, low_water=1)
+
+    pool.prefill()
+    pool.prefill()
+    assert len(DeferredThread.started) == 1
+    run_refills()
+
+    pool.prefill()
+    run_refills()
+
+    assert pool.take(1) == [0.5]
+    stats = pool.stats()
+    assert stats["refill_failures"] == 1
+    assert stats["refills"] == 1
+
+def test_unexpected_refill_error_does_not_block_refills(mock_fetch):
+    """Test that a refill failing with an unexpected error is counted and the next refill still starts."""
+    mock_fetch.side_effect = [KeyError("num"), [0.5] * 4]
+    pool = RandomPool(batch_size=4, low_water=1)
+
+    pool.prefill()
+    run_refills()
+    assert pool.stats()["refill_failures"] == 1
+
+    assert pool.take(1) != []
+    assert len(DeferredThread.started) == 1
+    run_refills()
+
+    assert pool.take(1) == [0.5]
+    assert pool.stats()["refills"] == 1
+
+def test_reset_random_pool(mock_fetch):
+    """Test that resetting the pool gives the next caller a fresh one."""
+    pool = get_random_pool()
+    reset_random_pool()
+
+    assert get_random_pool() is not pool
+    assert random_utils.get_randoms(0) == []
+    reset_random_pool()
@@ -0,0 +1,75 @@
+import pytest
+
+from meal_max.models.battle_model import BattleModel, first_combatant_wins
+from meal_max.models.kitchen_model import delete_meal, get_meals_by_ids
+from meal_max.models.simulation_model import battle_scores, simulate_battles
+
+
+def exact_win_probability(score_1: float, score_2: float) -> float:
+    # BattleModel draws one of 100 two-decimal numbers, so the odds can be counted
+    return sum(first_combatant_wins(score_1, score_2, k / 100) for k in range(100)) / 100
+
+
+##################################################
+# Simulation Test Cases
+##################################################
+
+def test_battle_scores_match_battle_model(meals):
+    """Test that the vectorized scores equal BattleModel.get_battle_score (26, 37, 62, 82)."""
+    meals_by_id = get_meals_by_ids([1, 2, 3, 4])
+    battle_model = BattleModel()
+
+    assert battle_scores(meals_by_id).tolist() == [battle_model.get_battle_score(meal) for meal in meals_by_id]
+    assert battle_scores(meals_by_id).tolist() == [26.0, 37.0, 62.0, 82.0]
+
+def test_simulation_converges_to_exact_odds(meals):
+    """Test that every simulated win probability is close to the exact odds of a battle."""
+    scores = [26.0, 37.0, 62.0, 82.0]
+
+    result = simulate_battles([1, 2, 3, 4], trials=20000, seed=7)
+
+    matrix = result['win_probability']
+    for i in range(4):
+        assert matrix[i][i] is None
+        for j in range(4):
+            if i != j:
+                assert matrix[i][j] == pytest.approx(exact_win_probability(scores[i], scores[j]), abs=0.015)
+    assert result['battles_simulated'] == 20000 * 12
+
+def test_simulation_rankings(meals):
+    """Test that meals are ranked by expected wins, the widest score gaps first."""
+    result = simulate_battles([1, 2, 3, 4], trials=2000, seed=7)
+
+    # exact expected wins are 1.21, 1.03, 0.81 and 0.81, so only the top two are certain
+    assert [meal['id'] for meal in result['rankings'][:2]] == [4, 1]
+    assert result['rankings'][0]['score'] == 82.0
+
+def test_simulation_is_reproducible_with_a_seed(meals):
+    """Test that the same seed gives the same matrix."""
+    first = simulate_battles([1, 2, 3], trials=500, seed=3)['win_probability']
+    assert simulate_battles([1, 2, 3], trials=500, seed=3)['win_probability'] == first
+
+@pytest.mark.parametrize("meal_ids, trials, error", [
+    ([1], 10, "A simulation needs at least two meals."),
+    ([1, 1], 10, "A meal can only enter a simulation once."),
+    ([1, 2], 0, "Invalid trials: 0"),
+])
+def test_invalid_simulation(meals, meal_ids, trials, error):
+    """Test errors for simulations that cannot be run."""
+    with pytest.raises(ValueError, match=error):
+        simulate_battles(meal_ids, trials=trials)
+
+def test_simulation_over_the_draw_limit(meals, mocker):
+    """Test that the limit counts trials times ordered pairs, so more meals allow fewer trials."""
+    mocker.patch("meal_max.models.simulation_model.SIMULATION_MAX_DRAWS", 1200)
+
+    assert simulate_battles([1, 2, 3, 4], trials=100)['battles_simulated'] == 1200
+    with pytest.raises(ValueError, match="would run 1212 battles; the limit is 1200"):
+        simulate_battles([1, 2, 3, 4], trials=101)
+    assert simulate_battles([1, 2], trials=600)['battles_simulated'] == 1200
+
+def test_simulation_with_deleted_meal(meals):
+    """Test that a deleted meal cannot be simulated."""
+    delete_meal(2)
+    with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+        simulate_battles([1, 2])
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils.sql_utils import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Fixture to provide a ConnectionPool on a temporary database."""
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=2, max_idle=60, timeout=0.05)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT)")
+    conn.commit()
+    pool.release(conn)
+    yield pool
+    pool.close_all()
+
+
+##################################################
+# Connection Reuse Test Cases
+##################################################
+
+def test_connection_is_reused(pool):
+    """Test that a released connection is handed out again."""
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+
+    stats = pool.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+    assert stats["in_use"] == 1
+
+def test_invalid_pool_size(tmp_path):
+    """Test error when creating a pool that can hold no connections."""
+    with pytest.raises(ValueError, match="Invalid pool size: 0"):
+        ConnectionPool(str(tmp_path / "test.db"), max_size=0)
+
+def test_unhealthy_connection_is_replaced(pool):
+    """Test that a pooled connection failing the health check is discarded on checkout."""
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    replacement = pool.acquire()
+
+    assert replacement is not conn
+    assert replacement.execute("SELECT COUNT(*) FROM meals").fetchone()[0] == 0
+    assert pool.stats()["health_check_failures"] == 1
+
+def test_release_rolls_back_open_transaction(pool):
+    """Test that an uncommitted change is rolled back before the connection is reused."""
+    conn = pool.acquire()
+    conn.execute("INSERT INTO meals (meal) VALUES ('Pizza')")
+    assert conn.in_transaction
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0] == 0
+    pool.release(conn)
+
+def test_release_discard_closes_connection(pool):
+    """Test that a discarded connection is closed and not handed out again."""
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.stats()["idle"] == 0
+
+
+##################################################
+# Eviction and Timeout Test Cases
+##################################################
+
+def test_idle_connections_expire(pool, mocker):
+    """Test that connections idle for longer than max_idle are closed on the next checkout."""
+    mock_time = mocker.patch("meal_max.utils.sql_utils.time.monotonic", return_value=100.0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    mock_time.return_value = 161.0
+    fresh = pool.acquire()
+
+    assert fresh is not conn
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.stats()["evictions"] == 1
+
+def test_acquire_times_out_when_exhausted(pool):
+    """Test error when every connection is in use for longer than the timeout."""
+    held = [pool.acquire(), pool.acquire()]
+
+    with pytest.raises(sqlite3.OperationalError, match="Timed out waiting for a database connection"):
+        pool.acquire()
+    assert pool.stats()["in_use"] == 2
+
+    for conn in held:
+        pool.release(conn)
+
+def test_waiting_acquire_gets_released_connection(tmp_path):
+    """Test that a thread waiting on a full pool is handed the next released connection."""
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=1, timeout=5)
+    conn = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    pool.release(conn)
+    waiter.join(timeout=5)
+
+    assert acquired == [conn]
+    pool.release(conn)
+    pool.close_all()
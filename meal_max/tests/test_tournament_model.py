@@ -0,0 +1,171 @@
+import pytest
+
+from meal_max.models.kitchen_model import create_meal, delete_meal, record_battle_results
+from meal_max.models.tournament_model import Tournament, TournamentRegistry
+
+
+@pytest.fixture
+def second_wins(mocker):
+    """Fixture making every battle go to the second combatant (no score gap beats 0.99)."""
+    return mocker.patch("meal_max.models.tournament_model.get_randoms", side_effect=lambda count: [0.99] * count)
+
+@pytest.fixture
+def five_meals(meals):
+    """Fixture adding a fifth meal (id 5, score 91) to the four from conftest."""
+    create_meal("Paella", "Spanish", 13.0, "LOW")
+    return meals
+
+def stats(fetch_all):
+    return {meal_id: (battles, wins) for meal_id, battles, wins in fetch_all("SELECT id, battles, wins FROM meals")}
+
+def fought(tournament):
+    return [(battle['winner_id'], battle['loser_id']) for battle in sum(tournament.rounds, [])]
+
+
+##################################################
+# Bracket Test Cases
+##################################################
+
+def test_single_elimination(meals, second_wins, fetch_all):
+    """Test that a power-of-two bracket plays n - 1 battles over log2(n) rounds."""
+    tournament = Tournament([1, 2, 3, 4])
+    tournament.run()
+
+    assert tournament.status == "completed"
+    assert fought(tournament) == [(2, 1), (4, 3), (4, 2)]
+    assert tournament.battles_played == tournament.total_battles == 3
+    assert len(tournament.rounds) == 2
+    assert [meal['id'] for meal in tournament.standings] == [4, 2, 1, 3]
+    assert tournament.champion == {'id': 4, 'meal': "Curry", 'wins': 2}
+    assert stats(fetch_all) == {1: (1, 0), 2: (2, 1), 3: (1, 0), 4: (2, 2)}
+
+def test_single_elimination_rotates_byes(five_meals, second_wins):
+    """Test that the bye moves on each round instead of carrying the last seed to the final."""
+    tournament = Tournament([1, 2, 3, 4, 5])
+    tournament.run()
+
+    # round 1: 5 sits out; round 2: 5 has had its bye, so 4 sits out
+    assert [[(b['winner_id'], b['loser_id']) for b in r] for r in tournament.rounds] == [
+        [(2, 1), (4, 3)],
+        [(5, 2)],
+        [(5, 4)],
+    ]
+    assert tournament.battles_played == tournament.total_battles == 4
+    assert [meal['id'] for meal in tournament.standings] == [5, 4, 2, 1, 3]
+
+def test_round_robin(meals, second_wins, fetch_all):
+    """Test that round robin fights every pair once and ranks by wins."""
+    tournament = Tournament([1, 2, 3, 4], format="round_robin")
+    tournament.run()
+
+    assert tournament.battles_played == tournament.total_battles == 6
+    assert len(tournament.rounds) == 1
+    assert [(meal['id'], meal['wins']) for meal in tournament.standings] == [(4, 3), (3, 2), (2, 1), (1, 0)]
+    assert stats(fetch_all) == {1: (3, 0), 2: (3, 1), 3: (3, 2), 4: (3, 3)}
+
+def test_chunks_are_drawn_and_recorded_separately(meals, second_wins, mocker, fetch_all):
+    """Test that each chunk of a round gets its own random draw and commit."""
+    mocker.patch("meal_max.models.tournament_model.TOURNAMENT_CHUNK_SIZE", 4)
+    progress = []
+    tournament = Tournament([1, 2, 3, 4], format="round_robin")
+    tournament.on_progress = lambda t: progress.append(t.battles_played)
+    tournament.run()
+
+    assert [call.args for call in second_wins.call_args_list] == [(4,), (2,)]
+    assert progress == [0, 4, 6, 6]
+    assert stats(fetch_all)[4] == (3, 3)
+
+@pytest.mark.parametrize("meal_ids, format, error", [
+    ([1], "single_elimination", "A tournament needs at least two meals."),
+    ([1, 1], "round_robin", "A meal can only enter a tournament once."),
+    ([1, 2], "swiss", "Invalid tournament format: swiss"),
+])
+def test_invalid_tournament(meal_ids, format, error):
+    """Test errors for brackets that cannot be played."""
+    with pytest.raises(ValueError, match=error):
+        Tournament(meal_ids, format)
+
+def test_tournament_with_deleted_meal_fails(meals, second_wins, fetch_all):
+    """Test that a tournament with a deleted meal fails before any battle is recorded."""
+    delete_meal(3)
+    tournament = Tournament([1, 2, 3, 4])
+    tournament.run()
+
+    assert tournament.status == "failed"
+    assert tournament.error == "Meal with ID 3 has been deleted"
+    assert tournament.battles_played == 0
+    assert all(row == (0, 0) for row in stats(fetch_all).values())
+
+
+##################################################
+# Bulk Result Test Cases
+##################################################
+
+def test_record_battle_results_aggregates(meals, fetch_all):
+    """Test that repeated meals within and across chunks are summed."""
+    record_battle_results([(1, 2), (1, 3), (2, 1), (4, 1), (1, 4)], chunk_size=2)
+
+    assert stats(fetch_all) == {1: (5, 3), 2: (2, 1), 3: (1, 0), 4: (2, 1)}
+
+def test_record_battle_results_keeps_committed_chunks(meals, fetch_all):
+    """Test that a failing chunk is rolled back while the chunks before it are kept."""
+    delete_meal(3)
+
+    with pytest.raises(ValueError, match="Meal with ID 3 has been deleted"):
+        record_battle_results([(1, 2), (4, 1), (2, 4), (3, 1), (2, 1)], chunk_size=2)
+
+    assert stats(fetch_all) == {1: (2, 1), 2: (1, 0), 3: (0, 0), 4: (1, 1)}
+
+def test_record_battle_results_invalid_chunk_size(meals):
+    """Test error on a chunk size that is not positive."""
+    with pytest.raises(ValueError, match="Invalid chunk size: 0"):
+        record_battle_results([(1, 2)], chunk_size=0)
+
+
+##################################################
+# Shared Registry Test Cases
+##################################################
+
+def run_saved(registry, meal_ids, format="single_elimination"):
+    # what TournamentRegistry.start does, minus the background thread
+    tournament = Tournament(meal_ids, format)
+    tournament.on_progress = registry._save
+    registry._save(tournament)
+    tournament.run()
+    return tournament
+
+def test_sqlite_state_is_shared(five_meals, second_wins, fetch_all):
+    """Test that another worker's registry serves the same state, rounds rebuilt from battle rows."""
+    tournament = run_saved(TournamentRegistry(store="sqlite"), [1, 2, 3, 4, 5])
+
+    other_worker = TournamentRegistry(store="sqlite")
+    assert other_worker.get_state(tournament.id, include_rounds=True) == tournament.to_dict(include_rounds=True)
+    assert other_worker.get_state(tournament.id) == tournament.to_dict()
+    assert fetch_all("SELECT COUNT(*) FROM tournament_battles") == [(4,)]
+    assert "rounds" not in fetch_all("SELECT state FROM tournaments")[0][0]
+
+def test_sqlite_saves_only_new_battles(meals, second_wins, mocker, fetch_all):
+    """Test that each progress save appends the chunk just fought rather than rewriting every round."""
+    mocker.patch("meal_max.models.tournament_model.TOURNAMENT_CHUNK_SIZE", 2)
+    registry = TournamentRegistry(store="sqlite")
+    inserted = []
+    save = registry._save
+    registry._save = lambda t: (inserted.append(len(t.battles_since(registry._saved_battles.get(t.id, 0)))), save(t))
+
+    tournament = run_saved(registry, [1, 2, 3, 4], format="round_robin")
+
+    assert inserted == [0, 0, 2, 2, 2, 0]
+    assert fetch_all("SELECT seq, round FROM tournament_battles ORDER BY seq") == [(i, 0) for i in range(6)]
+    assert tournament.id not in registry._saved_battles
+
+def test_sqlite_history_is_pruned_with_battles(meals, second_wins, fetch_all):
+    """Test that only the most recent tournaments and their battles are kept."""
+    registry = TournamentRegistry(history=1, store="sqlite")
+    first = run_saved(registry, [1, 2])
+    second = run_saved(registry, [3, 4])
+
+    assert fetch_all("SELECT id FROM tournaments") == [(second.id,)]
+    assert fetch_all("SELECT DISTINCT tournament_id FROM tournament_battles") == [(second.id,)]
+    with pytest.raises(ValueError, match=f"Tournament {first.id} not found"):
+        TournamentRegistry(store="sqlite").get_state(first.id)
+
@@ -1,9 +1,23 @@
+import atexit
+import json
+import os
+from typing import Iterator, Optional
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 
 from music_collection.models import song_model
-from music_collection.models.playlist_model import PlaylistModel
-from music_collection.utils.sql_utils import check_database_connection, check_table_exists
+from music_collection.models.song_ingest import ingest_songs, parse_stream
+from music_collection.models.playlist_store import create_playlist_model
+from music_collection.utils.random_utils import get_random_stats
+from music_collection.utils.sql_utils import (
+    apply_migrations,
+    check_database_connection,
+    check_table_exists,
+    checkpoint_wal,
+    get_connection_manager,
+    reset_connection_manager
+)
 
 
 # Load environment variables from .env file
@@ -11,7 +25,20 @@ load_dotenv()
 
 app = Flask(__name__)
 
-playlist_model = PlaylistModel()
+# PLAYLIST_STORE=sqlite shares the playlist between worker processes (see gunicorn.conf.py)
+playlist_model = create_playlist_model(backend=os.getenv("PLAYLIST_BACKEND", "list"))
+
+# Close the pooled database connections when the process exits
+atexit.register(reset_connection_manager)
+
+# Write any buffered play counts before the connections are closed (atexit runs in reverse order)
+atexit.register(song_model.shutdown_play_count_buffer)
+
+# Bring the schema (indexes) up to date before serving requests
+try:
+    apply_migrations()
+except Exception as e:
+    app.logger.error("Could not apply database migrations: %s", str(e))
 
 
 ####################################################
@@ -54,6 +81,62 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/db-stats', methods=['GET'])
+def db_stats() -> Response:
+    """
+    Route to get the connection manager's counters, active pragma profile and song cache metrics.
+
+    Returns:
+        JSON response with the opened/reused/closed connection counts, pragmas and song cache hits/misses/evictions.
+    """
+    app.logger.info('Retrieving database connection stats')
+    stats = get_connection_manager().get_stats()
+    if song_model.play_count_buffer is not None:
+        stats['play_count_buffer'] = song_model.play_count_buffer.get_stats()
+    stats['song_cache'] = song_model.song_cache.get_stats()
+    return make_response(jsonify({'status': 'success', 'stats': stats}), 200)
+
+
+@app.route('/api/random-stats', methods=['GET'])
+def random_stats() -> Response:
+    """
+    Route to get the random.org latency histogram and circuit breaker state.
+
+    Returns:
+        JSON response with the latency buckets, the breaker state and the local fallback count.
+    """
+    app.logger.info('Retrieving random.org stats')
+    return make_response(jsonify({'status': 'success', 'random': get_random_stats()}), 200)
+
+
+@app.route('/api/db-checkpoint', methods=['POST'])
+def db_checkpoint() -> Response:
+    """
+    Route to run a WAL checkpoint. Only available when the database runs in WAL mode.
+
+    Expected JSON Input (optional):
+        - mode (str): The checkpoint mode (PASSIVE, FULL, RESTART, TRUNCATE). Default is PASSIVE.
+
+    Returns:
+        JSON response with the number of log frames and checkpointed frames.
+    Raises:
+        400 error if the database is not in WAL mode or the mode is invalid.
+        500 error if the checkpoint fails.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'PASSIVE')
+        app.logger.info('Running %s WAL checkpoint', mode)
+        result = checkpoint_wal(mode)
+        return make_response(jsonify({'status': 'success', 'checkpoint': result}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid checkpoint request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error running checkpoint: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 ##########################################################
 #
 # Song Management
@@ -100,6 +183,45 @@ def add_song() -> Response:
         app.logger.error("Failed to add song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/ingest-songs', methods=['POST'])
+def ingest_songs_route() -> Response:
+    """
+    Route to bulk load songs into the catalog from a streamed request body.
+
+    Expected Input, chosen by Content-Type:
+        - text/csv: a header row naming artist, title, year, genre and duration, then one song per row.
+        - application/x-ndjson: one JSON object with those fields per line.
+
+    Query Parameters:
+        - chunk_size (int, optional): The number of rows inserted per transaction.
+
+    Returns:
+        JSON response with the number of rows read, inserted, ignored as duplicates
+        and invalid, the first errors by row number, and the rows per second.
+    Raises:
+        400 error if the content type or chunk size is not supported.
+        500 error if there is an issue inserting the songs.
+    """
+    app.logger.info('Ingesting songs into the catalog')
+    fmt = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}.get(request.mimetype)
+    if fmt is None:
+        return make_response(jsonify({'error': f'Unsupported content type: {request.mimetype}'}), 400)
+
+    chunk_size = request.args.get('chunk_size', type=int)
+    try:
+        if chunk_size is None:
+            result = ingest_songs(parse_stream(request.stream, fmt))
+        else:
+            result = ingest_songs(parse_stream(request.stream, fmt), chunk_size)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to ingest songs: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+    app.logger.info("Ingested %d of %d songs", result['inserted'], result['rows'])
+    return make_response(jsonify({'status': 'success', **result}), 201)
+
 @app.route('/api/clear-catalog', methods=['DELETE'])
 def clear_catalog() -> Response:
     """
@@ -136,6 +258,51 @@ def delete_song(song_id: int) -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+def _int_arg(name: str) -> Optional[int]:
+    """
+    Reads an optional integer query parameter.
+
+    Args:
+        name (str): The query parameter.
+
+    Returns:
+        Optional[int]: The value, or None when the parameter is absent.
+
+    Raises:
+        ValueError: If the parameter is present but not an integer.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value} (must be an integer).")
+
+def _ndjson_lines(first: Optional[dict], songs: Iterator[dict]) -> Iterator[str]:
+    """
+    Serializes a song stream one JSON object per line.
+
+    The 200 status has been sent by the time later rows are read, so a failure
+    part-way ends the body with an {"error": ...} line instead.
+
+    Args:
+        first (Optional[dict]): The first song, already read, or None for an empty stream.
+        songs (Iterator[dict]): The rest of the songs.
+
+    Yields:
+        str: One line of NDJSON.
+    """
+    if first is None:
+        return
+    yield json.dumps(first) + "\n"
+    try:
+        for song in songs:
+            yield json.dumps(song) + "\n"
+    except Exception as e:
+        app.logger.error(f"Error while streaming songs: {e}")
+        yield json.dumps({'error': str(e)}) + "\n"
+
 @app.route('/api/get-all-songs-from-catalog', methods=['GET'])
 def get_all_songs() -> Response:
     """
@@ -143,18 +310,54 @@ def get_all_songs() -> Response:
 
     Query Parameter:
         - sort_by_play_count (bool, optional): If true, sort songs by play count.
+        - limit (int, optional): Return at most this many songs, plus a cursor for the next page.
+        - after_id (int, optional): The ID from the previous page's next_cursor.
+        - after_play_count (int, optional): The play count from the previous page's next_cursor.
+        - format (str, optional): 'ndjson' to stream one song per line instead of a single JSON document.
+          limit and the cursor apply to the stream too; the next cursor is the last song streamed.
 
     Returns:
-        JSON response with the list of songs or error message.
+        JSON response with the list of songs (and next_cursor when paginated), an NDJSON stream, or error message.
+    Raises:
+        400 error if a parameter is invalid.
+        500 error if the songs cannot be read. A stream that fails after it started ends with an error line.
     """
     try:
         # Extract query parameter for sorting by play count
         sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
-
-        app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
-        songs = song_model.get_all_songs(sort_by_play_count=sort_by_play_count)
-
-        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+        limit = _int_arg('limit')
+        after_id = _int_arg('after_id')
+        after_play_count = _int_arg('after_play_count')
+        response_format = request.args.get('format', 'json')
+        if response_format not in ('json', 'ndjson'):
+            raise ValueError(f"Invalid format: {response_format} (must be 'json' or 'ndjson').")
+
+        if response_format == 'ndjson':
+            app.logger.info("Streaming songs from the catalog, sort_by_play_count=%s, limit=%s, after_id=%s",
+                            sort_by_play_count, limit, after_id)
+            songs = song_model.iter_songs(sort_by_play_count=sort_by_play_count, limit=limit,
+                                          after_id=after_id, after_play_count=after_play_count)
+            # read the first row here, so a bad cursor or a failing query still gets a 400 or 500
+            first = next(songs, None)
+            return Response(stream_with_context(_ndjson_lines(first, songs)), mimetype='application/x-ndjson')
+
+        app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s, limit=%s, after_id=%s",
+                        sort_by_play_count, limit, after_id)
+        songs = song_model.get_all_songs(sort_by_play_count=sort_by_play_count, limit=limit,
+                                         after_id=after_id, after_play_count=after_play_count)
+
+        if limit is None:
+            return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+
+        next_cursor = None
+        if len(songs) == limit:
+            next_cursor = {'after_id': songs[-1]['id']}
+            if sort_by_play_count:
+                next_cursor['after_play_count'] = songs[-1]['play_count']
+        return make_response(jsonify({'status': 'success', 'songs': songs, 'next_cursor': next_cursor}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid song listing request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
         app.logger.error(f"Error retrieving songs: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -399,14 +602,14 @@ def play_entire_playlist() -> Response:
     Route to play all songs in the playlist.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response indicating success of the operation and the IDs of deleted songs whose play count was skipped.
     Raises:
         500 error if there is an issue playing the playlist.
     """
     try:
         app.logger.info('Playing entire playlist')
-        playlist_model.play_entire_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        skipped_song_ids = playlist_model.play_entire_playlist()
+        return make_response(jsonify({'status': 'success', 'skipped_song_ids': skipped_song_ids}), 200)
     except Exception as e:
         app.logger.error(f"Error playing playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -417,14 +620,14 @@ def play_rest_of_playlist() -> Response:
     Route to play the rest of the playlist from the current track.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response indicating success of the operation and the IDs of deleted songs whose play count was skipped.
     Raises:
         500 error if there is an issue playing the rest of the playlist.
     """
     try:
         app.logger.info('Playing rest of the playlist')
-        playlist_model.play_rest_of_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        skipped_song_ids = playlist_model.play_rest_of_playlist()
+        return make_response(jsonify({'status': 'success', 'skipped_song_ids': skipped_song_ids}), 200)
     except Exception as e:
         app.logger.error(f"Error playing rest of the playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -538,6 +741,29 @@ def get_playlist_length_and_duration() -> Response:
         app.logger.error(f"Error retrieving playlist length and duration: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/get-remaining-duration', methods=['GET'])
+def get_remaining_duration() -> Response:
+    """
+    Route to retrieve the duration from the start of the current track to the end of the playlist.
+
+    Returns:
+        JSON response with the current track number and the remaining duration or error message.
+    """
+    try:
+        app.logger.info("Retrieving remaining playlist duration")
+        remaining_duration = playlist_model.get_remaining_duration()
+        return make_response(jsonify({
+            'status': 'success',
+            'current_track_number': playlist_model.current_track_number,
+            'remaining_duration': remaining_duration
+        }), 200)
+    except ValueError as e:
+        app.logger.error(f"Error retrieving remaining duration: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error retrieving remaining duration: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/go-to-track-number/<int:track_number>', methods=['POST'])
 def go_to_track_number(track_number: int) -> Response:
     """
@@ -563,6 +789,32 @@ def go_to_track_number(track_number: int) -> Response:
         app.logger.error(f"Error going to track number: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/go-to-time-offset/<int:offset>', methods=['POST'])
+def go_to_time_offset(offset: int) -> Response:
+    """
+    Route to set the playlist to the track playing at a time offset from the start of the playlist.
+
+    Path Parameter:
+        - offset (int): The number of seconds from the start of the playlist.
+
+    Returns:
+        JSON response with the new track number and the position within it, or an error message.
+    """
+    try:
+        app.logger.info(f"Going to time offset: {offset}")
+        seconds_into_track = playlist_model.go_to_time_offset(offset)
+        return make_response(jsonify({
+            'status': 'success',
+            'track_number': playlist_model.current_track_number,
+            'seconds_into_track': seconds_into_track
+        }), 200)
+    except ValueError as e:
+        app.logger.error(f"Error going to time offset {offset}: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error going to time offset: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 ############################################################
 #
 # Arrange Playlist
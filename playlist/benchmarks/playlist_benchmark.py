@@ -0,0 +1,138 @@
+"""
+Benchmarks PlaylistModel's lookups and reordering.
+
+Run from the playlist directory:
+
+    python -m benchmarks.playlist_benchmark [--size 100000] [--ops 1000] [--reorder-size 1000000] [--reorder-ops 100]
+
+The first part compares the ID index with the linear scans it replaced. The
+linear baseline re-implements the old list comprehension membership checks
+and lookups. Building a playlist that way is quadratic, so its cost at the full
+size is measured on a sample of operations and reported per operation.
+
+The second part compares the "list" and "tree" backends on moves and removals
+in a very large playlist.
+"""
+import argparse
+import logging
+import random
+import time
+from typing import Callable, List
+
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.song_model import Song
+
+
+def make_songs(count: int) -> List[Song]:
+    return [Song(i, f"Artist {i}", f"Song {i}", 2000, "Pop", 180) for i in range(1, count + 1)]
+
+
+class LinearPlaylist:
+    """
+    The playlist lookups as they were before the ID index: every check scans the list.
+    """
+
+    def __init__(self, songs: List[Song]):
+        self.playlist = list(songs)
+
+    def add_song_to_playlist(self, song: Song) -> None:
+        if song.id in [song_in_playlist.id for song_in_playlist in self.playlist]:
+            raise ValueError(f"Song with ID {song.id} already exists in the playlist")
+        self.playlist.append(song)
+
+    def get_song_by_song_id(self, song_id: int) -> Song:
+        if song_id not in [song_in_playlist.id for song_in_playlist in self.playlist]:
+            raise ValueError(f"Song with id {song_id} not found in playlist")
+        return next((song for song in self.playlist if song.id == song_id), None)
+
+    def swap_songs_in_playlist(self, song1_id: int, song2_id: int) -> None:
+        song1 = self.get_song_by_song_id(song1_id)
+        song2 = self.get_song_by_song_id(song2_id)
+        index1 = self.playlist.index(song1)
+        index2 = self.playlist.index(song2)
+        self.playlist[index1], self.playlist[index2] = self.playlist[index2], self.playlist[index1]
+
+
+def per_op(label: str, ops: int, run: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    micros = elapsed / ops * 1e6
+    print(f"  {label:<28} {micros:12.2f} us/op")
+    return micros
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="number of tracks in the playlist")
+    parser.add_argument("--ops", type=int, default=1_000, help="number of sampled operations")
+    parser.add_argument("--reorder-size", type=int, default=1_000_000, help="number of tracks for the reorder comparison")
+    parser.add_argument("--reorder-ops", type=int, default=100, help="number of sampled reorder operations")
+    args = parser.parse_args()
+
+    # the model logs every operation at INFO
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+    songs = make_songs(args.size + args.ops)
+    base, extra = songs[:args.size], songs[args.size:]
+    ids = [rng.randint(1, args.size) for _ in range(args.ops)]
+
+    print(f"Playlist of {args.size} tracks, {args.ops} sampled operations")
+
+    indexed = PlaylistModel()
+    start = time.perf_counter()
+    for song in base:
+        indexed.add_song_to_playlist(song)
+    print(f"  {'indexed: build playlist':<28} {time.perf_counter() - start:12.3f} s total")
+
+    linear = LinearPlaylist(base)
+
+    results = {}
+    for name, model in (("indexed", indexed), ("linear", linear)):
+        results[name] = [
+            per_op(f"{name}: add song", args.ops,
+                   lambda: [model.add_song_to_playlist(song) for song in extra]),
+            per_op(f"{name}: get song by id", args.ops,
+                   lambda: [model.get_song_by_song_id(song_id) for song_id in ids]),
+            per_op(f"{name}: swap songs", args.ops,
+                   lambda: [model.swap_songs_in_playlist(a, b) for a, b in zip(ids, reversed(ids)) if a != b]),
+        ]
+
+    print("Speedup (linear / indexed):")
+    for label, linear_us, indexed_us in zip(("add", "get", "swap"), results["linear"], results["indexed"]):
+        print(f"  {label:<28} {linear_us / indexed_us:12.0f}x")
+    projected = results["linear"][0] * args.size / 2 / 1e6
+    print(f"Projected linear build time for {args.size} tracks: ~{projected:.0f} s")
+
+    reorder_benchmark(args.reorder_size, args.reorder_ops)
+
+
+def reorder_benchmark(size: int, ops: int) -> None:
+    rng = random.Random(1)
+    songs = make_songs(size)
+    ids = rng.sample(range(1, size + 1), ops)
+    tracks = [rng.randint(1, size - ops) for _ in range(ops)]
+
+    print(f"Reordering a playlist of {size} tracks, {ops} sampled operations")
+    results = {}
+    for backend in ("list", "tree"):
+        model = PlaylistModel(backend=backend)
+        start = time.perf_counter()
+        model.playlist.extend(songs)
+        print(f"  {backend + ': build playlist':<28} {time.perf_counter() - start:12.3f} s total")
+        results[backend] = [
+            per_op(f"{backend}: move to beginning", ops,
+                   lambda: [model.move_song_to_beginning(song_id) for song_id in ids]),
+            per_op(f"{backend}: move to track number", ops,
+                   lambda: [model.move_song_to_track_number(song_id, track) for song_id, track in zip(ids, tracks)]),
+            per_op(f"{backend}: remove by track number", ops,
+                   lambda: [model.remove_song_by_track_number(track) for track in tracks]),
+        ]
+
+    print("Speedup (list / tree):")
+    for label, list_us, tree_us in zip(("move to beginning", "move to track", "remove by track"), results["list"], results["tree"]):
+        print(f"  {label:<28} {list_us / tree_us:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
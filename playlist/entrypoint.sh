@@ -13,5 +13,10 @@ else
     echo "Skipping database creation."
 fi
 
-# Start the Python application
-exec python app.py
+# Start the application: gunicorn with the settings in gunicorn.conf.py, or the
+# Flask development server when DEV_SERVER is true
+if [ "$DEV_SERVER" = "true" ]; then
+    exec python app.py
+else
+    exec gunicorn app:app
+fi
@@ -0,0 +1,33 @@
+"""
+Production server settings for the playlist service.
+
+    gunicorn app:app
+
+The app is imported once in the master process (preload_app), which applies the
+migrations, and then forked into GUNICORN_WORKERS worker processes. The playlist
+is kept in the shared SQLite state store instead of process memory, so every
+worker serves the same playlist and current track. The song cache and the live
+song IDs stay per worker, so their TTLs are kept short.
+"""
+import multiprocessing
+import os
+
+# must be set before the app is preloaded
+os.environ.setdefault("PLAYLIST_STORE", "sqlite")
+# bound how long a worker can serve a song that another worker deleted
+os.environ.setdefault("SONG_CACHE_TTL", "5")
+os.environ.setdefault("LIVE_SONG_IDS_TTL", "5")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    # SQLite connections must not cross a fork: close the ones preloading opened so
+    # each worker opens its own
+    from music_collection.utils.sql_utils import reset_connection_manager
+    reset_connection_manager()
@@ -0,0 +1,227 @@
+from collections import Counter
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import get_db_connection, retry_on_busy
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+T = TypeVar("T")
+
+
+class PlayCountBuffer:
+    """
+    Coalesces play count increments in memory and writes them in batches.
+
+    Increments are summed per song ID and flushed in a single executemany
+    transaction once `max_pending` plays are buffered or every `flush_interval`
+    seconds, whichever comes first. Deleted songs are skipped at flush time.
+
+    Attributes:
+        max_pending (int): The number of buffered plays that triggers a flush.
+        flush_interval (float): The maximum number of seconds a play stays buffered.
+    """
+
+    def __init__(self, max_pending: int = 500, flush_interval: float = 5.0):
+        """
+        Initializes an empty buffer. The background flusher starts on the first play.
+
+        Args:
+            max_pending (int, optional): The number of buffered plays that triggers a flush.
+            flush_interval (float, optional): The background flush interval in seconds.
+        """
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+
+        self._pending: Counter = Counter()
+        self._pending_total = 0
+        self._cond = threading.Condition()
+        self._flushing = False
+        self._epoch = 0
+        self._flush_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {"plays": 0, "flushes": 0, "rows_written": 0, "rows_skipped": 0, "flush_errors": 0}
+
+    ##################################################
+    # Write Path
+    ##################################################
+
+    def add(self, song_id: int, count: int = 1) -> None:
+        """
+        Buffers play count increments for a song, flushing if the buffer is full.
+
+        Args:
+            song_id (int): The ID of the song that was played.
+            count (int, optional): The number of plays. Defaults to 1.
+        """
+        with self._cond:
+            self._pending[song_id] += count
+            self._pending_total += count
+            self.stats["plays"] += count
+            full = self._pending_total >= self.max_pending
+
+        self._ensure_flusher()
+        if full:
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # already logged, the play stays buffered and the next flush retries it
+                pass
+
+    def flush(self) -> int:
+        """
+        Writes all buffered increments in one transaction.
+
+        If the write fails the increments are put back so the next flush retries them.
+
+        Returns:
+            int: The number of song rows updated.
+        """
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, Counter()
+                self._pending_total = 0
+                # readers that merge pending deltas wait until this write is visible
+                self._flushing = True
+                self._epoch += 1
+
+            try:
+                updated = self._write(batch)
+            except sqlite3.Error as e:
+                logger.error("Failed to flush %d buffered play counts: %s", len(batch), str(e))
+                with self._cond:
+                    self._pending.update(batch)
+                    self._pending_total += sum(batch.values())
+                    self.stats["flush_errors"] += 1
+                raise
+            finally:
+                with self._cond:
+                    self._flushing = False
+                    self._epoch += 1
+                    self._cond.notify_all()
+
+            with self._cond:
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += updated
+                self.stats["rows_skipped"] += len(batch) - updated
+
+            if updated < len(batch):
+                logger.warning("Skipped play counts for %d deleted or missing songs", len(batch) - updated)
+            logger.info("Flushed buffered play counts for %d songs", updated)
+            return updated
+
+    @retry_on_busy
+    def _write(self, batch: Dict[int, int]) -> int:
+        """
+        Applies a batch of increments, ignoring songs that are deleted or missing.
+
+        Args:
+            batch (dict): The play count increment per song ID.
+
+        Returns:
+            int: The number of song rows updated.
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE songs SET play_count = play_count + ? WHERE id = ? AND deleted = FALSE",
+                [(count, song_id) for song_id, count in batch.items()]
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    ##################################################
+    # Read Path
+    ##################################################
+
+    def pending(self) -> Dict[int, int]:
+        """
+        Returns a copy of the buffered increments per song ID.
+        """
+        with self._cond:
+            return dict(self._pending)
+
+    def read_consistent(self, read: Callable[[], T]) -> Tuple[T, Dict[int, int]]:
+        """
+        Runs a database read and returns it with the increments it does not include yet.
+
+        The read is retried if a flush starts or finishes while it runs, so a
+        buffered play is never counted twice or dropped.
+
+        Args:
+            read (Callable): The function that reads from the database.
+
+        Returns:
+            tuple: The read's result and the pending increments to add to it.
+        """
+        while True:
+            with self._cond:
+                while self._flushing:
+                    self._cond.wait()
+                epoch = self._epoch
+                deltas = dict(self._pending)
+
+            result = read()
+
+            with self._cond:
+                if self._epoch == epoch:
+                    return result, deltas
+            logger.debug("Play counts were flushed during a read, retrying")
+
+    ##################################################
+    # Background Flushing
+    ##################################################
+
+    def _ensure_flusher(self) -> None:
+        """
+        Starts the background flush thread if it is not running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="play-count-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """
+        Flushes the buffer every flush_interval seconds until stopped.
+        """
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # already logged, the increments stay buffered for the next attempt
+                pass
+
+    def shutdown(self) -> None:
+        """
+        Stops the background flusher and writes anything still buffered.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+        self.flush()
+        logger.info("Play count buffer shut down")
+
+    def get_stats(self) -> dict:
+        """
+        Returns the buffer's counters and the number of plays still pending.
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending_plays"] = self._pending_total
+            stats["pending_songs"] = len(self._pending)
+        return stats
@@ -0,0 +1,616 @@
+from collections.abc import MutableSequence
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from music_collection.models.song_model import Song
+
+
+class _FenwickTree:
+    """
+    A Fenwick (binary indexed) tree of song durations: prefix sums and point updates in O(log n).
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        # tree[i] holds the sum of the (i & -i) values ending at position i (1-indexed)
+        self._tree = [0]
+        self._tree.extend(values)
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def prefix_sum(self, count: int) -> int:
+        """
+        Returns the sum of the first `count` values.
+        """
+        total = 0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def add(self, index: int, delta: int) -> None:
+        """
+        Adds delta to the value at the 0-based index.
+        """
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def append(self, value: int) -> None:
+        i = len(self._tree)
+        self._tree.append(value + self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i)))
+
+    def pop(self) -> None:
+        # no other entry covers the last position, so dropping it keeps the rest valid
+        self._tree.pop()
+
+    def search(self, offset: int) -> int:
+        """
+        Returns the 0-based index of the value that contains `offset`, i.e. the smallest
+        index whose prefix sum including itself is greater than offset.
+        """
+        index = 0
+        step = 1 << len(self).bit_length()
+        while step:
+            next_index = index + step
+            if next_index <= len(self) and self._tree[next_index] <= offset:
+                index = next_index
+                offset -= self._tree[next_index]
+            step >>= 1
+        return index
+
+
+class IndexedSongList(list):
+    """
+    A list of songs that also keeps a hash index from song ID to song and position.
+
+    It behaves like a plain list, so code that reads or mutates the playlist
+    directly keeps working, but membership checks and lookups by song ID are O(1).
+    The ID-to-song index and the total duration are updated on every mutation.
+    The ID-to-position index and a Fenwick tree of durations (for time-offset
+    queries) are updated in place by appends, pops from the end and swaps; any
+    mutation that shifts positions drops them, and they are rebuilt on the next query.
+    """
+
+    def __init__(self, songs: Iterable[Song] = ()):
+        """
+        Initializes the list with the given songs.
+
+        Args:
+            songs (Iterable[Song], optional): The initial songs.
+        """
+        super().__init__(songs)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """
+        Rebuilds the ID-to-song index and drops the position index.
+        """
+        self._by_id: Dict[int, Song] = {song.id: song for song in self}
+        self._positions: Optional[Dict[int, int]] = None
+        self._durations: Optional[_FenwickTree] = None
+        self._total_duration = sum(song.duration for song in self)
+
+    def _drop_positional_indexes(self) -> None:
+        self._positions = None
+        self._durations = None
+
+    ##################################################
+    # Lookups by Song ID
+    ##################################################
+
+    def contains_id(self, song_id: int) -> bool:
+        """
+        Returns True if a song with the given ID is in the list.
+        """
+        return song_id in self._by_id
+
+    def get_by_id(self, song_id: int) -> Optional[Song]:
+        """
+        Returns the song with the given ID, or None if it is not in the list.
+        """
+        return self._by_id.get(song_id)
+
+    def index_of_id(self, song_id: int) -> int:
+        """
+        Returns the 0-based position of the song with the given ID.
+
+        Raises:
+            KeyError: If no song with the given ID is in the list.
+        """
+        if self._positions is None:
+            self._positions = {song.id: index for index, song in enumerate(self)}
+        return self._positions[song_id]
+
+    ##################################################
+    # Duration Queries
+    ##################################################
+
+    def _duration_tree(self) -> _FenwickTree:
+        if self._durations is None:
+            self._durations = _FenwickTree(song.duration for song in self)
+        return self._durations
+
+    def total_duration(self) -> int:
+        """
+        Returns the total duration of the songs in seconds.
+        """
+        return self._total_duration
+
+    def duration_before(self, index: int) -> int:
+        """
+        Returns the total duration in seconds of the songs before the 0-based index.
+        """
+        return self._duration_tree().prefix_sum(index)
+
+    def index_at_offset(self, offset: int) -> int:
+        """
+        Returns the 0-based index of the song playing `offset` seconds from the start.
+
+        Raises:
+            ValueError: If the offset is negative or not before the end of the last song.
+        """
+        if not 0 <= offset < self._total_duration:
+            raise ValueError(f"Invalid time offset: {offset}")
+        return self._duration_tree().search(offset)
+
+    ##################################################
+    # Mutations
+    ##################################################
+
+    def append(self, song: Song) -> None:
+        super().append(song)
+        self._by_id[song.id] = song
+        self._total_duration += song.duration
+        if self._positions is not None:
+            self._positions[song.id] = len(self) - 1
+        if self._durations is not None:
+            self._durations.append(song.duration)
+
+    def extend(self, songs: Iterable[Song]) -> None:
+        songs = list(songs)
+        start = len(self)
+        super().extend(songs)
+        for index, song in enumerate(songs, start):
+            self._by_id[song.id] = song
+            self._total_duration += song.duration
+            if self._positions is not None:
+                self._positions[song.id] = index
+            if self._durations is not None:
+                self._durations.append(song.duration)
+
+    def __iadd__(self, songs: Iterable[Song]) -> "IndexedSongList":
+        self.extend(songs)
+        return self
+
+    def insert(self, index: int, song: Song) -> None:
+        super().insert(index, song)
+        self._by_id[song.id] = song
+        self._total_duration += song.duration
+        self._drop_positional_indexes()
+
+    def pop(self, index: int = -1) -> Song:
+        from_end = index in (-1, len(self) - 1)
+        song = super().pop(index)
+        self._by_id.pop(song.id, None)
+        self._total_duration -= song.duration
+        if not from_end:
+            self._drop_positional_indexes()
+        else:
+            if self._positions is not None:
+                self._positions.pop(song.id, None)
+            if self._durations is not None:
+                self._durations.pop()
+        return song
+
+    def remove(self, song: Song) -> None:
+        super().remove(song)
+        self._by_id.pop(song.id, None)
+        self._total_duration -= song.duration
+        self._drop_positional_indexes()
+
+    def clear(self) -> None:
+        super().clear()
+        self._by_id = {}
+        self._positions = {}
+        self._durations = _FenwickTree()
+        self._total_duration = 0
+
+    def swap(self, index1: int, index2: int) -> None:
+        """
+        Swaps the songs at two positions without rebuilding any index.
+        """
+        song1, song2 = self[index1], self[index2]
+        super().__setitem__(index1, song2)
+        super().__setitem__(index2, song1)
+        if self._positions is not None:
+            self._positions[song1.id], self._positions[song2.id] = self._positions[song2.id], self._positions[song1.id]
+        if self._durations is not None:
+            delta = song2.duration - song1.duration
+            self._durations.add(index1 % len(self), delta)
+            self._durations.add(index2 % len(self), -delta)
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._reindex()
+
+    def __delitem__(self, key) -> None:
+        if isinstance(key, int):
+            self.pop(key)
+            return
+        super().__delitem__(key)
+        self._reindex()
+
+    def __imul__(self, count: int) -> "IndexedSongList":
+        super().__imul__(count)
+        self._reindex()
+        return self
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._drop_positional_indexes()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._drop_positional_indexes()
+
+
+class _TreapNode:
+    """
+    A node of the implicit treap: a song, its heap priority, and its subtree's size and total duration.
+    """
+
+    __slots__ = ("song", "priority", "size", "duration", "left", "right", "parent")
+
+    def __init__(self, song: Song):
+        self.song = song
+        self.priority = random.random()
+        self.size = 1
+        self.duration = song.duration
+        self.left: Optional["_TreapNode"] = None
+        self.right: Optional["_TreapNode"] = None
+        self.parent: Optional["_TreapNode"] = None
+
+
+def _size(node: Optional[_TreapNode]) -> int:
+    return node.size if node is not None else 0
+
+
+def _duration(node: Optional[_TreapNode]) -> int:
+    return node.duration if node is not None else 0
+
+
+def _update(node: _TreapNode) -> None:
+    """
+    Recomputes a node's subtree size and duration and points its children back at it.
+    """
+    node.size = 1 + _size(node.left) + _size(node.right)
+    node.duration = node.song.duration + _duration(node.left) + _duration(node.right)
+    if node.left is not None:
+        node.left.parent = node
+    if node.right is not None:
+        node.right.parent = node
+
+
+def _split(node: Optional[_TreapNode], count: int) -> Tuple[Optional[_TreapNode], Optional[_TreapNode]]:
+    """
+    Splits a treap into its first `count` songs and the rest.
+    """
+    if node is None:
+        return None, None
+    if _size(node.left) >= count:
+        left, node.left = _split(node.left, count)
+        _update(node)
+        if left is not None:
+            left.parent = None
+        return left, node
+    node.right, right = _split(node.right, count - _size(node.left) - 1)
+    _update(node)
+    if right is not None:
+        right.parent = None
+    return node, right
+
+
+def _merge(left: Optional[_TreapNode], right: Optional[_TreapNode]) -> Optional[_TreapNode]:
+    """
+    Concatenates two treaps.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class TreapSongList(MutableSequence):
+    """
+    A sequence of songs stored in an implicit treap (a randomized balanced binary tree keyed by position).
+
+    Inserting, deleting, and getting a song by position are O(log n), so moving a
+    song anywhere in a very large playlist never shifts the songs around it. A map
+    from song ID to tree node, together with parent pointers, finds a song's
+    position in O(log n) as well. Each node also carries its subtree's total
+    duration, so prefix durations and time-offset lookups are O(log n) too.
+    Appending many songs builds the new subtree in O(m).
+    """
+
+    def __init__(self, songs: Iterable[Song] = ()):
+        """
+        Initializes the sequence with the given songs.
+
+        Args:
+            songs (Iterable[Song], optional): The initial songs.
+        """
+        self._root: Optional[_TreapNode] = None
+        self._nodes: Dict[int, _TreapNode] = {}
+        self.extend(songs)
+
+    ##################################################
+    # Tree Helpers
+    ##################################################
+
+    def _set_root(self, root: Optional[_TreapNode]) -> None:
+        if root is not None:
+            root.parent = None
+        self._root = root
+
+    def _normalize_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("playlist index out of range")
+        return index
+
+    def _node_at(self, index: int) -> _TreapNode:
+        index = self._normalize_index(index)
+        node = self._root
+        while True:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    @staticmethod
+    def _build(nodes: List[_TreapNode]) -> Optional[_TreapNode]:
+        """
+        Links nodes into a treap in their given order in O(m), using the Cartesian tree stack construction.
+        """
+        stack: List[_TreapNode] = []
+        preorder: List[_TreapNode] = []
+        for node in nodes:
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        if not stack:
+            return None
+
+        # sizes are computed children first, i.e. in reverse preorder
+        pending = [stack[0]]
+        while pending:
+            node = pending.pop()
+            preorder.append(node)
+            if node.right is not None:
+                pending.append(node.right)
+            if node.left is not None:
+                pending.append(node.left)
+        for node in reversed(preorder):
+            _update(node)
+        return stack[0]
+
+    ##################################################
+    # Lookups by Song ID
+    ##################################################
+
+    def contains_id(self, song_id: int) -> bool:
+        """
+        Returns True if a song with the given ID is in the sequence.
+        """
+        return song_id in self._nodes
+
+    def get_by_id(self, song_id: int) -> Optional[Song]:
+        """
+        Returns the song with the given ID, or None if it is not in the sequence.
+        """
+        node = self._nodes.get(song_id)
+        return node.song if node is not None else None
+
+    def index_of_id(self, song_id: int) -> int:
+        """
+        Returns the 0-based position of the song with the given ID.
+
+        Raises:
+            KeyError: If no song with the given ID is in the sequence.
+        """
+        node = self._nodes[song_id]
+        index = _size(node.left)
+        while node.parent is not None:
+            if node is node.parent.right:
+                index += _size(node.parent.left) + 1
+            node = node.parent
+        return index
+
+    ##################################################
+    # Duration Queries
+    ##################################################
+
+    def total_duration(self) -> int:
+        """
+        Returns the total duration of the songs in seconds.
+        """
+        return _duration(self._root)
+
+    def duration_before(self, index: int) -> int:
+        """
+        Returns the total duration in seconds of the songs before the 0-based index.
+        """
+        total = 0
+        node = self._root
+        while node is not None:
+            left_size = _size(node.left)
+            if index <= left_size:
+                node = node.left
+            else:
+                total += _duration(node.left) + node.song.duration
+                index -= left_size + 1
+                node = node.right
+        return total
+
+    def index_at_offset(self, offset: int) -> int:
+        """
+        Returns the 0-based index of the song playing `offset` seconds from the start.
+
+        Raises:
+            ValueError: If the offset is negative or not before the end of the last song.
+        """
+        if not 0 <= offset < self.total_duration():
+            raise ValueError(f"Invalid time offset: {offset}")
+        index = 0
+        node = self._root
+        while True:
+            left_duration = _duration(node.left)
+            if offset < left_duration:
+                node = node.left
+            elif offset < left_duration + node.song.duration:
+                return index + _size(node.left)
+            else:
+                offset -= left_duration + node.song.duration
+                index += _size(node.left) + 1
+                node = node.right
+
+    def _refresh_path(self, node: Optional[_TreapNode]) -> None:
+        """
+        Recomputes the subtree durations from a node whose song changed up to the root.
+        """
+        while node is not None:
+            _update(node)
+            node = node.parent
+
+    ##################################################
+    # Sequence Protocol
+    ##################################################
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __iter__(self) -> Iterator[Song]:
+        stack: List[_TreapNode] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.song
+            node = node.right
+
+    def __contains__(self, song: object) -> bool:
+        return isinstance(song, Song) and self.get_by_id(song.id) == song
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self._node_at(index).song
+
+    def __setitem__(self, index, song: Song) -> None:
+        if isinstance(index, slice):
+            raise TypeError("TreapSongList does not support slice assignment")
+        node = self._node_at(index)
+        del self._nodes[node.song.id]
+        node.song = song
+        self._nodes[song.id] = node
+        self._refresh_path(node)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            raise TypeError("TreapSongList does not support slice deletion")
+        self.pop(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, TreapSongList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TreapSongList({list(self)!r})"
+
+    ##################################################
+    # Mutations
+    ##################################################
+
+    def insert(self, index: int, song: Song) -> None:
+        # same clamping as list.insert
+        size = len(self)
+        if index < 0:
+            index = max(0, index + size)
+        index = min(index, size)
+
+        node = _TreapNode(song)
+        left, right = _split(self._root, index)
+        self._set_root(_merge(_merge(left, node), right))
+        self._nodes[song.id] = node
+
+    def append(self, song: Song) -> None:
+        self.insert(len(self), song)
+
+    def extend(self, songs: Iterable[Song]) -> None:
+        nodes = [_TreapNode(song) for song in songs]
+        self._set_root(_merge(self._root, self._build(nodes)))
+        for node in nodes:
+            self._nodes[node.song.id] = node
+
+    def pop(self, index: int = -1) -> Song:
+        if not self._root:
+            raise IndexError("pop from empty playlist")
+        index = self._normalize_index(index)
+        left, rest = _split(self._root, index)
+        node, right = _split(rest, 1)
+        self._set_root(_merge(left, right))
+        del self._nodes[node.song.id]
+        return node.song
+
+    def remove(self, song: Song) -> None:
+        if song not in self:
+            raise ValueError("song not in playlist")
+        self.pop(self.index_of_id(song.id))
+
+    def clear(self) -> None:
+        self._root = None
+        self._nodes = {}
+
+    def swap(self, index1: int, index2: int) -> None:
+        """
+        Swaps the songs at two positions in O(log n).
+        """
+        node1, node2 = self._node_at(index1), self._node_at(index2)
+        node1.song, node2.song = node2.song, node1.song
+        self._nodes[node1.song.id] = node1
+        self._nodes[node2.song.id] = node2
+        self._refresh_path(node1)
+        self._refresh_path(node2)
+
+
+PLAYLIST_BACKENDS = {
+    "list": IndexedSongList,
+    "tree": TreapSongList,
+}
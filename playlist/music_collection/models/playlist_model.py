@@ -1,6 +1,7 @@
 import logging
 from typing import List
-from music_collection.models.song_model import Song, update_play_count
+from music_collection.models.playlist_backends import PLAYLIST_BACKENDS
+from music_collection.models.song_model import Song, update_play_count, update_play_counts
 from music_collection.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
@@ -13,16 +14,27 @@ class PlaylistModel:
 
     Attributes:
         current_track_number (int): The current track number being played.
-        playlist (List[Song]): The list of songs in the playlist.
+        playlist (IndexedSongList | TreapSongList): The songs in the playlist, indexed by song ID.
 
     """
 
-    def __init__(self):
+    def __init__(self, backend: str = "list"):
         """
         Initializes the PlaylistModel with an empty playlist and the current track set to 1.
+
+        Args:
+            backend (str, optional): How the songs are stored. "list" (the default) is a Python
+                list with O(1) lookups by song ID. "tree" is an implicit treap that also keeps
+                inserting, removing and moving songs at O(log n), for very large playlists.
+
+        Raises:
+            ValueError: If the backend is unknown.
         """
+        if backend not in PLAYLIST_BACKENDS:
+            logger.error("Unknown playlist backend: %s", backend)
+            raise ValueError(f"Unknown playlist backend: {backend}")
         self.current_track_number = 1
-        self.playlist: List[Song] = []
+        self.playlist = PLAYLIST_BACKENDS[backend]()
 
     ##################################################
     # Song Management Functions
@@ -45,7 +57,7 @@ class PlaylistModel:
             raise TypeError("Song is not a valid song")
 
         song_id = self.validate_song_id(song.id, check_in_playlist=False)
-        if song_id in [song_in_playlist.id for song_in_playlist in self.playlist]:
+        if self.playlist.contains_id(song_id):
             logger.error("Song with ID %d already exists in the playlist", song.id)
             raise ValueError(f"Song with ID {song.id} already exists in the playlist")
 
@@ -64,7 +76,7 @@ class PlaylistModel:
         logger.info("Removing song with id %d from playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        self.playlist = [song_in_playlist for song_in_playlist in self.playlist if song_in_playlist.id != song_id]
+        del self.playlist[self.playlist.index_of_id(song_id)]
         logger.info("Song with id %d has been removed", song_id)
 
     def remove_song_by_track_number(self, track_number: int) -> None:
@@ -103,7 +115,7 @@ class PlaylistModel:
         """
         self.check_if_empty()
         logger.info("Getting all songs in the playlist")
-        return self.playlist
+        return list(self.playlist)
 
     def get_song_by_song_id(self, song_id: int) -> Song:
         """
@@ -118,7 +130,7 @@ class PlaylistModel:
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
         logger.info("Getting song with id %d from playlist", song_id)
-        return next((song for song in self.playlist if song.id == song_id), None)
+        return self.playlist.get_by_id(song_id)
 
     def get_song_by_track_number(self, track_number: int) -> Song:
         """
@@ -153,7 +165,17 @@ class PlaylistModel:
         """
         Returns the total duration of the playlist in seconds.
         """
-        return sum(song.duration for song in self.playlist)
+        return self.playlist.total_duration()
+
+    def get_remaining_duration(self) -> int:
+        """
+        Returns the duration in seconds from the start of the current track to the end of the playlist.
+
+        Raises:
+            ValueError: If the playlist is empty.
+        """
+        self.check_if_empty()
+        return self.playlist.total_duration() - self.playlist.duration_before(self.current_track_number - 1)
 
     ##################################################
     # Playlist Movement Functions
@@ -171,6 +193,32 @@ class PlaylistModel:
         logger.info("Setting current track number to %d", track_number)
         self.current_track_number = track_number
 
+    def go_to_time_offset(self, offset: int) -> int:
+        """
+        Sets the current track to the song playing at a time offset from the start of the playlist.
+
+        Args:
+            offset (int): The number of seconds from the start of the playlist.
+
+        Returns:
+            int: The number of seconds into the new current track that the offset falls.
+
+        Raises:
+            ValueError: If the playlist is empty or the offset is not within the playlist.
+        """
+        self.check_if_empty()
+        try:
+            offset = int(offset)
+            playlist_index = self.playlist.index_at_offset(offset)
+        except ValueError:
+            logger.error("Invalid time offset %s", offset)
+            raise ValueError(f"Invalid time offset: {offset}")
+
+        self.current_track_number = playlist_index + 1
+        seconds_into_track = offset - self.playlist.duration_before(playlist_index)
+        logger.info("Time offset %d is %d seconds into track number %d", offset, seconds_into_track, self.current_track_number)
+        return seconds_into_track
+
     def move_song_to_beginning(self, song_id: int) -> None:
         """
         Moves a song to the beginning of the playlist.
@@ -181,8 +229,7 @@ class PlaylistModel:
         logger.info("Moving song with ID %d to the beginning of the playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
+        song = self.playlist.pop(self.playlist.index_of_id(song_id))
         self.playlist.insert(0, song)
         logger.info("Song with ID %d has been moved to the beginning", song_id)
 
@@ -196,8 +243,7 @@ class PlaylistModel:
         logger.info("Moving song with ID %d to the end of the playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
+        song = self.playlist.pop(self.playlist.index_of_id(song_id))
         self.playlist.append(song)
         logger.info("Song with ID %d has been moved to the end", song_id)
 
@@ -214,8 +260,7 @@ class PlaylistModel:
         song_id = self.validate_song_id(song_id)
         track_number = self.validate_track_number(track_number)
         playlist_index = track_number - 1
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
+        song = self.playlist.pop(self.playlist.index_of_id(song_id))
         self.playlist.insert(playlist_index, song)
         logger.info("Song with ID %d has been moved to track number %d", song_id, track_number)
 
@@ -239,11 +284,9 @@ class PlaylistModel:
             logger.error("Cannot swap a song with itself, both song IDs are the same: %d", song1_id)
             raise ValueError(f"Cannot swap a song with itself, both song IDs are the same: {song1_id}")
 
-        song1 = self.get_song_by_song_id(song1_id)
-        song2 = self.get_song_by_song_id(song2_id)
-        index1 = self.playlist.index(song1)
-        index2 = self.playlist.index(song2)
-        self.playlist[index1], self.playlist[index2] = self.playlist[index2], self.playlist[index1]
+        index1 = self.playlist.index_of_id(song1_id)
+        index2 = self.playlist.index_of_id(song2_id)
+        self.playlist.swap(index1, index2)
         logger.info("Swapped songs with IDs %d and %d", song1_id, song2_id)
 
     ##################################################
@@ -267,37 +310,56 @@ class PlaylistModel:
         self.current_track_number = (self.current_track_number % self.get_playlist_length()) + 1
         logger.info("Track number updated from %d to %d", previous_track_number, self.current_track_number)
 
-    def play_entire_playlist(self) -> None:
+    def play_entire_playlist(self) -> List[int]:
         """
         Plays the entire playlist.
 
         Side-effects:
             Resets the current track number to 1.
-            Updates the play count for each song.
+            Updates the play count for each song in a single transaction.
+
+        Returns:
+            List[int]: The IDs of songs whose play count was skipped because they have been deleted.
         """
         self.check_if_empty()
         logger.info("Starting to play the entire playlist.")
         self.current_track_number = 1
         logger.info("Reset current track number to 1.")
-        for _ in range(self.get_playlist_length()):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
+        skipped = self._play_to_end()
         logger.info("Finished playing the entire playlist. Current track number reset to 1.")
+        return skipped
 
-    def play_rest_of_playlist(self) -> None:
+    def play_rest_of_playlist(self) -> List[int]:
         """
         Plays the rest of the playlist from the current track.
 
         Side-effects:
             Updates the current track number back to 1.
-            Updates the play count for each song in the rest of the playlist.
+            Updates the play count for each song in the rest of the playlist in a single transaction.
+
+        Returns:
+            List[int]: The IDs of songs whose play count was skipped because they have been deleted.
         """
         self.check_if_empty()
         logger.info("Starting to play the rest of the playlist from track number: %d", self.current_track_number)
-        for _ in range(self.get_playlist_length() - self.current_track_number + 1):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
+        skipped = self._play_to_end()
         logger.info("Finished playing the rest of the playlist. Current track number reset to 1.")
+        return skipped
+
+    def _play_to_end(self) -> List[int]:
+        """
+        Plays every song from the current track to the end of the playlist and wraps around to track 1.
+
+        Returns:
+            List[int]: The IDs of songs whose play count was skipped because they have been deleted.
+        """
+        songs = self.playlist[self.current_track_number - 1:]
+        logger.info("Playing track numbers %d to %d", self.current_track_number, self.get_playlist_length())
+        skipped = update_play_counts([song.id for song in songs])
+        if skipped:
+            logger.warning("Skipped play counts for deleted songs with IDs: %s", skipped)
+        self.current_track_number = 1
+        return skipped
 
     def rewind_playlist(self) -> None:
         """
@@ -333,7 +395,7 @@ class PlaylistModel:
             raise ValueError(f"Invalid song id: {song_id}")
 
         if check_in_playlist:
-            if song_id not in [song_in_playlist.id for song_in_playlist in self.playlist]:
+            if not self.playlist.contains_id(song_id):
                 logger.error("Song with id %d not found in playlist", song_id)
                 raise ValueError(f"Song with id {song_id} not found in playlist")
 
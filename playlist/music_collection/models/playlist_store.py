@@ -0,0 +1,292 @@
+from array import array
+from contextlib import contextmanager
+from functools import partial
+import logging
+import os
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.song_model import Song
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import DB_PATH
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# "memory" keeps the playlist in this process; "sqlite" shares it between worker processes
+PLAYLIST_STORE = os.getenv("PLAYLIST_STORE", "memory")
+# A separate file from the catalog, so holding the playlist lock never blocks catalog writes
+PLAYLIST_STATE_DB_PATH = os.getenv("PLAYLIST_STATE_DB_PATH",
+                                   os.path.join(os.path.dirname(DB_PATH), "playlist_state.db"))
+
+PLAYLIST_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlist_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL,
+    current_track_number INTEGER NOT NULL,
+    song_ids BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlist_songs (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    title TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    duration INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO playlist_state (id, version, current_track_number, song_ids) VALUES (0, 0, 1, x'');
+"""
+
+
+class PlaylistStateStore:
+    """
+    The playlist's order, current track and songs, kept in SQLite so that every worker
+    process sees the same playlist.
+
+    The order is stored as one packed array of song IDs and the songs as a snapshot of
+    the catalog rows taken when they were added, so a song deleted from the catalog
+    stays playable, as it does in memory. Every write bumps a version number, which
+    lets a process keep its local copy until another process changes the playlist.
+
+    The connection is opened lazily and per process, so a store created before a
+    server forks its workers is safe to use in each of them.
+
+    Attributes:
+        db_path (str): The path to the state database.
+    """
+
+    def __init__(self, db_path: str = PLAYLIST_STATE_DB_PATH):
+        """
+        Initializes the store without opening the database.
+
+        Args:
+            db_path (str, optional): The path to the state database.
+        """
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns this process's connection, opening it and creating the tables on first use.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            # transactions are managed explicitly, so autocommit mode
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(PLAYLIST_STATE_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+            logger.info("Opened playlist state database at %s", self.db_path)
+        return self._conn
+
+    @contextmanager
+    def transaction(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Runs a block in one transaction, holding the playlist lock for writes.
+
+        A write transaction takes the database's write lock up front, so changes to
+        the playlist are serialized across processes as well as threads.
+
+        Args:
+            write (bool, optional): Whether the block changes the playlist.
+
+        Yields:
+            sqlite3.Connection: The store's connection.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def get_version(self) -> int:
+        """
+        Returns the version of the stored playlist. Call inside a transaction.
+        """
+        return self._connection().execute("SELECT version FROM playlist_state WHERE id = 0").fetchone()[0]
+
+    def load(self) -> Tuple[int, int, List[Song]]:
+        """
+        Reads the whole playlist. Call inside a transaction.
+
+        Returns:
+            Tuple[int, int, List[Song]]: The version, the current track number and the songs in order.
+        """
+        conn = self._connection()
+        version, current_track_number, packed = conn.execute(
+            "SELECT version, current_track_number, song_ids FROM playlist_state WHERE id = 0"
+        ).fetchone()
+        song_ids = array("q")
+        song_ids.frombytes(packed)
+        songs = {row[0]: Song(*row) for row in conn.execute(
+            "SELECT id, artist, title, year, genre, duration FROM playlist_songs"
+        )}
+        return version, current_track_number, [songs[song_id] for song_id in song_ids]
+
+    def save(self, songs: Sequence[Song], current_track_number: int) -> int:
+        """
+        Writes the playlist order and current track. Call inside a write transaction.
+
+        Args:
+            songs (Sequence[Song]): The songs in playlist order.
+            current_track_number (int): The current track number.
+
+        Returns:
+            int: The new version.
+        """
+        conn = self._connection()
+        song_ids = array("q", (song.id for song in songs))
+        conn.execute(
+            "UPDATE playlist_state SET version = version + 1, current_track_number = ?, song_ids = ? WHERE id = 0",
+            (current_track_number, song_ids.tobytes())
+        )
+        if not song_ids:
+            conn.execute("DELETE FROM playlist_songs")
+        return self.get_version()
+
+    def add_song(self, song: Song) -> None:
+        """
+        Stores a snapshot of a song that joined the playlist. Call inside a write transaction.
+        """
+        self._connection().execute(
+            "INSERT OR REPLACE INTO playlist_songs (id, artist, title, year, genre, duration) VALUES (?, ?, ?, ?, ?, ?)",
+            (song.id, song.artist, song.title, song.year, song.genre, song.duration)
+        )
+
+    def remove_song(self, song_id: int) -> None:
+        """
+        Drops the snapshot of a song that left the playlist. Call inside a write transaction.
+        """
+        self._connection().execute("DELETE FROM playlist_songs WHERE id = ?", (song_id,))
+
+
+class SharedPlaylistModel:
+    """
+    A PlaylistModel whose state lives in a PlaylistStateStore.
+
+    Each call runs in a store transaction: the local PlaylistModel is reloaded if
+    another process changed the playlist since this one last saw it, the call runs
+    on it, and calls that change the playlist are written back. Reads cost one
+    version check while nothing changes elsewhere. The PlaylistModel methods are
+    exposed unchanged, so the routes work with either model.
+    """
+
+    READ_METHODS = frozenset({
+        "get_all_songs", "get_song_by_song_id", "get_song_by_track_number", "get_current_song",
+        "get_playlist_length", "get_playlist_duration", "get_remaining_duration",
+        "validate_song_id", "validate_track_number", "check_if_empty",
+    })
+    WRITE_METHODS = frozenset({
+        "add_song_to_playlist", "remove_song_by_song_id", "remove_song_by_track_number", "clear_playlist",
+        "go_to_track_number", "go_to_time_offset", "move_song_to_beginning", "move_song_to_end",
+        "move_song_to_track_number", "swap_songs_in_playlist", "play_current_song",
+        "play_entire_playlist", "play_rest_of_playlist", "rewind_playlist",
+    })
+
+    def __init__(self, store: PlaylistStateStore, backend: str = "list"):
+        """
+        Initializes the model; the playlist is loaded from the store on first use.
+
+        Args:
+            store (PlaylistStateStore): The shared playlist state.
+            backend (str, optional): The local PlaylistModel backend.
+
+        Raises:
+            ValueError: If the backend is unknown.
+        """
+        self.store = store
+        self.backend = backend
+        self._model = PlaylistModel(backend)
+        self._version: Optional[int] = None
+
+    def _sync(self) -> None:
+        """
+        Reloads the local model if the stored playlist changed. Call inside a transaction.
+        """
+        if self._version is not None and self.store.get_version() == self._version:
+            return
+        version, current_track_number, songs = self.store.load()
+        model = PlaylistModel(self.backend)
+        model.playlist.extend(songs)
+        model.current_track_number = current_track_number
+        self._model, self._version = model, version
+        logger.info("Loaded shared playlist version %d with %d songs", version, len(songs))
+
+    def _call(self, name: str, *args, **kwargs):
+        write = name in self.WRITE_METHODS
+        with self.store.transaction(write):
+            self._sync()
+            if not write:
+                return getattr(self._model, name)(*args, **kwargs)
+
+            leaving = self._leaving_song_id(name, *args, **kwargs)
+            try:
+                result = getattr(self._model, name)(*args, **kwargs)
+            except Exception:
+                # the local copy may be half changed; reload it next time
+                self._version = None
+                raise
+
+            if name == "add_song_to_playlist":
+                self.store.add_song(args[0] if args else kwargs["song"])
+            elif leaving is not None:
+                self.store.remove_song(leaving)
+            self._version = self.store.save(self._model.playlist, self._model.current_track_number)
+            return result
+
+    def _leaving_song_id(self, name: str, *args, **kwargs) -> Optional[int]:
+        """
+        Returns the ID of the song a remove call will take out of the playlist, if it is valid.
+        """
+        if name == "remove_song_by_song_id":
+            return args[0] if args else kwargs["song_id"]
+        if name == "remove_song_by_track_number":
+            track_number = args[0] if args else kwargs["track_number"]
+            if isinstance(track_number, int) and 1 <= track_number <= len(self._model.playlist):
+                return self._model.playlist[track_number - 1].id
+        return None
+
+    def __getattr__(self, name: str):
+        if name in self.READ_METHODS or name in self.WRITE_METHODS:
+            return partial(self._call, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    @property
+    def current_track_number(self) -> int:
+        """
+        The current track number of the shared playlist.
+        """
+        with self.store.transaction():
+            self._sync()
+            return self._model.current_track_number
+
+
+def create_playlist_model(backend: str = "list", store: str = PLAYLIST_STORE) -> Union[PlaylistModel, SharedPlaylistModel]:
+    """
+    Creates the playlist model for the configured store.
+
+    Args:
+        backend (str, optional): The PlaylistModel backend.
+        store (str, optional): "memory" for a per-process playlist, "sqlite" for one shared by all workers.
+
+    Returns:
+        The playlist model.
+
+    Raises:
+        ValueError: If the store or backend is unknown.
+    """
+    if store == "memory":
+        return PlaylistModel(backend)
+    if store == "sqlite":
+        return SharedPlaylistModel(PlaylistStateStore(PLAYLIST_STATE_DB_PATH), backend)
+    raise ValueError(f"Unknown playlist store: {store}")
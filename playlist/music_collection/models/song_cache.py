@@ -0,0 +1,175 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from music_collection.utils.logger import configure_logger
+
+if TYPE_CHECKING:
+    from music_collection.models.song_model import Song
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+CompoundKey = Tuple[str, str, int]
+
+
+class SongCache:
+    """
+    Keeps recently looked-up songs in memory for get_song_by_id and get_song_by_compound_key.
+
+    Songs are held in least-recently-used order under their ID, and an index maps
+    each (artist, title, year) compound key to the ID, so both lookups share one
+    entry. Once `max_size` songs are cached, caching another drops the song that
+    was used longest ago. Each entry also lapses `ttl` seconds after it was cached,
+    which bounds how long a song deleted by another worker can still be served.
+
+    Attributes:
+        max_size (int): The maximum number of cached songs. 0 turns caching off.
+        ttl (float): The number of seconds a cached song is served before it is reloaded.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int, optional): The maximum number of cached songs. 0 turns caching off.
+            ttl (float, optional): The number of seconds a cached song is served before it is reloaded.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._songs: "OrderedDict[int, Tuple[Song, float]]" = OrderedDict()
+        self._ids_by_key: Dict[CompoundKey, int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(song: "Song") -> CompoundKey:
+        return (song.artist, song.title, song.year)
+
+    def _remove(self, song_id: int) -> None:
+        # called with the lock held; the key index may already point at a newer song
+        song, _ = self._songs.pop(song_id)
+        key = self._key(song)
+        if self._ids_by_key.get(key) == song_id:
+            del self._ids_by_key[key]
+
+    def _find(self, song_id: Optional[int]) -> Optional["Song"]:
+        # called with the lock held
+        if song_id is None or song_id not in self._songs:
+            self.stats["misses"] += 1
+            return None
+        song, cached_until = self._songs[song_id]
+        if time.monotonic() >= cached_until:
+            self._remove(song_id)
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._songs.move_to_end(song_id)
+        self.stats["hits"] += 1
+        return song
+
+    ##################################################
+    # Lookups
+    ##################################################
+
+    def get_by_id(self, song_id: int) -> Optional["Song"]:
+        """
+        Looks up a cached song by its ID.
+
+        Args:
+            song_id (int): The ID of the song.
+
+        Returns:
+            Optional[Song]: The song, or None if it is not cached or has lapsed.
+        """
+        with self._lock:
+            return self._find(song_id)
+
+    def get_by_compound_key(self, artist: str, title: str, year: int) -> Optional["Song"]:
+        """
+        Looks up a cached song by artist, title and year.
+
+        Args:
+            artist (str): The artist of the song.
+            title (str): The title of the song.
+            year (int): The year the song was released.
+
+        Returns:
+            Optional[Song]: The song, or None if it is not cached or has lapsed.
+        """
+        with self._lock:
+            return self._find(self._ids_by_key.get((artist, title, year)))
+
+    ##################################################
+    # Updates
+    ##################################################
+
+    def put(self, song: "Song") -> None:
+        """
+        Caches a song loaded from the database, replacing any cached copy.
+
+        Args:
+            song (Song): The song to cache.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if song.id in self._songs:
+                self._remove(song.id)
+            self._songs[song.id] = (song, time.monotonic() + self.ttl)
+            self._ids_by_key[self._key(song)] = song.id
+            while len(self._songs) > self.max_size:
+                # the first entry is the one used longest ago
+                self._remove(next(iter(self._songs)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, song_id: Optional[int] = None, compound_key: Optional[CompoundKey] = None) -> None:
+        """
+        Drops a song after it was changed or deleted. Uncached songs are ignored.
+
+        Args:
+            song_id (Optional[int]): The ID of the song.
+            compound_key (Optional[Tuple[str, str, int]]): The song's (artist, title, year), used when no ID is given.
+        """
+        with self._lock:
+            if song_id is None and compound_key is not None:
+                song_id = self._ids_by_key.get(compound_key)
+            if song_id in self._songs:
+                self._remove(song_id)
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """
+        Drops every cached song, e.g. after the catalog was cleared.
+        """
+        with self._lock:
+            self.stats["invalidations"] += len(self._songs)
+            self._songs.clear()
+            self._ids_by_key.clear()
+        logger.info("Song cache cleared")
+
+    ##################################################
+    # Stats
+    ##################################################
+
+    def get_stats(self) -> dict:
+        """
+        Reports how well the cache is doing.
+
+        Returns:
+            dict: The hit, miss, eviction, expiration and invalidation counts, the
+            current and maximum size, and the share of lookups that were hits.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._songs)
+            stats["max_size"] = self.max_size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,247 @@
+"""
+Streaming bulk ingestion of songs into the catalog.
+
+Rows are parsed from CSV or NDJSON one line at a time, validated with the same
+rules as Song, and inserted in chunked transactions. Songs whose (artist, title,
+year) already exists are ignored rather than treated as errors, so an interrupted
+load can simply be run again. Memory use is bounded by the chunk size and the
+number of errors reported, not by the size of the input.
+
+Run from the playlist directory:
+
+    python -m music_collection.models.song_ingest catalog.csv [--format csv|ndjson] [--chunk-size 1000]
+
+Pass - as the path to read from standard input.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from music_collection.models.song_model import Song, invalidate_live_song_ids
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import get_db_connection, retry_on_busy
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+# Only the first errors are kept; the rest are counted
+MAX_REPORTED_ERRORS = 100
+
+INGEST_FORMATS = ("csv", "ndjson")
+
+SongRow = Tuple[str, str, int, str, int]
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses CSV text with a header row naming artist, title, year, genre and duration.
+
+    Args:
+        lines (Iterable[str]): The lines of the CSV text.
+
+    Yields:
+        dict: One row per record, with the values as text.
+    """
+    yield from csv.DictReader(lines)
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[Any]:
+    """
+    Parses newline-delimited JSON, skipping blank lines.
+
+    A line that is not valid JSON is yielded as its text, so that it is reported
+    as an invalid row instead of stopping the ingest.
+
+    Args:
+        lines (Iterable[str]): The lines of the NDJSON text.
+
+    Yields:
+        Any: The decoded value of each line.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+def parse_stream(stream: BinaryIO, fmt: str) -> Iterator[Any]:
+    """
+    Parses a UTF-8 byte stream incrementally in the given format.
+
+    Args:
+        stream (BinaryIO): The input, such as an open file or a request body.
+        fmt (str): Either "csv" or "ndjson".
+
+    Returns:
+        Iterator[Any]: The parsed rows.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt not in INGEST_FORMATS:
+        raise ValueError(f"Unsupported ingest format: {fmt}")
+    lines = io.TextIOWrapper(stream, encoding="utf-8", newline="" if fmt == "csv" else None)
+    return parse_csv(lines) if fmt == "csv" else parse_ndjson(lines)
+
+def validate_song_row(row: Any) -> SongRow:
+    """
+    Validates one input row and converts it to the values of a songs row.
+
+    Year and duration may be given as text, as they are in CSV.
+
+    Args:
+        row (Any): The parsed row.
+
+    Returns:
+        SongRow: The (artist, title, year, genre, duration) values.
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object with artist, title, year, genre and duration")
+
+    for field in ("artist", "title", "genre"):
+        if not isinstance(row.get(field), str) or not row[field].strip():
+            raise ValueError(f"Invalid {field}: it must be a non-empty string")
+
+    numbers = {}
+    for field in ("year", "duration"):
+        value = row.get(field)
+        try:
+            if isinstance(value, (bool, float)):
+                raise ValueError
+            numbers[field] = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field}: {value} (must be an integer)")
+
+    # the same checks as a Song loaded from the catalog
+    song = Song(0, row["artist"], row["title"], numbers["year"], row["genre"], numbers["duration"])
+    return (song.artist, song.title, song.year, song.genre, song.duration)
+
+@retry_on_busy
+def _insert_chunk(chunk: List[SongRow]) -> int:
+    """
+    Inserts one chunk of songs in a single transaction, ignoring existing compound keys.
+
+    Args:
+        chunk (List[SongRow]): The validated rows.
+
+    Returns:
+        int: The number of songs inserted.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO songs (artist, title, year, genre, duration)
+            VALUES (?, ?, ?, ?, ?)
+        """, chunk)
+        conn.commit()
+        return cursor.rowcount
+
+def ingest_songs(rows: Iterable[Any], chunk_size: int = INGEST_CHUNK_SIZE) -> dict:
+    """
+    Validates and inserts songs, chunk_size rows per transaction.
+
+    Rows are consumed lazily. Invalid rows are skipped and reported; rows whose
+    (artist, title, year) is already in the catalog, or earlier in the input, are
+    ignored. Chunks committed before a database error are kept.
+
+    Args:
+        rows (Iterable[Any]): The parsed rows, for example from parse_stream.
+        chunk_size (int, optional): The number of rows per transaction.
+
+    Returns:
+        dict: The number of rows read, inserted, ignored as duplicates and invalid,
+            the first MAX_REPORTED_ERRORS errors by 0-based row number, the elapsed
+            seconds and the rows per second.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size} (must be a positive integer).")
+
+    start = time.perf_counter()
+    total = inserted = valid = invalid = 0
+    errors = []
+    chunk: List[SongRow] = []
+
+    try:
+        for position, row in enumerate(rows):
+            total += 1
+            try:
+                chunk.append(validate_song_row(row))
+            except ValueError as e:
+                invalid += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": position, "error": str(e)})
+                continue
+            valid += 1
+            if len(chunk) >= chunk_size:
+                inserted += _insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            inserted += _insert_chunk(chunk)
+
+    except sqlite3.Error as e:
+        logger.error("Database error after ingesting %d songs: %s", inserted, str(e))
+        raise e
+    finally:
+        if inserted:
+            invalidate_live_song_ids()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Ingested %d of %d songs (%d duplicates, %d invalid) in %.3f s",
+                inserted, total, valid - inserted, invalid, elapsed)
+    return {
+        "rows": total,
+        "inserted": inserted,
+        "ignored": valid - inserted,
+        "invalid": invalid,
+        "errors": errors,
+        "elapsed": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Ingests a CSV or NDJSON file into the catalog and prints the result as JSON.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="the file to ingest, or - for standard input")
+    parser.add_argument("--format", choices=INGEST_FORMATS,
+                        help="the input format; by default taken from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        extension = os.path.splitext(args.path)[1].lstrip(".").lower()
+        fmt = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension)
+        if fmt is None:
+            parser.error("cannot tell the format from the file name, pass --format")
+
+    if args.path == "-":
+        result = ingest_songs(parse_stream(sys.stdin.buffer, fmt), args.chunk_size)
+    else:
+        with open(args.path, "rb") as fh:
+            result = ingest_songs(parse_stream(fh, fmt), args.chunk_size)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
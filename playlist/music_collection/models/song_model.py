@@ -1,17 +1,53 @@
+from array import array
+from collections import Counter
 from dataclasses import dataclass
 import logging
 import os
 import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional
 
+from music_collection.models.play_count_buffer import PlayCountBuffer
+from music_collection.models.song_cache import SongCache
 from music_collection.utils.logger import configure_logger
 from music_collection.utils.random_utils import get_random
-from music_collection.utils.sql_utils import get_db_connection
+from music_collection.utils.sql_utils import apply_migrations, get_db_connection, retry_on_busy
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Optional write-behind buffering of play counts. When enabled, update_play_count only
+# records the play in memory and the buffer writes the totals in batches.
+PLAY_COUNT_WRITE_BEHIND = os.getenv("PLAY_COUNT_WRITE_BEHIND", "false").lower() == "true"
+
+play_count_buffer: Optional[PlayCountBuffer] = None
+if PLAY_COUNT_WRITE_BEHIND:
+    play_count_buffer = PlayCountBuffer(
+        max_pending=int(os.getenv("PLAY_COUNT_FLUSH_SIZE", "500")),
+        flush_interval=float(os.getenv("PLAY_COUNT_FLUSH_INTERVAL", "5"))
+    )
+
+
+# In-process LRU cache for lookups by ID and compound key. Writes in this process
+# invalidate it; the TTL bounds staleness from other processes.
+song_cache = SongCache(
+    max_size=int(os.getenv("SONG_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("SONG_CACHE_TTL", "60"))
+)
+
+# Dense array of live song IDs used to pick random songs without loading the catalog.
+# Writes in this process invalidate it; the TTL bounds staleness from other processes.
+LIVE_SONG_IDS_TTL = float(os.getenv("LIVE_SONG_IDS_TTL", "60"))
+RANDOM_SONG_ATTEMPTS = 3
+
+_live_song_ids: Optional[array] = None
+_live_song_ids_loaded_at = 0.0
+_live_song_ids_lock = threading.Lock()
+
+
 @dataclass
 class Song:
     id: int
@@ -28,6 +64,7 @@ class Song:
             raise ValueError(f"Year must be greater than 1900, got {self.year}")
 
 
+@retry_on_busy
 def create_song(artist: str, title: str, year: int, genre: str, duration: int) -> None:
     """
     Creates a new song in the songs table.
@@ -60,6 +97,8 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
             """, (artist, title, year, genre, duration))
             conn.commit()
 
+            invalidate_live_song_ids()
+            song_cache.invalidate(compound_key=(artist, title, year))
             logger.info("Song created successfully: %s - %s (%d)", artist, title, year)
 
     except sqlite3.IntegrityError as e:
@@ -69,6 +108,7 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
         logger.error("Database error while creating song: %s", str(e))
         raise sqlite3.Error(f"Database error: {str(e)}")
 
+@retry_on_busy
 def clear_catalog() -> None:
     """
     Recreates the songs table, effectively deleting all songs.
@@ -83,6 +123,10 @@ def clear_catalog() -> None:
             cursor = conn.cursor()
             cursor.executescript(create_table_script)
             conn.commit()
+            # recreating the table dropped its indexes
+            apply_migrations(conn)
+            invalidate_live_song_ids()
+            song_cache.clear()
 
             logger.info("Catalog cleared successfully.")
 
@@ -90,6 +134,7 @@ def clear_catalog() -> None:
         logger.error("Database error while clearing catalog: %s", str(e))
         raise e
 
+@retry_on_busy
 def delete_song(song_id: int) -> None:
     """
     Soft deletes a song from the catalog by marking it as deleted.
@@ -119,6 +164,8 @@ def delete_song(song_id: int) -> None:
             # Perform the soft delete by setting 'deleted' to TRUE
             cursor.execute("UPDATE songs SET deleted = TRUE WHERE id = ?", (song_id,))
             conn.commit()
+            invalidate_live_song_ids()
+            song_cache.invalidate(song_id)
 
             logger.info("Song with ID %s marked as deleted.", song_id)
 
@@ -126,10 +173,13 @@ def delete_song(song_id: int) -> None:
         logger.error("Database error while deleting song: %s", str(e))
         raise e
 
+@retry_on_busy
 def get_song_by_id(song_id: int) -> Song:
     """
     Retrieves a song from the catalog by its song ID.
 
+    Recently used songs are served from the song cache without a database query.
+
     Args:
         song_id (int): The ID of the song to retrieve.
 
@@ -139,6 +189,11 @@ def get_song_by_id(song_id: int) -> Song:
     Raises:
         ValueError: If the song is not found or is marked as deleted.
     """
+    song = song_cache.get_by_id(song_id)
+    if song is not None:
+        logger.info("Song with ID %s found in cache", song_id)
+        return song
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -155,7 +210,9 @@ def get_song_by_id(song_id: int) -> Song:
                     logger.info("Song with ID %s has been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s found", song_id)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                song = Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                song_cache.put(song)
+                return song
             else:
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
@@ -164,10 +221,13 @@ def get_song_by_id(song_id: int) -> Song:
         logger.error("Database error while retrieving song by ID %s: %s", song_id, str(e))
         raise e
 
+@retry_on_busy
 def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
     """
     Retrieves a song from the catalog by its compound key (artist, title, year).
 
+    Recently used songs are served from the song cache without a database query.
+
     Args:
         artist (str): The artist of the song.
         title (str): The title of the song.
@@ -179,6 +239,11 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
     Raises:
         ValueError: If the song is not found or is marked as deleted.
     """
+    song = song_cache.get_by_compound_key(artist, title, year)
+    if song is not None:
+        logger.info("Song with artist '%s', title '%s', and year %d found in cache", artist, title, year)
+        return song
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -195,7 +260,9 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
                     logger.info("Song with artist '%s', title '%s', and year %d has been deleted", artist, title, year)
                     raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} has been deleted")
                 logger.info("Song with artist '%s', title '%s', and year %d found", artist, title, year)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                song = Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                song_cache.put(song)
+                return song
             else:
                 logger.info("Song with artist '%s', title '%s', and year %d not found", artist, title, year)
                 raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} not found")
@@ -204,52 +271,185 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
-def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
+def get_all_songs(sort_by_play_count: bool = False, limit: Optional[int] = None,
+                  after_id: Optional[int] = None, after_play_count: Optional[int] = None) -> list[dict]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
 
+    Pass `limit` to read one page at a time. Pages are keyset-paginated: to get the
+    next page, pass the ID (and, when sorting by play count, the play count) of the
+    last song on the previous page as `after_id` (and `after_play_count`).
+
+    With write-behind enabled, play counts still waiting in the buffer are
+    added to the stored counts. Pages sorted by play count flush the buffer
+    first instead, so that the cursor matches the stored order.
+
     Args:
         sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        limit (int, optional): The maximum number of songs to return.
+        after_id (int, optional): Return only songs after the song with this ID.
+        after_play_count (int, optional): The play count of the song with ID after_id.
+            Required when sorting by play count with after_id.
 
     Returns:
         list[dict]: A list of dictionaries representing all non-deleted songs with play_count.
 
+    Raises:
+        ValueError: If the limit or the cursor is invalid.
+
     Logs:
         Warning: If the catalog is empty.
     """
+    query, params = _build_songs_query(sort_by_play_count, limit, after_id, after_play_count)
+
+    if play_count_buffer is None:
+        return _fetch_all_songs(query, params)
+
+    if sort_by_play_count and (limit is not None or after_id is not None):
+        play_count_buffer.flush()
+        return _fetch_all_songs(query, params)
+
+    songs, deltas = play_count_buffer.read_consistent(lambda: _fetch_all_songs(query, params))
+    if deltas:
+        for song in songs:
+            song["play_count"] += deltas.get(song["id"], 0)
+        if sort_by_play_count:
+            # the sort is stable, so songs with equal counts keep the database order
+            songs.sort(key=lambda song: song["play_count"], reverse=True)
+    return songs
+
+def iter_songs(sort_by_play_count: bool = False, batch_size: int = 500, limit: Optional[int] = None,
+               after_id: Optional[int] = None, after_play_count: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yields all songs that are not marked as deleted, reading batch_size rows at a time.
+
+    Memory use stays flat regardless of the size of the catalog. The database
+    connection is held until the iterator is exhausted or closed. With write-behind
+    enabled the buffer is flushed first so the stored play counts are current.
+    The limit and cursor work as in get_all_songs, so a stream can be resumed
+    after the last song a client received.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        batch_size (int, optional): The number of rows fetched per round trip.
+        limit (int, optional): The maximum number of songs to yield.
+        after_id (int, optional): Yield only songs after the song with this ID.
+        after_play_count (int, optional): The play count of the song with ID after_id.
+            Required when sorting by play count with after_id.
+
+    Yields:
+        dict: The next non-deleted song with its play_count.
+
+    Raises:
+        ValueError: If the limit or the cursor is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    query, params = _build_songs_query(sort_by_play_count, limit, after_id, after_play_count)
+
+    if play_count_buffer is not None:
+        play_count_buffer.flush()
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            logger.info("Attempting to retrieve all non-deleted songs from the catalog")
+            logger.info("Streaming all non-deleted songs from the catalog")
+            cursor.execute(query, params)
 
-            # Determine the sort order based on the 'sort_by_play_count' flag
-            query = """
-                SELECT id, artist, title, year, genre, duration, play_count
-                FROM songs
-                WHERE deleted = FALSE
-            """
-            if sort_by_play_count:
-                query += " ORDER BY play_count DESC"
+            count = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _song_row_to_dict(row)
+                count += len(rows)
+
+            logger.info("Streamed %d songs from the catalog", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming songs: %s", str(e))
+        raise e
+
+def _build_songs_query(sort_by_play_count: bool, limit: Optional[int], after_id: Optional[int],
+                       after_play_count: Optional[int]) -> tuple[str, tuple]:
+    """
+    Builds the query that lists non-deleted songs. See get_all_songs for the arguments.
 
-            cursor.execute(query)
+    Raises:
+        ValueError: If the limit or the cursor is invalid.
+    """
+    if limit is not None and limit <= 0:
+        raise ValueError(f"Invalid limit: {limit} (must be a positive integer).")
+    if after_play_count is not None and (not sort_by_play_count or after_id is None):
+        raise ValueError("after_play_count requires sort_by_play_count and after_id.")
+    if sort_by_play_count and after_id is not None and after_play_count is None:
+        raise ValueError("after_play_count is required when paginating by play count.")
+
+    query = """
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    params: tuple = ()
+
+    if limit is None and after_id is None:
+        # Determine the sort order based on the 'sort_by_play_count' flag
+        if sort_by_play_count:
+            query += " ORDER BY play_count DESC"
+        return query, params
+
+    # Keyset pagination needs a total order, so ties are broken by ID
+    if sort_by_play_count:
+        if after_id is not None:
+            query += " AND (play_count < ? OR (play_count = ? AND id > ?))"
+            params += (after_play_count, after_play_count, after_id)
+        query += " ORDER BY play_count DESC, id"
+    else:
+        if after_id is not None:
+            query += " AND id > ?"
+            params += (after_id,)
+        query += " ORDER BY id"
+
+    if limit is not None:
+        query += " LIMIT ?"
+        params += (limit,)
+    return query, params
+
+def _song_row_to_dict(row: tuple) -> dict:
+    """
+    Converts a row of the songs listing query to a dictionary.
+    """
+    return {
+        "id": row[0],
+        "artist": row[1],
+        "title": row[2],
+        "year": row[3],
+        "genre": row[4],
+        "duration": row[5],
+        "play_count": row[6],
+    }
+
+@retry_on_busy
+def _fetch_all_songs(query: str, params: tuple) -> list[dict]:
+    """
+    Reads non-deleted songs from the database. See get_all_songs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to retrieve all non-deleted songs from the catalog")
+
+            cursor.execute(query, params)
             rows = cursor.fetchall()
 
             if not rows:
-                logger.warning("The song catalog is empty.")
+                if params:
+                    logger.info("No more songs after the given cursor")
+                else:
+                    logger.warning("The song catalog is empty.")
                 return []
 
-            songs = [
-                {
-                    "id": row[0],
-                    "artist": row[1],
-                    "title": row[2],
-                    "year": row[3],
-                    "genre": row[4],
-                    "duration": row[5],
-                    "play_count": row[6],
-                }
-                for row in rows
-            ]
+            songs = [_song_row_to_dict(row) for row in rows]
             logger.info("Retrieved %d songs from the catalog", len(songs))
             return songs
 
@@ -257,10 +457,51 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def invalidate_live_song_ids() -> None:
+    """
+    Drops the cached array of live song IDs so the next random pick reloads it.
+    """
+    global _live_song_ids
+    with _live_song_ids_lock:
+        _live_song_ids = None
+
+@retry_on_busy
+def _get_live_song_ids() -> array:
+    """
+    Returns the IDs of all non-deleted songs in ascending order, loading them if the cache is cold or expired.
+
+    Only the ID column is read, straight from the idx_songs_live index, and it is
+    stored as a packed array of 64-bit ints rather than a list of row dicts.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    global _live_song_ids, _live_song_ids_loaded_at
+    with _live_song_ids_lock:
+        if _live_song_ids is not None and time.monotonic() - _live_song_ids_loaded_at < LIVE_SONG_IDS_TTL:
+            return _live_song_ids
+
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM songs WHERE deleted = FALSE ORDER BY id")
+                _live_song_ids = array("q", (row[0] for row in cursor.fetchall()))
+                _live_song_ids_loaded_at = time.monotonic()
+        except sqlite3.Error as e:
+            logger.error("Database error while loading live song IDs: %s", str(e))
+            raise e
+
+        logger.info("Loaded %d live song IDs", len(_live_song_ids))
+        return _live_song_ids
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
 
+    The song is picked from the cached array of live song IDs and only that row is
+    read. If the chosen song was deleted by another process since the array was
+    loaded, the array is reloaded and another pick is made.
+
     Returns:
         Song: A randomly selected Song object.
 
@@ -268,31 +509,31 @@ def get_random_song() -> Song:
         ValueError: If the catalog is empty.
     """
     try:
-        all_songs = get_all_songs()
-
-        if not all_songs:
-            logger.info("Cannot retrieve random song because the song catalog is empty.")
-            raise ValueError("The song catalog is empty.")
-
-        # Get a random index using the random.org API
-        random_index = get_random(len(all_songs))
-        logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
-
-        # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        for attempt in range(RANDOM_SONG_ATTEMPTS):
+            song_ids = _get_live_song_ids()
+
+            if not song_ids:
+                logger.info("Cannot retrieve random song because the song catalog is empty.")
+                raise ValueError("The song catalog is empty.")
+
+            # Get a random index using the random.org API
+            random_index = get_random(len(song_ids))
+            logger.info("Random index selected: %d (total songs: %d)", random_index, len(song_ids))
+
+            # Fetch the song at the random index, adjust for 0-based indexing
+            try:
+                return get_song_by_id(song_ids[random_index - 1])
+            except ValueError:
+                if attempt == RANDOM_SONG_ATTEMPTS - 1:
+                    raise
+                logger.info("Randomly selected song is gone, reloading live song IDs")
+                invalidate_live_song_ids()
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
         raise e
 
+@retry_on_busy
 def update_play_count(song_id: int) -> None:
     """
     Increments the play count of a song by song ID.
@@ -301,9 +542,15 @@ def update_play_count(song_id: int) -> None:
         song_id (int): The ID of the song whose play count should be incremented.
 
     Raises:
-        ValueError: If the song does not exist or is marked as deleted.
+        ValueError: If the song does not exist or is marked as deleted. With write-behind
+            enabled the play is only buffered and deleted songs are skipped at flush time.
         sqlite3.Error: If there is a database error.
     """
+    if play_count_buffer is not None:
+        play_count_buffer.add(song_id)
+        logger.info("Buffered play count increment for song with ID %d", song_id)
+        return
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -329,3 +576,68 @@ def update_play_count(song_id: int) -> None:
     except sqlite3.Error as e:
         logger.error("Database error while updating play count for song with ID %d: %s", song_id, str(e))
         raise e
+
+@retry_on_busy
+def update_play_counts(song_ids: List[int]) -> List[int]:
+    """
+    Increments the play counts of several songs in a single transaction.
+
+    A song ID that appears more than once is incremented once per appearance.
+
+    Args:
+        song_ids (List[int]): The IDs of the songs that were played.
+
+    Returns:
+        List[int]: The IDs that were skipped because the song does not exist or is
+            marked as deleted, in the order they were first given. With write-behind
+            enabled the plays are only buffered, deleted songs are skipped at flush
+            time, and the list is always empty.
+
+    Raises:
+        sqlite3.Error: If there is a database error. No play count is changed.
+    """
+    if play_count_buffer is not None:
+        for song_id in song_ids:
+            play_count_buffer.add(song_id)
+        logger.info("Buffered play count increments for %d songs", len(song_ids))
+        return []
+
+    counts = Counter(song_ids)
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to update play counts for %d songs", len(counts))
+
+            skipped = []
+            for song_id, count in counts.items():
+                cursor.execute("UPDATE songs SET play_count = play_count + ? WHERE id = ? AND deleted = FALSE", (count, song_id))
+                if cursor.rowcount == 0:
+                    skipped.append(song_id)
+            conn.commit()
+
+            if skipped:
+                logger.warning("Skipped play counts for deleted or missing songs: %s", skipped)
+            logger.info("Play counts incremented for %d songs", len(counts) - len(skipped))
+            return skipped
+
+    except sqlite3.Error as e:
+        logger.error("Database error while updating play counts: %s", str(e))
+        raise e
+
+def flush_play_counts() -> int:
+    """
+    Writes any buffered play counts to the database. Does nothing without write-behind.
+
+    Returns:
+        int: The number of song rows updated.
+    """
+    if play_count_buffer is None:
+        return 0
+    return play_count_buffer.flush()
+
+def shutdown_play_count_buffer() -> None:
+    """
+    Stops the write-behind buffer and flushes it. Registered to run at process exit.
+    """
+    if play_count_buffer is not None:
+        play_count_buffer.shutdown()
@@ -1,5 +1,13 @@
+import bisect
 import logging
+import os
+import secrets
+import threading
+import time
+from typing import List, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from music_collection.utils.logger import configure_logger
 
@@ -7,10 +15,206 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# circuit breaker settings for random.org
+RANDOM_FAILURE_THRESHOLD = int(os.getenv("RANDOM_FAILURE_THRESHOLD", "5"))
+RANDOM_SLOW_CALL_SECONDS = float(os.getenv("RANDOM_SLOW_CALL_SECONDS", "1.0"))
+RANDOM_RESET_TIMEOUT = float(os.getenv("RANDOM_RESET_TIMEOUT", "30"))
+
+
+class CircuitBreaker:
+    """
+    Stops calling random.org after repeated failures or slow responses.
+
+    The breaker opens after `failure_threshold` consecutive bad calls, where a bad
+    call is an error or a response slower than `slow_call_seconds`. While open,
+    callers use local randomness. After `reset_timeout` seconds one trial call is
+    let through (half-open): success closes the breaker, failure opens it again.
+
+    Attributes:
+        failure_threshold (int): The number of consecutive bad calls that opens the breaker.
+        slow_call_seconds (float): Calls slower than this count as bad.
+        reset_timeout (float): The number of seconds the breaker stays open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = RANDOM_FAILURE_THRESHOLD,
+                 slow_call_seconds: float = RANDOM_SLOW_CALL_SECONDS, reset_timeout: float = RANDOM_RESET_TIMEOUT):
+        """
+        Initializes a closed circuit breaker.
+
+        Args:
+            failure_threshold (int, optional): The number of consecutive bad calls that opens the breaker.
+            slow_call_seconds (float, optional): The latency above which a call counts as bad.
+            reset_timeout (float, optional): The number of seconds to stay open before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Closes the breaker and clears its counters.
+        """
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = 0.0
+            self._trial_in_flight = False
+            self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """
+        Returns the current state, moving from open to half-open once the timeout has passed.
+        """
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Checks whether a call to random.org may be made now.
+
+        Returns:
+            bool: True if the breaker is closed, or half-open with no trial call running.
+        """
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, success: bool, latency: float) -> None:
+        """
+        Records the outcome of a call.
+
+        Args:
+            success (bool): Whether the call returned a valid result.
+            latency (float): The call's duration in seconds.
+        """
+        bad = not success or latency > self.slow_call_seconds
+        with self._lock:
+            self._trial_in_flight = False
+            if not bad:
+                self._consecutive_failures = 0
+                if self._state != self.CLOSED:
+                    logger.info("random.org circuit breaker closed")
+                self._state = self.CLOSED
+                return
+
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning("random.org circuit breaker opened after %d bad calls", self._consecutive_failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket histogram of call latencies.
+
+    Attributes:
+        buckets (list[float]): The upper bounds of the buckets in seconds; a final
+            overflow bucket catches everything slower.
+    """
+
+    DEFAULT_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        """
+        Initializes an empty histogram.
+
+        Args:
+            buckets (list[float], optional): The bucket upper bounds in seconds.
+        """
+        self.buckets = sorted(buckets or self.DEFAULT_BUCKETS)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears all recorded latencies.
+        """
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._total = 0.0
+            self._max = 0.0
+
+    def observe(self, latency: float) -> None:
+        """
+        Records a latency.
+
+        Args:
+            latency (float): The latency in seconds.
+        """
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, latency)] += 1
+            self._total += latency
+            self._max = max(self._max, latency)
+
+    def snapshot(self) -> dict:
+        """
+        Returns the bucket counts, the number of calls, and the mean and max latency in seconds.
+        """
+        with self._lock:
+            count = sum(self._counts)
+            labels = [f"le_{bound}" for bound in self.buckets] + ["inf"]
+            return {
+                "buckets": dict(zip(labels, self._counts)),
+                "count": count,
+                "mean": self._total / count if count else 0.0,
+                "max": self._max,
+            }
+
+
+def _create_session() -> requests.Session:
+    """
+    Creates the keep-alive session used for all random.org requests.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=int(os.getenv("RANDOM_POOL_MAXSIZE", "10"))))
+    return session
+
+
+session = _create_session()
+circuit_breaker = CircuitBreaker()
+latency_histogram = LatencyHistogram()
+fallback_count = 0
+_fallback_lock = threading.Lock()
+
+
+def get_local_random(num_songs: int) -> int:
+    """
+    Returns a random int between 1 and num_songs from the local CSPRNG.
+
+    Args:
+        num_songs (int): The upper bound (inclusive).
+
+    Returns:
+        int: The random number.
+    """
+    global fallback_count
+    with _fallback_lock:
+        fallback_count += 1
+    return secrets.randbelow(num_songs) + 1
+
 def get_random(num_songs: int) -> int:
     """
     Fetches a random int between 1 and the number of songs in the catalog from random.org.
 
+    While the circuit breaker is open the number comes from the local CSPRNG instead.
+
     Returns:
         int: The random number fetched from random.org.
 
@@ -18,13 +222,20 @@ def get_random(num_songs: int) -> int:
         RuntimeError: If the request to random.org fails or returns an invalid response.
         ValueError: If the response from random.org is not a valid float.
     """
+    if not circuit_breaker.allow_request():
+        random_number = get_local_random(num_songs)
+        logger.info("random.org circuit breaker is open, using local random number: %d", random_number)
+        return random_number
+
     url = f"https://www.random.org/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
 
+    start = time.monotonic()
+    success = False
     try:
         # Log the request to random.org
         logger.info("Fetching random number from %s", url)
 
-        response = requests.get(url, timeout=5)
+        response = session.get(url, timeout=5)
 
         # Check if the request was successful
         response.raise_for_status()
@@ -37,6 +248,7 @@ def get_random(num_songs: int) -> int:
             raise ValueError("Invalid response from random.org: %s" % random_number_str)
 
         logger.info("Received random number: %.3f", random_number)
+        success = True
         return random_number
 
     except requests.exceptions.Timeout:
@@ -46,3 +258,18 @@ def get_random(num_songs: int) -> int:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+    finally:
+        latency = time.monotonic() - start
+        latency_histogram.observe(latency)
+        circuit_breaker.record(success, latency)
+
+def get_random_stats() -> dict:
+    """
+    Returns the random.org latency histogram, the circuit breaker state and the fallback count.
+    """
+    return {
+        "circuit_breaker": {"state": circuit_breaker.state, "times_opened": circuit_breaker.times_opened},
+        "latency": latency_histogram.snapshot(),
+        "local_fallbacks": fallback_count,
+    }
@@ -1,7 +1,13 @@
 from contextlib import contextmanager
+from functools import wraps
 import logging
 import os
+import random
+import re
 import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 from music_collection.utils.logger import configure_logger
 
@@ -13,6 +19,67 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/song_catalog.db")
 
+# versioned schema migrations, named NNN_description.sql
+SQL_MIGRATIONS_PATH = os.getenv("SQL_MIGRATIONS_PATH", "/app/sql/migrations")
+
+# maximum number of idle connections kept open between requests
+DB_MAX_IDLE_CONNECTIONS = int(os.getenv("DB_MAX_IDLE_CONNECTIONS", "8"))
+
+# Pragmas applied to every new connection, in this order. busy_timeout comes first
+# so that switching the journal mode waits for other writers instead of failing.
+PRAGMA_NAMES = (
+    "busy_timeout", "journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "wal_autocheckpoint"
+)
+
+PRAGMA_PROFILES: Dict[str, Dict[str, Union[int, str]]] = {
+    # SQLite's own defaults, only the busy timeout is raised
+    "default": {
+        "busy_timeout": 5000,
+    },
+    # rollback journal with fewer fsyncs and a larger page cache
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # negative values are KiB, so 16 MiB
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+    },
+    # trades durability on power loss for write throughput
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "TRUNCATE",
+        "synchronous": "OFF",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # write-ahead log: readers never wait for play count writes. SQLite's own
+    # checkpoint-on-commit is turned off, the CheckpointManager below runs them.
+    "wal": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 0,
+    },
+}
+
+DB_PRAGMA_PROFILE = os.getenv("DB_PRAGMA_PROFILE", "balanced")
+
+# WAL checkpoint thresholds, used only when the journal mode is WAL
+DB_WAL_CHECKPOINT_BYTES = int(os.getenv("DB_WAL_CHECKPOINT_BYTES", str(4 * 1024 * 1024)))
+DB_WAL_CHECKPOINT_INTERVAL = float(os.getenv("DB_WAL_CHECKPOINT_INTERVAL", "30"))
+
+# retry policy for SQLITE_BUSY / "database is locked" errors
+DB_BUSY_RETRIES = int(os.getenv("DB_BUSY_RETRIES", "5"))
+DB_BUSY_BACKOFF_BASE = float(os.getenv("DB_BUSY_BACKOFF_BASE", "0.01"))
+DB_BUSY_BACKOFF_MAX = float(os.getenv("DB_BUSY_BACKOFF_MAX", "0.5"))
+
+F = TypeVar("F", bound=Callable)
+
 
 def check_database_connection():
     """Check the database connection
@@ -50,22 +117,430 @@ def check_table_exists(tablename: str):
         logger.error(error_message)
         raise Exception(error_message) from e
 
+def resolve_pragmas(profile: str = DB_PRAGMA_PROFILE) -> Dict[str, Union[int, str]]:
+    """Build the pragma settings for a profile, applying environment overrides.
+
+    Every pragma can be overridden individually with a DB_PRAGMA_<NAME> environment
+    variable, e.g. DB_PRAGMA_CACHE_SIZE=-32000.
+
+    Args:
+        profile (str): The name of a profile in PRAGMA_PROFILES.
+
+    Returns:
+        dict: The pragma names and values, in the order they should be applied.
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown pragma profile: {profile}. Must be one of {sorted(PRAGMA_PROFILES)}.")
+
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    for name in PRAGMA_NAMES:
+        override = os.getenv(f"DB_PRAGMA_{name.upper()}")
+        if override is not None:
+            pragmas[name] = int(override) if override.lstrip("-").isdigit() else override
+
+    return {name: pragmas[name] for name in PRAGMA_NAMES if name in pragmas}
+
+
+def is_busy_error(error: Exception) -> bool:
+    """Check whether an error was caused by SQLITE_BUSY / SQLITE_LOCKED.
+
+    The message is checked rather than the type because some callers re-raise
+    OperationalError as a plain sqlite3.Error with the original text.
+
+    Args:
+        error (Exception): The error to check.
+
+    Returns:
+        bool: True if retrying the operation may succeed.
+    """
+    message = str(error).lower()
+    return isinstance(error, sqlite3.Error) and ("database is locked" in message or "database is busy" in message
+                                                 or "database table is locked" in message)
+
+def retry_on_busy(func: F) -> F:
+    """Decorator that retries a database operation when SQLite reports it is busy.
+
+    Waits use exponential backoff with full jitter so that competing writers do
+    not retry in lockstep. The whole operation is retried; this is safe because a
+    failed operation's connection is rolled back when it is released.
+
+    Args:
+        func (Callable): The function to wrap.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(DB_BUSY_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.Error as e:
+                if not is_busy_error(e) or attempt == DB_BUSY_RETRIES:
+                    raise
+                delay = random.uniform(0, min(DB_BUSY_BACKOFF_MAX, DB_BUSY_BACKOFF_BASE * 2 ** attempt))
+                logger.warning("Database busy in %s, retrying in %.3fs (attempt %d of %d)",
+                               func.__name__, delay, attempt + 1, DB_BUSY_RETRIES)
+                time.sleep(delay)
+    return wrapper
+
+
+class CheckpointManager:
+    """
+    Runs PASSIVE WAL checkpoints once the log grows past a size or age threshold.
+
+    A PASSIVE checkpoint copies as many frames as it can without waiting on
+    readers or writers, so it never blocks requests.
+
+    Attributes:
+        db_path (str): The path to the SQLite database.
+        max_wal_bytes (int): Checkpoint once the -wal file is at least this large.
+        interval (float): Checkpoint once this many seconds passed since the last one.
+    """
+
+    def __init__(self, db_path: str, max_wal_bytes: int = DB_WAL_CHECKPOINT_BYTES,
+                 interval: float = DB_WAL_CHECKPOINT_INTERVAL):
+        """
+        Initializes the checkpoint manager.
+
+        Args:
+            db_path (str): The path to the SQLite database.
+            max_wal_bytes (int, optional): The WAL size threshold in bytes.
+            interval (float, optional): The checkpoint interval in seconds.
+        """
+        self.db_path = db_path
+        self.max_wal_bytes = max_wal_bytes
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._last_checkpoint = time.monotonic()
+        self._stats = {"checkpoints": 0, "frames_checkpointed": 0, "last_wal_frames": 0}
+
+    def wal_size(self) -> int:
+        """
+        Returns the size of the -wal file in bytes, or 0 if it does not exist.
+        """
+        try:
+            return os.path.getsize(f"{self.db_path}-wal")
+        except OSError:
+            return 0
+
+    def checkpoint(self, conn: sqlite3.Connection, mode: str = "PASSIVE") -> dict:
+        """
+        Runs a WAL checkpoint on the given connection.
+
+        Args:
+            conn (sqlite3.Connection): The connection to run the checkpoint on.
+            mode (str, optional): PASSIVE, FULL, RESTART or TRUNCATE. Defaults to PASSIVE.
+
+        Returns:
+            dict: Whether the checkpoint was blocked, the frames in the log and the frames checkpointed.
+
+        Raises:
+            ValueError: If the mode is invalid.
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        with self._lock:
+            self._last_checkpoint = time.monotonic()
+            self._stats["checkpoints"] += 1
+            self._stats["frames_checkpointed"] += max(checkpointed, 0)
+            self._stats["last_wal_frames"] = log_frames
+        logger.info("WAL checkpoint (%s): busy=%d, log frames=%d, checkpointed=%d", mode, busy, log_frames, checkpointed)
+        return {"busy": bool(busy), "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+    def maybe_checkpoint(self, conn: sqlite3.Connection) -> None:
+        """
+        Runs a PASSIVE checkpoint if the WAL is over the size threshold or the
+        interval has elapsed. Called after a connection committed a write.
+
+        Args:
+            conn (sqlite3.Connection): The connection that just wrote.
+        """
+        with self._lock:
+            due = time.monotonic() - self._last_checkpoint >= self.interval
+        if not due and self.wal_size() < self.max_wal_bytes:
+            return
+        try:
+            self.checkpoint(conn)
+        except sqlite3.Error as e:
+            # a failed checkpoint is retried after the next write, it must not fail the request
+            logger.warning("WAL checkpoint failed: %s", str(e))
+
+    def get_stats(self) -> dict:
+        """
+        Returns the checkpoint counters and the current WAL size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wal_bytes"] = self.wal_size()
+        return stats
+
+
+class ConnectionManager:
+    """
+    Hands out reusable SQLite connections that have a pragma profile applied.
+
+    Connections are opened lazily, configured once, and returned to an idle list
+    after use instead of being closed. At most `max_idle` connections are kept;
+    any surplus is closed when it is released.
+
+    Attributes:
+        db_path (str): The path to the SQLite database.
+        pragmas (dict): The pragma settings applied to each new connection.
+        max_idle (int): The maximum number of idle connections kept open.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Union[int, str]]] = None,
+                 max_idle: int = DB_MAX_IDLE_CONNECTIONS):
+        """
+        Initializes the manager without opening any connections.
+
+        Args:
+            db_path (str): The path to the SQLite database.
+            pragmas (dict, optional): The pragma settings. Defaults to the DB_PRAGMA_PROFILE profile.
+            max_idle (int, optional): The maximum number of idle connections kept open.
+        """
+        self.db_path = db_path
+        self.pragmas = pragmas if pragmas is not None else resolve_pragmas()
+        self.max_idle = max_idle
+
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "reused": 0, "closed": 0, "in_use": 0}
+
+        self.checkpointer: Optional[CheckpointManager] = None
+        if str(self.pragmas.get("journal_mode", "")).upper() == "WAL":
+            self.checkpointer = CheckpointManager(db_path)
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Opens a new connection and applies the pragma profile to it.
+
+        Returns:
+            sqlite3.Connection: The configured connection.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        logger.info("Opened database connection with pragmas %s", self.pragmas)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Returns an idle connection, or opens a new one if none is available.
+
+        Returns:
+            sqlite3.Connection: A configured connection owned by the caller until released.
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._stats["in_use"] += 1
+            if conn is not None:
+                self._stats["reused"] += 1
+                return conn
+
+        try:
+            conn = self._open()
+        except sqlite3.Error:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            raise
+
+        with self._lock:
+            self._stats["opened"] += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a connection to the idle list, rolling back any open transaction.
+
+        Args:
+            conn (sqlite3.Connection): The connection to release.
+        """
+        keep = True
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error as e:
+                logger.warning("Dropping connection that failed to roll back: %s", str(e))
+                keep = False
+
+        with self._lock:
+            self._stats["in_use"] -= 1
+            if keep and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._stats["closed"] += 1
+
+        conn.close()
+
+    def close_all(self) -> None:
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats["closed"] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def get_stats(self) -> dict:
+        """
+        Returns the connection counters and the active pragma settings.
+
+        Returns:
+            dict: The opened/reused/closed/in_use counters, the idle count and the pragmas.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        stats["pragmas"] = dict(self.pragmas)
+        if self.checkpointer is not None:
+            stats["wal"] = self.checkpointer.get_stats()
+        return stats
+
+
+_manager: Optional[ConnectionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager() -> ConnectionManager:
+    """
+    Returns the process-wide connection manager, creating it on first use.
+
+    Returns:
+        ConnectionManager: The shared connection manager.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(DB_PATH)
+    return _manager
+
+def reset_connection_manager() -> None:
+    """
+    Closes the shared connection manager's connections and discards it, so the
+    next call to get_db_connection picks up a new DB_PATH or pragma profile.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close_all()
+            _manager = None
+
 @contextmanager
 def get_db_connection():
     """
     Context manager for SQLite database connection.
 
+    The connection comes from the shared ConnectionManager and is returned to it,
+    not closed, when the block exits.
+
     Yields:
         sqlite3.Connection: The SQLite connection object.
     """
+    manager = get_connection_manager()
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = manager.acquire()
+        changes_before = conn.total_changes
         yield conn
+        if manager.checkpointer is not None and conn.total_changes != changes_before and not conn.in_transaction:
+            manager.checkpointer.maybe_checkpoint(conn)
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
         if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+            manager.release(conn)
+
+def checkpoint_wal(mode: str = "PASSIVE") -> dict:
+    """
+    Runs a WAL checkpoint on demand.
+
+    Args:
+        mode (str, optional): The checkpoint mode. Defaults to PASSIVE.
+
+    Returns:
+        dict: The checkpoint result.
+
+    Raises:
+        ValueError: If the database is not in WAL mode or the mode is invalid.
+    """
+    manager = get_connection_manager()
+    if manager.checkpointer is None:
+        logger.error("Checkpoint requested but the database is not in WAL mode")
+        raise ValueError("The database is not in WAL mode (set DB_PRAGMA_PROFILE=wal)")
+    with get_db_connection() as conn:
+        return manager.checkpointer.checkpoint(conn, mode)
+
+
+def get_migrations(path: Optional[str] = None) -> List[Tuple[int, str]]:
+    """
+    Lists the migration scripts in a directory, ordered by version.
+
+    Args:
+        path (str, optional): The migrations directory. Defaults to SQL_MIGRATIONS_PATH.
+
+    Returns:
+        list[tuple[int, str]]: The version number and path of each NNN_description.sql file.
+    """
+    path = path or SQL_MIGRATIONS_PATH
+    migrations = []
+    for filename in os.listdir(path):
+        match = re.match(r"^(\d+)_.*\.sql$", filename)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(path, filename)))
+    return sorted(migrations)
+
+def apply_migrations(conn: Optional[sqlite3.Connection] = None, path: Optional[str] = None) -> int:
+    """
+    Applies every migration newer than the database's schema version.
+
+    The schema version is kept in PRAGMA user_version and each migration runs in
+    its own transaction together with the version bump. The create table script
+    resets the version to 0, so the migrations run again after clear_catalog.
+
+    Args:
+        conn (sqlite3.Connection, optional): The connection to use. Defaults to a pooled connection.
+        path (str, optional): The migrations directory. Defaults to SQL_MIGRATIONS_PATH.
+
+    Returns:
+        int: The schema version after applying the migrations.
+
+    Raises:
+        sqlite3.Error: If a migration fails. Earlier migrations stay applied.
+    """
+    if conn is None:
+        with get_db_connection() as conn:
+            return apply_migrations(conn, path)
+
+    try:
+        current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, filename in get_migrations(path):
+            if version <= current_version:
+                continue
+            with open(filename, "r") as fh:
+                script = fh.read()
+            logger.info("Applying migration %s", os.path.basename(filename))
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+            current_version = version
+        return current_version
+
+    except sqlite3.Error as e:
+        logger.error("Database error while applying migrations: %s", str(e))
+        if conn.in_transaction:
+            conn.rollback()
+        raise e
@@ -1,3 +1,5 @@
+-- Recreating the table drops its indexes, so start the migrations over
+PRAGMA user_version = 0;
 DROP TABLE IF EXISTS songs;
 CREATE TABLE songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -0,0 +1,6 @@
+-- Partial indexes over the live (non-deleted) songs. The first one serves the
+-- catalog listing in id order, the second the play count leaderboard without a sort.
+-- The WHERE clauses must match the query text exactly (deleted = FALSE, not 0)
+-- for SQLite to use a partial index.
+CREATE INDEX IF NOT EXISTS idx_songs_live ON songs (id) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS idx_songs_play_count ON songs (play_count DESC, id) WHERE deleted = FALSE;
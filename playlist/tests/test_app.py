@@ -0,0 +1,85 @@
+import json
+import sqlite3
+
+import pytest
+
+from app import app
+from music_collection.models import song_model
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def client():
+    """Fixture providing a Flask test client."""
+    app.config["TESTING"] = True
+    return app.test_client()
+
+def song_dict(song_id: int) -> dict:
+    return {"id": song_id, "artist": f"Artist {song_id}", "title": f"Song {song_id}", "year": 2000,
+            "genre": "Pop", "duration": 180, "play_count": song_id}
+
+
+######################################################
+#
+#    Catalog listing
+#
+######################################################
+
+@pytest.mark.parametrize("query", ["limit=abc", "after_id=1.5", "format=xml", "limit=0",
+                                   "format=ndjson&limit=abc", "format=ndjson&sort_by_play_count=true&after_id=3"])
+def test_get_all_songs_bad_parameters(client, query):
+    """Test that an invalid parameter gets a 400 in both formats instead of being ignored."""
+    response = client.get(f"/api/get-all-songs-from-catalog?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+def test_get_all_songs_ndjson_paginates(client, mocker):
+    """Test that limit and the cursor are passed on to the stream."""
+    mock_iter = mocker.patch("music_collection.models.song_model.iter_songs",
+                             return_value=iter([song_dict(4), song_dict(5)]))
+
+    response = client.get("/api/get-all-songs-from-catalog?format=ndjson&sort_by_play_count=true"
+                          "&limit=2&after_id=3&after_play_count=3")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in response.data.decode().splitlines()] == [4, 5]
+    mock_iter.assert_called_once_with(sort_by_play_count=True, limit=2, after_id=3, after_play_count=3)
+
+def test_get_all_songs_ndjson_query_error(client, mocker):
+    """Test that a query failing before the first row still gets a 500."""
+    mocker.patch("music_collection.models.song_model.iter_songs",
+                 side_effect=lambda **kwargs: (_ for _ in ()).throw(sqlite3.OperationalError("no such table: songs")))
+
+    response = client.get("/api/get-all-songs-from-catalog?format=ndjson")
+
+    assert response.status_code == 500
+    assert "no such table" in response.get_json()["error"]
+
+def test_get_all_songs_ndjson_error_mid_stream(client, mocker):
+    """Test that a failure after the stream started ends the body with an error line."""
+    def songs(**kwargs):
+        yield song_dict(1)
+        raise sqlite3.OperationalError("disk I/O error")
+    mocker.patch("music_collection.models.song_model.iter_songs", side_effect=songs)
+
+    response = client.get("/api/get-all-songs-from-catalog?format=ndjson")
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert response.status_code == 200
+    assert lines == [song_dict(1), {"error": "disk I/O error"}]
+
+def test_get_all_songs_ndjson_empty(client, mocker):
+    """Test streaming an empty catalog."""
+    mocker.patch("music_collection.models.song_model.iter_songs", return_value=iter([]))
+
+    response = client.get("/api/get-all-songs-from-catalog?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.data == b""
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+import sqlite3
+
+import pytest
+
+from music_collection.models import song_model
+from music_collection.models.play_count_buffer import PlayCountBuffer
+
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """Fixture providing a real songs table that the buffer flushes into."""
+    conn = sqlite3.connect(str(tmp_path / "songs.db"), check_same_thread=False)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, play_count INTEGER DEFAULT 0, deleted BOOLEAN DEFAULT FALSE)")
+    conn.executemany("INSERT INTO songs (id, deleted) VALUES (?, ?)", [(1, False), (2, False), (3, True)])
+    conn.commit()
+
+    @contextmanager
+    def mock_get_db_connection():
+        yield conn
+
+    mocker.patch("music_collection.models.play_count_buffer.get_db_connection", mock_get_db_connection)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def buffer():
+    """Fixture to provide a buffer that only flushes when asked to."""
+    buffer = PlayCountBuffer(max_pending=100, flush_interval=3600)
+    yield buffer
+    buffer._stop.set()
+
+def play_counts(conn):
+    return dict(conn.execute("SELECT id, play_count FROM songs").fetchall())
+
+
+def test_plays_are_coalesced(songs_db, buffer):
+    """Test that repeated plays of a song become a single increment."""
+    for _ in range(3):
+        buffer.add(1)
+    buffer.add(2)
+
+    assert buffer.pending() == {1: 3, 2: 1}
+    assert play_counts(songs_db)[1] == 0
+
+    assert buffer.flush() == 2
+    assert play_counts(songs_db) == {1: 3, 2: 1, 3: 0}
+    assert buffer.pending() == {}
+
+def test_flush_when_full(songs_db):
+    """Test that reaching max_pending flushes without waiting for the timer."""
+    buffer = PlayCountBuffer(max_pending=2, flush_interval=3600)
+    buffer.add(1)
+    buffer.add(2)
+    buffer._stop.set()
+
+    assert play_counts(songs_db)[1] == 1
+    assert buffer.get_stats()["flushes"] == 1
+
+def test_deleted_songs_skipped(songs_db, buffer):
+    """Test that plays of deleted songs are dropped at flush time."""
+    buffer.add(3)
+    buffer.add(1)
+
+    assert buffer.flush() == 1
+    assert play_counts(songs_db)[3] == 0
+    assert buffer.get_stats()["rows_skipped"] == 1
+
+def test_failed_flush_keeps_plays(songs_db, buffer, mocker):
+    """Test that plays survive a failed flush."""
+    buffer.add(1)
+    mocker.patch.object(buffer, "_write", side_effect=sqlite3.OperationalError("disk I/O error"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        buffer.flush()
+
+    assert buffer.pending() == {1: 1}
+
+def test_shutdown_flushes(songs_db, buffer):
+    """Test that shutting down writes what is still buffered."""
+    buffer.add(2)
+    buffer.shutdown()
+    assert play_counts(songs_db)[2] == 1
+
+def test_get_all_songs_merges_pending(mocker, buffer):
+    """Test that the catalog listing includes buffered plays and re-sorts by them."""
+    mocker.patch.object(song_model, "play_count_buffer", buffer)
+    mocker.patch.object(song_model, "_fetch_all_songs", return_value=[
+        {"id": 1, "artist": "A", "title": "A", "year": 2020, "genre": "Pop", "duration": 100, "play_count": 5},
+        {"id": 2, "artist": "B", "title": "B", "year": 2020, "genre": "Pop", "duration": 100, "play_count": 4},
+    ])
+    buffer.add(2)
+    buffer.add(2)
+
+    songs = song_model.get_all_songs(sort_by_play_count=True)
+    assert [(song["id"], song["play_count"]) for song in songs] == [(2, 6), (1, 5)]
+
+def test_update_play_count_buffers(mocker, buffer):
+    """Test that update_play_count only buffers the play when write-behind is on."""
+    mocker.patch.object(song_model, "play_count_buffer", buffer)
+    mock_get_db_connection = mocker.patch("music_collection.models.song_model.get_db_connection")
+
+    song_model.update_play_count(7)
+
+    assert buffer.pending() == {7: 1}
+    mock_get_db_connection.assert_not_called()
@@ -0,0 +1,186 @@
+import random
+
+import pytest
+
+from music_collection.models.playlist_backends import IndexedSongList, TreapSongList
+from music_collection.models.song_model import Song
+
+
+def make_songs(count: int) -> list[Song]:
+    return [Song(i, f"Artist {i}", f"Song {i}", 2000, "Pop", 100 + i) for i in range(1, count + 1)]
+
+def assert_index_consistent(songs) -> None:
+    """Check the ID lookups against the sequence contents."""
+    for position, song in enumerate(songs):
+        assert songs.contains_id(song.id)
+        assert songs.get_by_id(song.id) is song
+        assert songs.index_of_id(song.id) == position
+        assert songs[position] is song
+    assert sum(1 for _ in songs) == len(songs)
+    assert_durations_consistent(songs)
+
+def assert_durations_consistent(songs) -> None:
+    """Check the duration queries against sums over the sequence contents."""
+    durations = [song.duration for song in songs]
+    assert songs.total_duration() == sum(durations)
+    elapsed = 0
+    for position, duration in enumerate(durations):
+        assert songs.duration_before(position) == elapsed
+        assert songs.index_at_offset(elapsed) == position
+        assert songs.index_at_offset(elapsed + duration - 1) == position
+        elapsed += duration
+
+@pytest.fixture(params=[IndexedSongList, TreapSongList])
+def songs(request):
+    """Fixture to provide five indexed songs, once per backend."""
+    return request.param(make_songs(5))
+
+
+##################################################
+# Index Consistency Test Cases
+##################################################
+
+def test_lookups(songs):
+    """Test looking songs up by ID."""
+    assert songs.contains_id(3)
+    assert not songs.contains_id(99)
+    assert songs.get_by_id(3).title == "Song 3"
+    assert songs.get_by_id(99) is None
+    assert songs.index_of_id(3) == 2
+
+def test_index_of_missing_id(songs):
+    """Test error when asking for the position of a song that is not in the list."""
+    with pytest.raises(KeyError):
+        songs.index_of_id(99)
+
+def test_append_and_extend(songs):
+    """Test that appended songs are indexed."""
+    songs.index_of_id(1)
+    extra = make_songs(8)[5:]
+    songs.append(extra[0])
+    songs.extend(extra[1:])
+    assert_index_consistent(songs)
+
+def test_insert_and_pop(songs):
+    """Test that positions shift correctly after inserts and pops in the middle."""
+    songs.index_of_id(1)
+    song = songs.pop(1)
+    songs.insert(3, song)
+    assert [s.id for s in songs] == [1, 3, 4, 2, 5]
+    assert_index_consistent(songs)
+
+    songs.pop()
+    assert not songs.contains_id(5)
+    assert_index_consistent(songs)
+
+def test_swap(songs):
+    """Test that swapping updates both positions."""
+    songs.index_of_id(1)
+    songs.swap(0, 4)
+    assert [s.id for s in songs] == [5, 2, 3, 4, 1]
+    assert_index_consistent(songs)
+
+def test_item_assignment(songs):
+    """Test that direct assignment keeps the index consistent."""
+    songs[0] = Song(42, "Artist 42", "Song 42", 2000, "Pop", 100)
+    assert not songs.contains_id(1)
+    del songs[1]
+    assert [s.id for s in songs] == [42, 3, 4, 5]
+    assert_index_consistent(songs)
+
+def test_slice_assignment():
+    """Test that slice deletion keeps the list index consistent."""
+    songs = IndexedSongList(make_songs(5))
+    songs[0] = Song(42, "Artist 42", "Song 42", 2000, "Pop", 100)
+    del songs[1:3]
+    assert [s.id for s in songs] == [42, 4, 5]
+    assert_index_consistent(songs)
+
+def test_remove_and_clear(songs):
+    """Test that removed and cleared songs leave the index."""
+    songs.remove(songs.get_by_id(2))
+    assert_index_consistent(songs)
+    songs.clear()
+    assert not songs.contains_id(1)
+    assert_index_consistent(songs)
+
+
+##################################################
+# Duration Test Cases
+##################################################
+
+def test_durations(songs):
+    """Test prefix durations and time-offset lookups (durations are 101 to 105 seconds)."""
+    assert songs.total_duration() == 515
+    assert songs.duration_before(2) == 203
+    assert songs.index_at_offset(0) == 0
+    assert songs.index_at_offset(202) == 1
+    assert songs.index_at_offset(203) == 2
+    assert songs.index_at_offset(514) == 4
+
+@pytest.mark.parametrize("offset", [-1, 515])
+def test_index_at_invalid_offset(songs, offset):
+    """Test error when the offset is outside the playlist."""
+    with pytest.raises(ValueError, match=f"Invalid time offset: {offset}"):
+        songs.index_at_offset(offset)
+
+def test_durations_follow_mutations(songs):
+    """Test that the duration queries stay correct as songs are added, moved and removed."""
+    assert_durations_consistent(songs)
+    songs.append(Song(6, "Artist 6", "Song 6", 2000, "Pop", 300))
+    assert_durations_consistent(songs)
+    songs.swap(0, 5)
+    assert_durations_consistent(songs)
+    songs.insert(0, songs.pop(3))
+    assert_durations_consistent(songs)
+    songs.pop()
+    assert_durations_consistent(songs)
+    songs.clear()
+    assert songs.total_duration() == 0
+
+
+##################################################
+# Treap Test Cases
+##################################################
+
+@pytest.mark.parametrize("backend", [IndexedSongList, TreapSongList])
+def test_backend_matches_list_under_random_operations(backend):
+    """Test that a backend stays in step with a plain list through a random mix of operations."""
+    rng = random.Random(7)
+    expected = make_songs(200)
+    songs = backend(expected)
+
+    for step in range(2000):
+        operation = rng.choice(["move", "pop", "insert", "swap"])
+        if operation == "move" and expected:
+            song = expected[rng.randrange(len(expected))]
+            target = rng.randrange(len(expected))
+            expected.remove(song)
+            expected.insert(target, song)
+            songs.insert(target, songs.pop(songs.index_of_id(song.id)))
+        elif operation == "pop" and expected:
+            index = rng.randrange(len(expected))
+            assert songs.pop(index) is expected.pop(index)
+        elif operation == "insert":
+            song = Song(1000 + step, "Artist", f"Song {step}", 2000, "Pop", rng.randint(60, 600))
+            index = rng.randrange(len(expected) + 1)
+            expected.insert(index, song)
+            songs.insert(index, song)
+        elif operation == "swap" and len(expected) > 1:
+            i, j = rng.randrange(len(expected)), rng.randrange(len(expected))
+            expected[i], expected[j] = expected[j], expected[i]
+            songs.swap(i, j)
+        if step % 100 == 0:
+            assert songs.total_duration() == sum(song.duration for song in expected)
+
+    assert list(songs) == expected
+    assert_index_consistent(songs)
+
+def test_treap_out_of_range():
+    """Test error when getting or popping past the end of the treap."""
+    songs = TreapSongList(make_songs(3))
+    with pytest.raises(IndexError):
+        songs[3]
+    with pytest.raises(IndexError):
+        songs.pop(-4)
+    assert songs[-1].id == 3
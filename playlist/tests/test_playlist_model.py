@@ -4,16 +4,21 @@ from music_collection.models.playlist_model import PlaylistModel
 from music_collection.models.song_model import Song
 
 
-@pytest.fixture()
-def playlist_model():
-    """Fixture to provide a new instance of PlaylistModel for each test."""
-    return PlaylistModel()
+@pytest.fixture(params=["list", "tree"])
+def playlist_model(request):
+    """Fixture to provide a new instance of PlaylistModel for each test, once per backend."""
+    return PlaylistModel(backend=request.param)
 
 @pytest.fixture
 def mock_update_play_count(mocker):
     """Mock the update_play_count function for testing purposes."""
     return mocker.patch("music_collection.models.playlist_model.update_play_count")
 
+@pytest.fixture
+def mock_update_play_counts(mocker):
+    """Mock the bulk update_play_counts function for testing purposes."""
+    return mocker.patch("music_collection.models.playlist_model.update_play_counts", return_value=[])
+
 """Fixtures providing sample songs for the tests."""
 @pytest.fixture
 def sample_song1():
@@ -32,6 +37,11 @@ def sample_playlist(sample_song1, sample_song2):
 # Add Song Management Test Cases
 ##################################################
 
+def test_unknown_backend():
+    """Test error when constructing a playlist with an unknown backend."""
+    with pytest.raises(ValueError, match="Unknown playlist backend: heap"):
+        PlaylistModel(backend="heap")
+
 def test_add_song_to_playlist(playlist_model, sample_song1):
     """Test adding a song to the playlist."""
     playlist_model.add_song_to_playlist(sample_song1)
@@ -181,6 +191,18 @@ def test_get_playlist_duration(playlist_model, sample_playlist):
     playlist_model.playlist.extend(sample_playlist)
     assert playlist_model.get_playlist_duration() == 335, "Expected playlist duration to be 360 seconds"
 
+def test_get_remaining_duration(playlist_model, sample_playlist):
+    """Test getting the duration from the current track to the end of the playlist."""
+    playlist_model.playlist.extend(sample_playlist)
+    assert playlist_model.get_remaining_duration() == 335
+    playlist_model.go_to_track_number(2)
+    assert playlist_model.get_remaining_duration() == 155
+
+def test_get_remaining_duration_empty_playlist(playlist_model):
+    """Test error when getting the remaining duration of an empty playlist."""
+    with pytest.raises(ValueError, match="Playlist is empty"):
+        playlist_model.get_remaining_duration()
+
 ##################################################
 # Utility Function Test Cases
 ##################################################
@@ -283,21 +305,35 @@ def test_go_to_track_number(playlist_model, sample_playlist):
     playlist_model.go_to_track_number(2)
     assert playlist_model.current_track_number == 2, "Expected to be at track 2 after moving song"
 
-def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_go_to_time_offset(playlist_model, sample_playlist):
+    """Test going to the track playing at a time offset."""
+    playlist_model.playlist.extend(sample_playlist)
+    assert playlist_model.go_to_time_offset(179) == 179
+    assert playlist_model.current_track_number == 1
+    assert playlist_model.go_to_time_offset(200) == 20
+    assert playlist_model.current_track_number == 2
+
+def test_go_to_invalid_time_offset(playlist_model, sample_playlist):
+    """Test error when the time offset is past the end of the playlist."""
+    playlist_model.playlist.extend(sample_playlist)
+    with pytest.raises(ValueError, match="Invalid time offset: 335"):
+        playlist_model.go_to_time_offset(335)
+
+def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_counts):
     """Test playing the entire playlist."""
     playlist_model.playlist.extend(sample_playlist)
+    playlist_model.current_track_number = 2
 
-    playlist_model.play_entire_playlist()
+    skipped = playlist_model.play_entire_playlist()
 
-    # Check that all play counts were updated
-    mock_update_play_count.assert_any_call(1)
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == len(playlist_model.playlist)
+    # Check that all play counts were updated in one batch
+    mock_update_play_counts.assert_called_once_with([1, 2])
+    assert skipped == []
 
     # Check that the current track number was updated back to the first song
     assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
 
-def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_counts):
     """Test playing from the current position to the end of the playlist."""
     playlist_model.playlist.extend(sample_playlist)
     playlist_model.current_track_number = 2
@@ -305,7 +341,14 @@ def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play
     playlist_model.play_rest_of_playlist()
 
     # Check that play counts were updated for the remaining songs
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == 1
+    mock_update_play_counts.assert_called_once_with([2])
+
+    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
+
+def test_play_entire_playlist_reports_deleted_songs(playlist_model, sample_playlist, mock_update_play_counts):
+    """Test that songs deleted from the catalog are reported and do not stop playback."""
+    playlist_model.playlist.extend(sample_playlist)
+    mock_update_play_counts.return_value = [1]
 
-    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
\ No newline at end of file
+    assert playlist_model.play_entire_playlist() == [1]
+    assert playlist_model.current_track_number == 1
@@ -0,0 +1,122 @@
+import pytest
+
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.playlist_store import (
+    PlaylistStateStore,
+    SharedPlaylistModel,
+    create_playlist_model
+)
+from music_collection.models.song_model import Song
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def state_db(tmp_path):
+    """Fixture providing the path of an empty playlist state database."""
+    return str(tmp_path / "playlist_state.db")
+
+@pytest.fixture
+def workers(state_db, mocker):
+    """Fixture providing two shared playlist models over one store, as two worker processes would have."""
+    mocker.patch("music_collection.models.playlist_model.update_play_count")
+    mocker.patch("music_collection.models.playlist_model.update_play_counts", return_value=[])
+    return (SharedPlaylistModel(PlaylistStateStore(state_db)),
+            SharedPlaylistModel(PlaylistStateStore(state_db), backend="tree"))
+
+@pytest.fixture
+def songs():
+    return [Song(i, f"Artist {i}", f"Song {i}", 2000 + i, "Pop", 100 + i) for i in range(1, 6)]
+
+
+######################################################
+#
+#    Shared state
+#
+######################################################
+
+def test_changes_are_seen_by_other_workers(workers, songs):
+    """Test that songs added and reordered in one worker are seen by another."""
+    first, second = workers
+    for song in songs[:3]:
+        first.add_song_to_playlist(song)
+    second.add_song_to_playlist(songs[3])
+    first.move_song_to_beginning(4)
+
+    assert [song.id for song in second.get_all_songs()] == [4, 1, 2, 3]
+    assert second.get_playlist_duration() == 101 + 102 + 103 + 104
+
+def test_current_track_is_shared(workers, songs):
+    """Test that the current track number moves for every worker."""
+    first, second = workers
+    for song in songs[:3]:
+        first.add_song_to_playlist(song)
+
+    second.play_current_song()
+    second.play_current_song()
+
+    assert first.current_track_number == 3
+    assert first.get_current_song() == songs[2]
+
+def test_removed_and_cleared_songs(workers, songs):
+    """Test removing songs by ID and track number, and clearing the playlist."""
+    first, second = workers
+    for song in songs:
+        first.add_song_to_playlist(song)
+
+    second.remove_song_by_song_id(2)
+    first.remove_song_by_track_number(1)
+    assert [song.id for song in second.get_all_songs()] == [3, 4, 5]
+
+    second.clear_playlist()
+    assert first.get_playlist_length() == 0
+
+def test_state_survives_restart(state_db, workers, songs):
+    """Test that a new process, with a new store, loads the saved playlist."""
+    first, _ = workers
+    first.add_song_to_playlist(songs[0])
+    first.add_song_to_playlist(songs[1])
+    first.go_to_track_number(2)
+
+    restarted = SharedPlaylistModel(PlaylistStateStore(state_db))
+
+    assert restarted.get_all_songs() == songs[:2]
+    assert restarted.current_track_number == 2
+
+def test_failed_call_changes_nothing(workers, songs):
+    """Test that a call that raises leaves the shared playlist as it was."""
+    first, second = workers
+    first.add_song_to_playlist(songs[0])
+
+    with pytest.raises(ValueError, match="already exists in the playlist"):
+        second.add_song_to_playlist(songs[0])
+    with pytest.raises(ValueError, match="Invalid track number: 5"):
+        first.go_to_track_number(5)
+
+    assert second.get_all_songs() == [songs[0]]
+    assert first.current_track_number == 1
+
+def test_unknown_attribute(workers):
+    """Test that only PlaylistModel methods are exposed."""
+    with pytest.raises(AttributeError):
+        workers[0].playlist
+
+
+######################################################
+#
+#    Factory
+#
+######################################################
+
+def test_create_playlist_model(mocker, state_db):
+    """Test choosing between the in-memory and the shared playlist."""
+    mocker.patch("music_collection.models.playlist_store.PLAYLIST_STATE_DB_PATH", state_db)
+
+    assert isinstance(create_playlist_model(store="memory"), PlaylistModel)
+    assert isinstance(create_playlist_model(store="sqlite"), SharedPlaylistModel)
+    with pytest.raises(ValueError, match="Unknown playlist store: redis"):
+        create_playlist_model(store="redis")
@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+from pathlib import Path
+import re
+import sqlite3
+
+import pytest
+
+from music_collection.models import song_model
+from music_collection.utils.sql_utils import apply_migrations
+
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+# Statements that never read the songs table and so have no plan worth checking
+UNPLANNED_STATEMENT = re.compile(r"^\s*(INSERT|PRAGMA|BEGIN|COMMIT|ROLLBACK|CREATE|DROP|SELECT 1\b)", re.IGNORECASE)
+
+# A plan step that walks the whole table: "SCAN songs", but not "SCAN songs USING INDEX ..."
+FULL_TABLE_SCAN = re.compile(r"^SCAN \w+$")
+
+# A plan step that sorts rows after reading them: every ORDER BY here is meant to be
+# served in index order, so a lost ordering index shows up as one of these
+TEMP_BTREE_SORT = re.compile(r"^USE TEMP B-TREE FOR .*ORDER BY$")
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def traced_db(tmp_path, mocker):
+    """
+    Fixture providing a real catalog database with the migrations applied.
+
+    Every statement the song model runs is recorded so that its query plan can be checked.
+    """
+    conn = sqlite3.connect(str(tmp_path / "songs.db"))
+    conn.executescript((SQL_DIR / "create_song_table.sql").read_text())
+    apply_migrations(conn, str(SQL_DIR / "migrations"))
+    conn.executemany(
+        "INSERT INTO songs (artist, title, year, genre, duration, play_count) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Artist {i}", f"Song {i}", 2000 + i % 20, "Pop", 180 + i, i % 7) for i in range(1, 51)]
+    )
+    conn.commit()
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    @contextmanager
+    def traced_get_db_connection():
+        yield conn
+
+    mocker.patch("music_collection.models.song_model.get_db_connection", traced_get_db_connection)
+    mocker.patch.dict('os.environ', {'SQL_CREATE_TABLE_PATH': str(SQL_DIR / "create_song_table.sql"),
+                                     'SQL_MIGRATIONS_PATH': str(SQL_DIR / "migrations")})
+    mocker.patch("music_collection.models.song_model.apply_migrations",
+                 lambda conn: apply_migrations(conn, str(SQL_DIR / "migrations")))
+    mocker.patch("music_collection.models.song_model.get_random", return_value=3)
+    song_model.invalidate_live_song_ids()
+    song_model.song_cache.clear()
+
+    yield conn, statements
+    conn.close()
+
+def assert_no_full_table_scans(conn: sqlite3.Connection, statements: list[str]) -> None:
+    """Run EXPLAIN QUERY PLAN on each recorded statement and fail on a full-table scan or a sort outside an index."""
+    conn.set_trace_callback(None)
+    checked = 0
+    for statement in statements:
+        if UNPLANNED_STATEMENT.match(statement):
+            continue
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+        scans = [step for step in plan if FULL_TABLE_SCAN.match(step)]
+        assert not scans, f"Full-table scan in query plan {plan} for statement: {statement}"
+        sorts = [step for step in plan if TEMP_BTREE_SORT.match(step)]
+        assert not sorts, f"Sort outside an index in query plan {plan} for statement: {statement}"
+        checked += 1
+    assert checked, "No statements were checked"
+
+
+######################################################
+#
+#    Query plans
+#
+######################################################
+
+SONG_MODEL_CALLS = {
+    "get_song_by_id": lambda: song_model.get_song_by_id(1),
+    "get_song_by_compound_key": lambda: song_model.get_song_by_compound_key("Artist 2", "Song 2", 2002),
+    "get_all_songs": lambda: song_model.get_all_songs(),
+    "get_all_songs_sorted": lambda: song_model.get_all_songs(sort_by_play_count=True),
+    "get_all_songs_page": lambda: song_model.get_all_songs(limit=10, after_id=20),
+    "get_all_songs_sorted_page": lambda: song_model.get_all_songs(sort_by_play_count=True, limit=10, after_id=20, after_play_count=3),
+    "iter_songs": lambda: list(song_model.iter_songs(sort_by_play_count=True, batch_size=7)),
+    "get_random_song": lambda: song_model.get_random_song(),
+    "update_play_count": lambda: song_model.update_play_count(4),
+    "update_play_counts": lambda: song_model.update_play_counts([4, 5, 6]),
+    "delete_song": lambda: song_model.delete_song(5),
+}
+
+@pytest.mark.parametrize("call", SONG_MODEL_CALLS.values(), ids=SONG_MODEL_CALLS.keys())
+def test_song_model_queries_use_indexes(traced_db, call):
+    """Test that no song model query falls back to scanning the songs table."""
+    conn, statements = traced_db
+    call()
+    assert_no_full_table_scans(conn, statements)
+
+def test_lost_ordering_index_is_caught(traced_db):
+    """Test that a listing sorted without its index fails the check even though it scans no table."""
+    conn, statements = traced_db
+    conn.execute("DROP INDEX idx_songs_play_count")
+    song_model.get_all_songs(sort_by_play_count=True, limit=10, after_id=20, after_play_count=3)
+
+    with pytest.raises(AssertionError, match="Sort outside an index"):
+        assert_no_full_table_scans(conn, statements)
+
+def test_indexes_survive_clear_catalog(traced_db):
+    """Test that clearing the catalog recreates the indexes."""
+    conn, statements = traced_db
+    song_model.clear_catalog()
+
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'songs'")}
+    assert {"idx_songs_live", "idx_songs_play_count"} <= indexes
+
+    statements.clear()
+    song_model.get_all_songs(sort_by_play_count=True)
+    assert_no_full_table_scans(conn, statements)
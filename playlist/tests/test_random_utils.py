@@ -1,20 +1,29 @@
 import pytest
 import requests
 
-from music_collection.utils.random_utils import get_random
+from music_collection.utils import random_utils
+from music_collection.utils.random_utils import CircuitBreaker, LatencyHistogram, get_random
 
 
 RANDOM_NUMBER = 42
 NUM_SONGS = 100
 
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    """Start every test with a closed circuit breaker and an empty histogram."""
+    random_utils.circuit_breaker.reset()
+    random_utils.latency_histogram.reset()
+    yield
+    random_utils.circuit_breaker.reset()
+
 @pytest.fixture
 def mock_random_org(mocker):
-    # Patch the requests.get call
-    # requests.get returns an object, which we have replaced with a mock object
+    # Patch the requests.Session.get call
+    # Session.get returns an object, which we have replaced with a mock object
     mock_response = mocker.Mock()
     # We are giving that object a text attribute
     mock_response.text = f"{RANDOM_NUMBER}"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
     return mock_response
 
 
@@ -26,18 +35,18 @@ def test_get_random(mock_random_org):
     assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
 
     # Ensure that the correct URL was called
-    requests.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=5)
+    requests.Session.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=5)
 
 def test_get_random_request_failure(mocker):
     """Simulate  a request failure."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    mocker.patch("requests.Session.get", side_effect=requests.exceptions.RequestException("Connection error"))
 
     with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
         get_random(NUM_SONGS)
 
 def test_get_random_timeout(mocker):
     """Simulate  a timeout."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.Timeout)
+    mocker.patch("requests.Session.get", side_effect=requests.exceptions.Timeout)
 
     with pytest.raises(RuntimeError, match="Request to random.org timed out."):
         get_random(NUM_SONGS)
@@ -47,4 +56,61 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+        get_random(NUM_SONGS)
+
+def test_get_random_records_latency(mock_random_org):
+    """Test that each call to random.org is recorded in the latency histogram."""
+    get_random(NUM_SONGS)
+    get_random(NUM_SONGS)
+
+    assert random_utils.latency_histogram.snapshot()["count"] == 2
+
+def test_circuit_breaker_opens_after_failures(mocker):
+    """Test that repeated failures open the breaker and switch to local randomness."""
+    mock_get = mocker.patch("requests.Session.get", side_effect=requests.exceptions.RequestException("Connection error"))
+
+    for _ in range(random_utils.circuit_breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            get_random(NUM_SONGS)
+
+    assert random_utils.circuit_breaker.state == CircuitBreaker.OPEN
+
+    result = get_random(NUM_SONGS)
+    assert 1 <= result <= NUM_SONGS
+    assert mock_get.call_count == random_utils.circuit_breaker.failure_threshold
+
+def test_circuit_breaker_counts_slow_calls():
+    """Test that slow successful calls also open the breaker."""
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=0.5, reset_timeout=30)
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.9)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(True, 0.9)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+def test_circuit_breaker_half_open_trial(mocker):
+    """Test that one trial call is let through after the reset timeout, and success closes the breaker."""
+    mock_time = mocker.patch("music_collection.utils.random_utils.time.monotonic", return_value=100.0)
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=1.0, reset_timeout=30)
+    breaker.record(False, 0.1)
+    assert not breaker.allow_request()
+
+    mock_time.return_value = 131.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request(), "Only one trial call should be allowed"
+
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_latency_histogram_buckets():
+    """Test that latencies land in the right buckets."""
+    histogram = LatencyHistogram([0.1, 1.0])
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3.0)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_0.1": 1, "le_1.0": 1, "inf": 1}
+    assert snapshot["max"] == 3.0
@@ -0,0 +1,85 @@
+import pytest
+
+from music_collection.models.song_cache import SongCache
+from music_collection.models.song_model import Song
+
+
+@pytest.fixture
+def cache():
+    """Fixture to provide a small SongCache."""
+    return SongCache(max_size=2, ttl=60)
+
+def make_song(song_id: int) -> Song:
+    return Song(song_id, f"Artist {song_id}", f"Song {song_id}", 2000 + song_id, "Pop", 180)
+
+
+##################################################
+# Lookup Test Cases
+##################################################
+
+def test_lookup_by_id_and_compound_key(cache):
+    """Test that a cached song is found by either key."""
+    song = make_song(1)
+    cache.put(song)
+
+    assert cache.get_by_id(1) is song
+    assert cache.get_by_compound_key("Artist 1", "Song 1", 2001) is song
+    assert cache.get_by_id(2) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_least_recently_used_is_evicted(cache):
+    """Test that the least recently used song is evicted from both maps."""
+    cache.put(make_song(1))
+    cache.put(make_song(2))
+    cache.get_by_id(1)
+    cache.put(make_song(3))
+
+    assert cache.get_by_id(2) is None
+    assert cache.get_by_compound_key("Artist 2", "Song 2", 2002) is None
+    assert cache.get_by_id(1) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+def test_entries_expire(mocker):
+    """Test that an entry older than the TTL is a miss."""
+    mock_time = mocker.patch("music_collection.models.song_cache.time.monotonic", return_value=100.0)
+    cache = SongCache(max_size=2, ttl=10)
+    cache.put(make_song(1))
+
+    mock_time.return_value = 111.0
+    assert cache.get_by_id(1) is None
+    assert cache.get_stats()["expirations"] == 1
+
+def test_disabled_cache(cache):
+    """Test that a cache with max_size 0 stores nothing."""
+    cache = SongCache(max_size=0)
+    cache.put(make_song(1))
+    assert cache.get_by_id(1) is None
+
+
+##################################################
+# Invalidation Test Cases
+##################################################
+
+def test_invalidate_by_id(cache):
+    """Test invalidating a song by ID also forgets its compound key."""
+    cache.put(make_song(1))
+    cache.invalidate(1)
+    assert cache.get_by_compound_key("Artist 1", "Song 1", 2001) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+def test_invalidate_by_compound_key(cache):
+    """Test invalidating a song by compound key also forgets its ID."""
+    cache.put(make_song(1))
+    cache.invalidate(compound_key=("Artist 1", "Song 1", 2001))
+    assert cache.get_by_id(1) is None
+
+def test_clear(cache):
+    """Test that clearing empties the cache."""
+    cache.put(make_song(1))
+    cache.put(make_song(2))
+    cache.clear()
+    assert cache.get_stats()["size"] == 0
+    assert cache.get_by_id(1) is None
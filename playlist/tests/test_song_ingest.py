@@ -0,0 +1,164 @@
+from contextlib import contextmanager
+import io
+import json
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from music_collection.models import song_ingest
+from music_collection.models.song_ingest import ingest_songs, main, parse_stream, validate_song_row
+
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def catalog_db(tmp_path, mocker):
+    """Fixture providing a real, empty catalog database for the ingest module."""
+    conn = sqlite3.connect(str(tmp_path / "songs.db"))
+    conn.executescript((SQL_DIR / "create_song_table.sql").read_text())
+
+    @contextmanager
+    def mock_get_db_connection():
+        yield conn
+
+    mocker.patch("music_collection.models.song_ingest.get_db_connection", mock_get_db_connection)
+    yield conn
+    conn.close()
+
+def song_row(i: int, **overrides) -> dict:
+    row = {"artist": f"Artist {i}", "title": f"Song {i}", "year": 2000, "genre": "Pop", "duration": 180}
+    row.update(overrides)
+    return row
+
+def count_songs(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+
+######################################################
+#
+#    Validation
+#
+######################################################
+
+def test_validate_song_row_converts_text_numbers():
+    """Test that year and duration given as text, as in CSV, are converted."""
+    assert validate_song_row(song_row(1, year="1999", duration="200")) == ("Artist 1", "Song 1", 1999, "Pop", 200)
+
+@pytest.mark.parametrize("row, message", [
+    ("not an object", "Row must be an object"),
+    (song_row(1, artist=""), "Invalid artist"),
+    (song_row(1, genre=None), "Invalid genre"),
+    (song_row(1, year="nineteen"), "Invalid year"),
+    (song_row(1, duration=1.5), "Invalid duration"),
+    (song_row(1, duration=0), "Duration must be greater than 0"),
+    (song_row(1, year=1900), "Year must be greater than 1900"),
+])
+def test_validate_song_row_invalid(row, message):
+    """Test that invalid rows are rejected with the same rules as Song."""
+    with pytest.raises(ValueError, match=message):
+        validate_song_row(row)
+
+
+######################################################
+#
+#    Ingest
+#
+######################################################
+
+def test_ingest_songs_in_chunks(catalog_db, mocker):
+    """Test that songs are inserted in one transaction per chunk."""
+    insert_chunk = mocker.spy(song_ingest, "_insert_chunk")
+
+    result = ingest_songs((song_row(i) for i in range(25)), chunk_size=10)
+
+    assert result["rows"] == 25
+    assert result["inserted"] == 25
+    assert result["ignored"] == 0
+    assert result["invalid"] == 0
+    assert [len(call.args[0]) for call in insert_chunk.call_args_list] == [10, 10, 5]
+    assert count_songs(catalog_db) == 25
+
+def test_ingest_songs_ignores_duplicates(catalog_db):
+    """Test that existing compound keys, and repeats within the input, are ignored."""
+    ingest_songs([song_row(1), song_row(2)])
+
+    result = ingest_songs([song_row(2), song_row(3), song_row(3), song_row(1, year=2001)], chunk_size=2)
+
+    assert result["inserted"] == 2
+    assert result["ignored"] == 2
+    assert count_songs(catalog_db) == 4
+
+def test_ingest_songs_reports_invalid_rows(catalog_db):
+    """Test that invalid rows are reported by position and do not stop the ingest."""
+    result = ingest_songs([song_row(1), song_row(2, duration=-5), "garbage", song_row(3)])
+
+    assert result["inserted"] == 2
+    assert result["invalid"] == 2
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert count_songs(catalog_db) == 2
+
+def test_ingest_songs_caps_reported_errors(catalog_db, mocker):
+    """Test that only the first errors are kept, however many rows are invalid."""
+    mocker.patch("music_collection.models.song_ingest.MAX_REPORTED_ERRORS", 3)
+
+    result = ingest_songs(song_row(i, duration=0) for i in range(10))
+
+    assert result["invalid"] == 10
+    assert len(result["errors"]) == 3
+
+def test_ingest_songs_invalidates_live_song_ids(catalog_db, mocker):
+    """Test that random song selection sees the new songs."""
+    invalidate = mocker.patch("music_collection.models.song_ingest.invalidate_live_song_ids")
+
+    ingest_songs([song_row(1)])
+
+    invalidate.assert_called_once()
+
+def test_ingest_songs_invalid_chunk_size(catalog_db):
+    """Test that a non-positive chunk size is rejected."""
+    with pytest.raises(ValueError, match="Invalid chunk size: 0"):
+        ingest_songs([song_row(1)], chunk_size=0)
+
+
+######################################################
+#
+#    Parsing and CLI
+#
+######################################################
+
+def test_parse_stream_csv():
+    """Test parsing a CSV body."""
+    body = b"artist,title,year,genre,duration\nArtist 1,Song 1,2000,Pop,180\n"
+
+    assert list(parse_stream(io.BytesIO(body), "csv")) == [
+        {"artist": "Artist 1", "title": "Song 1", "year": "2000", "genre": "Pop", "duration": "180"}
+    ]
+
+def test_parse_stream_ndjson():
+    """Test that blank lines are skipped and malformed lines passed through as text."""
+    body = (json.dumps(song_row(1)) + "\n\n{broken\n").encode()
+
+    assert list(parse_stream(io.BytesIO(body), "ndjson")) == [song_row(1), "{broken"]
+
+def test_parse_stream_unsupported_format():
+    """Test that an unknown format is rejected."""
+    with pytest.raises(ValueError, match="Unsupported ingest format: xml"):
+        parse_stream(io.BytesIO(b""), "xml")
+
+def test_main_ingests_file(catalog_db, tmp_path, capsys):
+    """Test the command line entry point, taking the format from the file extension."""
+    path = tmp_path / "catalog.ndjson"
+    path.write_text("\n".join(json.dumps(song_row(i)) for i in range(3)))
+
+    main([str(path), "--chunk-size", "2"])
+
+    assert json.loads(capsys.readouterr().out)["inserted"] == 3
+    assert count_songs(catalog_db) == 3
@@ -13,7 +13,11 @@ from music_collection.models.song_model import (
     get_song_by_compound_key,
     get_all_songs,
     get_random_song,
-    update_play_count
+    invalidate_live_song_ids,
+    iter_songs,
+    song_cache,
+    update_play_count,
+    update_play_counts
 )
 
 ######################################################
@@ -44,6 +48,10 @@ def mock_cursor(mocker):
 
     mocker.patch("music_collection.models.song_model.get_db_connection", mock_get_db_connection)
 
+    # Start every test with cold caches
+    invalidate_live_song_ids()
+    song_cache.clear()
+
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
 ######################################################
@@ -164,6 +172,7 @@ def test_clear_catalog(mock_cursor, mocker):
     # Mock the file reading
     mocker.patch.dict('os.environ', {'SQL_CREATE_TABLE_PATH': 'sql/create_song_table.sql'})
     mock_open = mocker.patch('builtins.open', mocker.mock_open(read_data="The body of the create statement"))
+    mock_apply_migrations = mocker.patch("music_collection.models.song_model.apply_migrations")
 
     # Call the clear_database function
     clear_catalog()
@@ -174,6 +183,9 @@ def test_clear_catalog(mock_cursor, mocker):
     # Verify that the correct SQL script was executed
     mock_cursor.executescript.assert_called_once()
 
+    # Verify that the indexes dropped with the table were recreated
+    mock_apply_migrations.assert_called_once()
+
 
 ######################################################
 #
@@ -243,6 +255,29 @@ def test_get_song_by_compound_key(mock_cursor):
     expected_arguments = ("Artist Name", "Song Title", 2022)
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
+def test_get_song_by_compound_key_cached(mock_cursor):
+    """Test that a repeated lookup is served from the cache, by either key."""
+    mock_cursor.fetchone.return_value = (1, "Artist Name", "Song Title", 2022, "Pop", 180, False)
+
+    first = get_song_by_compound_key("Artist Name", "Song Title", 2022)
+    second = get_song_by_compound_key("Artist Name", "Song Title", 2022)
+    third = get_song_by_id(1)
+
+    assert first == second == third
+    assert mock_cursor.execute.call_count == 1
+
+def test_delete_song_invalidates_cache(mock_cursor):
+    """Test that deleting a song removes it from the cache."""
+    mock_cursor.fetchone.return_value = (1, "Artist Name", "Song Title", 2022, "Pop", 180, False)
+    get_song_by_id(1)
+
+    mock_cursor.fetchone.return_value = [False]
+    delete_song(1)
+
+    mock_cursor.fetchone.return_value = (1, "Artist Name", "Song Title", 2022, "Pop", 180, True)
+    with pytest.raises(ValueError, match="Song with ID 1 has been deleted"):
+        get_song_by_id(1)
+
 def test_get_all_songs(mock_cursor):
     """Test retrieving all songs that are not marked as deleted."""
 
@@ -330,16 +365,107 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
-def test_get_random_song(mock_cursor, mocker):
-    """Test retrieving a random song from the catalog."""
+def test_get_all_songs_first_page(mock_cursor):
+    """Test retrieving the first page of songs ordered by ID."""
 
-    # Simulate that there are multiple songs in the database
     mock_cursor.fetchall.return_value = [
         (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
-        (2, "Artist B", "Song B", 2021, "Pop", 180, 20),
-        (3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
+        (2, "Artist B", "Song B", 2021, "Pop", 180, 20)
+    ]
+
+    songs = get_all_songs(limit=2)
+
+    assert [song["id"] for song in songs] == [1, 2]
+
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+        ORDER BY id LIMIT ?
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args[0][1] == (2,)
+
+def test_get_all_songs_after_id(mock_cursor):
+    """Test retrieving the page of songs after a given ID."""
+
+    get_all_songs(limit=2, after_id=2)
+
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE AND id > ?
+        ORDER BY id LIMIT ?
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args[0][1] == (2, 2)
+
+def test_get_all_songs_after_play_count(mock_cursor):
+    """Test retrieving the page of songs after a given (play_count, id) cursor."""
+
+    get_all_songs(sort_by_play_count=True, limit=10, after_id=7, after_play_count=3)
+
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE AND (play_count < ? OR (play_count = ? AND id > ?))
+        ORDER BY play_count DESC, id LIMIT ?
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args[0][1] == (3, 3, 7, 10)
+
+def test_get_all_songs_bad_limit(mock_cursor):
+    """Test error when the page size is not positive."""
+    with pytest.raises(ValueError, match="Invalid limit: 0"):
+        get_all_songs(limit=0)
+
+def test_get_all_songs_missing_play_count_cursor(mock_cursor):
+    """Test error when paginating by play count without the play count half of the cursor."""
+    with pytest.raises(ValueError, match="after_play_count is required"):
+        get_all_songs(sort_by_play_count=True, limit=10, after_id=7)
+
+def test_iter_songs(mock_cursor):
+    """Test streaming songs in batches with fetchmany."""
+
+    mock_cursor.fetchmany.side_effect = [
+        [(1, "Artist A", "Song A", 2020, "Rock", 210, 10), (2, "Artist B", "Song B", 2021, "Pop", 180, 20)],
+        [(3, "Artist C", "Song C", 2022, "Jazz", 200, 5)],
+        []
     ]
 
+    songs = list(iter_songs(batch_size=2))
+
+    assert [song["id"] for song in songs] == [1, 2, 3]
+    assert songs[2] == {"id": 3, "artist": "Artist C", "title": "Song C", "year": 2022, "genre": "Jazz", "duration": 200, "play_count": 5}
+    mock_cursor.fetchmany.assert_called_with(2)
+    mock_cursor.fetchall.assert_not_called()
+
+def test_iter_songs_from_cursor(mock_cursor):
+    """Test resuming a stream sorted by play count after the last song received."""
+    mock_cursor.fetchmany.side_effect = [[(4, "Artist D", "Song D", 2023, "Pop", 190, 3)], []]
+
+    songs = list(iter_songs(sort_by_play_count=True, limit=5, after_id=3, after_play_count=3))
+
+    assert [song["id"] for song in songs] == [4]
+    query, params = mock_cursor.execute.call_args[0]
+    assert "ORDER BY play_count DESC, id LIMIT ?" in normalize_whitespace(query)
+    assert params == (3, 3, 3, 5)
+
+def test_iter_songs_bad_cursor(mock_cursor):
+    """Test error when resuming a play count stream without the play count half of the cursor."""
+    with pytest.raises(ValueError, match="after_play_count is required"):
+        next(iter_songs(sort_by_play_count=True, after_id=3))
+
+def test_get_random_song(mock_cursor, mocker):
+    """Test retrieving a random song from the catalog."""
+
+    # Simulate that there are multiple songs in the database
+    mock_cursor.fetchall.return_value = [(1,), (2,), (3,)]
+    mock_cursor.fetchone.return_value = (2, "Artist B", "Song B", 2021, "Pop", 180, False)
+
     # Mock random number generation to return the 2nd song
     mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
 
@@ -355,28 +481,59 @@ def test_get_random_song(mock_cursor, mocker):
     # Ensure that the random number was called with the correct number of songs
     mock_random.assert_called_once_with(3)
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    # Ensure only the live song IDs and then the chosen row were read
+    expected_query = normalize_whitespace("SELECT id FROM songs WHERE deleted = FALSE ORDER BY id")
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args_list[0][0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
-    # Assert that the SQL query was correct
+    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, deleted FROM songs WHERE id = ?")
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args_list[1][0][0])
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args_list[1][0][1] == (2,)
+
+def test_get_random_song_caches_ids(mock_cursor, mocker):
+    """Test that the live song IDs are loaded once and reused for later picks."""
+
+    mock_cursor.fetchall.return_value = [(1,), (2,), (3,)]
+    mock_cursor.fetchone.return_value = (1, "Artist A", "Song A", 2020, "Rock", 210, False)
+    mocker.patch("music_collection.models.song_model.get_random", return_value=1)
+
+    get_random_song()
+    get_random_song()
+
+    assert mock_cursor.fetchall.call_count == 1
+
+def test_get_random_song_skips_deleted_gap(mock_cursor, mocker):
+    """Test that a song deleted since the IDs were cached causes a reload and another pick."""
+
+    mock_cursor.fetchall.side_effect = [[(1,), (2,), (3,)], [(1,), (3,)]]
+    mock_cursor.fetchone.side_effect = [
+        (2, "Artist B", "Song B", 2021, "Pop", 180, True),
+        (3, "Artist C", "Song C", 2022, "Jazz", 200, False),
+    ]
+    mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
+
+    result = get_random_song()
+
+    assert result == Song(3, "Artist C", "Song C", 2022, "Jazz", 200)
+    assert mock_random.call_args_list == [mocker.call(3), mocker.call(2)]
 
 def test_get_random_song_empty_catalog(mock_cursor, mocker):
     """Test retrieving a random song when the catalog is empty."""
 
     # Simulate that the catalog is empty
     mock_cursor.fetchall.return_value = []
+    mock_random = mocker.patch("music_collection.models.song_model.get_random")
 
     # Expect a ValueError to be raised when calling get_random_song with an empty catalog
     with pytest.raises(ValueError, match="The song catalog is empty"):
         get_random_song()
 
     # Ensure that the random number was not called since there are no songs
-    mocker.patch("music_collection.models.song_model.get_random").assert_not_called()
+    mock_random.assert_not_called()
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
+    expected_query = normalize_whitespace("SELECT id FROM songs WHERE deleted = FALSE ORDER BY id")
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
 
     # Assert that the SQL query was correct
@@ -423,3 +580,18 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+def test_update_play_counts(mock_cursor):
+    """Test incrementing several play counts in one transaction."""
+
+    # The second song is deleted, so its UPDATE matches no row
+    rowcounts = iter([1, 0, 1])
+    type(mock_cursor).rowcount = property(lambda self: next(rowcounts))
+
+    skipped = update_play_counts([1, 2, 3, 1])
+
+    assert skipped == [2]
+
+    expected_query = normalize_whitespace("UPDATE songs SET play_count = play_count + ? WHERE id = ? AND deleted = FALSE")
+    assert [normalize_whitespace(call[0][0]) for call in mock_cursor.execute.call_args_list] == [expected_query] * 3
+    assert [call[0][1] for call in mock_cursor.execute.call_args_list] == [(2, 1), (1, 2), (1, 3)]
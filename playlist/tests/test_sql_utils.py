@@ -0,0 +1,181 @@
+import sqlite3
+
+import pytest
+
+from music_collection.utils.sql_utils import ConnectionManager, resolve_pragmas, retry_on_busy
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Fixture to provide a ConnectionManager on a temporary database."""
+    manager = ConnectionManager(str(tmp_path / "test.db"), pragmas=resolve_pragmas("balanced"), max_idle=2)
+    yield manager
+    manager.close_all()
+
+
+##################################################
+# Pragma Profile Test Cases
+##################################################
+
+def test_resolve_pragmas_order():
+    """Test that busy_timeout is applied before journal_mode."""
+    pragmas = list(resolve_pragmas("balanced"))
+    assert pragmas.index("busy_timeout") < pragmas.index("journal_mode")
+
+def test_resolve_pragmas_env_override(mocker):
+    """Test overriding a single pragma from the environment."""
+    mocker.patch.dict('os.environ', {'DB_PRAGMA_CACHE_SIZE': '-32000', 'DB_PRAGMA_SYNCHRONOUS': 'FULL'})
+    pragmas = resolve_pragmas("balanced")
+    assert pragmas["cache_size"] == -32000
+    assert pragmas["synchronous"] == "FULL"
+
+def test_resolve_pragmas_unknown_profile():
+    """Test error when asking for a profile that does not exist."""
+    with pytest.raises(ValueError, match="Unknown pragma profile: turbo"):
+        resolve_pragmas("turbo")
+
+def test_pragmas_applied_to_connection(manager):
+    """Test that a new connection has the profile's pragmas applied."""
+    conn = manager.acquire()
+    try:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16000
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    finally:
+        manager.release(conn)
+
+
+##################################################
+# Connection Reuse Test Cases
+##################################################
+
+def test_connection_is_reused(manager):
+    """Test that a released connection is handed out again."""
+    conn = manager.acquire()
+    manager.release(conn)
+
+    assert manager.acquire() is conn
+
+    stats = manager.get_stats()
+    assert stats["opened"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 1
+
+def test_release_rolls_back_open_transaction(manager):
+    """Test that uncommitted work is discarded when a connection is released."""
+    conn = manager.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    manager.release(conn)
+
+    conn = manager.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    manager.release(conn)
+
+def test_surplus_connections_are_closed(manager):
+    """Test that no more than max_idle connections are kept open."""
+    conns = [manager.acquire() for _ in range(3)]
+    for conn in conns:
+        manager.release(conn)
+
+    stats = manager.get_stats()
+    assert stats["idle"] == 2
+    assert stats["closed"] == 1
+    assert stats["in_use"] == 0
+
+
+##################################################
+# WAL Mode Test Cases
+##################################################
+
+@pytest.fixture
+def wal_manager(tmp_path):
+    """Fixture to provide a ConnectionManager in WAL mode on a temporary database."""
+    manager = ConnectionManager(str(tmp_path / "wal.db"), pragmas=resolve_pragmas("wal"))
+    conn = manager.acquire()
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, play_count INTEGER DEFAULT 0)")
+    conn.execute("INSERT INTO songs (id) VALUES (1)")
+    conn.commit()
+    manager.release(conn)
+    yield manager
+    manager.close_all()
+
+def test_wal_mode_enabled(wal_manager):
+    """Test that the wal profile switches the journal mode and sets up checkpointing."""
+    conn = wal_manager.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    wal_manager.release(conn)
+    assert wal_manager.checkpointer is not None
+
+def test_wal_reader_not_blocked_by_writer(wal_manager):
+    """Test that a reader sees the last committed value while a write is in progress."""
+    writer = wal_manager.acquire()
+    reader = wal_manager.acquire()
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = 1")
+
+        assert reader.execute("SELECT play_count FROM songs WHERE id = 1").fetchone()[0] == 0
+
+        writer.commit()
+        assert reader.execute("SELECT play_count FROM songs WHERE id = 1").fetchone()[0] == 1
+    finally:
+        wal_manager.release(writer)
+        wal_manager.release(reader)
+
+def test_wal_checkpoint(wal_manager):
+    """Test running a passive checkpoint."""
+    conn = wal_manager.acquire()
+    try:
+        result = wal_manager.checkpointer.checkpoint(conn)
+    finally:
+        wal_manager.release(conn)
+
+    assert result["busy"] is False
+    assert result["checkpointed_frames"] == result["log_frames"]
+    assert wal_manager.get_stats()["wal"]["checkpoints"] == 1
+
+def test_checkpoint_invalid_mode(wal_manager):
+    """Test error when asking for an unknown checkpoint mode."""
+    conn = wal_manager.acquire()
+    try:
+        with pytest.raises(ValueError, match="Invalid checkpoint mode: SOMETIMES"):
+            wal_manager.checkpointer.checkpoint(conn, "sometimes")
+    finally:
+        wal_manager.release(conn)
+
+
+##################################################
+# Busy Retry Test Cases
+##################################################
+
+def test_retry_on_busy_succeeds(mocker):
+    """Test that a busy error is retried until the operation succeeds."""
+    mocker.patch("music_collection.utils.sql_utils.time.sleep")
+    operation = mocker.Mock(side_effect=[sqlite3.OperationalError("database is locked"), "done"])
+    operation.__name__ = "operation"
+
+    assert retry_on_busy(operation)() == "done"
+    assert operation.call_count == 2
+
+def test_retry_on_busy_gives_up(mocker):
+    """Test that the busy error is raised once the retries are exhausted."""
+    mocker.patch("music_collection.utils.sql_utils.time.sleep")
+    mocker.patch("music_collection.utils.sql_utils.DB_BUSY_RETRIES", 2)
+    operation = mocker.Mock(side_effect=sqlite3.Error("Database error: database is locked"))
+    operation.__name__ = "operation"
+
+    with pytest.raises(sqlite3.Error, match="database is locked"):
+        retry_on_busy(operation)()
+    assert operation.call_count == 3
+
+def test_retry_on_busy_ignores_other_errors(mocker):
+    """Test that errors other than busy are not retried."""
+    operation = mocker.Mock(side_effect=sqlite3.OperationalError("no such table: songs"))
+    operation.__name__ = "operation"
+
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        retry_on_busy(operation)()
+    assert operation.call_count == 1